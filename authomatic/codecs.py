@@ -0,0 +1,444 @@
+"""
+Codecs
+------
+
+Compact encodings of the data Authomatic stores on the client side.
+
+The compact :class:`.Credentials` format consists of ``~`` separated
+fields::
+
+    ~<header>~<string>~<string>...[~<signature>]
+
+The *header* is the base64url encoded (without padding) bytes::
+
+    first byte  3 bits version, 1 bit set if signed, 4 bits item count
+    provider id varint
+    type id     varint provider type, varint index in PROVIDER_ID_MAP
+    tags        2 bits per item of the provider's to_tuple()
+    integers    zigzag varint per integer item
+
+String items follow the header in their order. Tokens are mostly URL safe
+already so they are stored verbatim, only characters other than
+``A-Z a-z 0-9 - . _`` are percent encoded. The optional *signature* is the
+base64url encoded first 16 bytes of HMAC-SHA256 of everything before it.
+
+The :class:`.Session` cookie value is produced by a :class:`.SessionCodec`.
+
+.. autosummary::
+    :nosignatures:
+
+    PickleSessionCodec
+    JSONSessionCodec
+
+"""
+
+import abc
+import base64
+import hashlib
+import hmac
+import json
+import time
+import zlib
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+from authomatic.exceptions import CredentialsError, SessionError
+from authomatic.six.moves import urllib_parse as parse
+
+
+__all__ = [
+    "COMPACT_PREFIX",
+    "encode_credentials",
+    "decode_credentials",
+    "is_compact",
+    "SessionCodec",
+    "PickleSessionCodec",
+    "JSONSessionCodec",
+]
+
+
+#: Marks the compact credentials format. Legacy credentials always start with
+#: the percent encoded digits of the provider id.
+COMPACT_PREFIX = "~"
+
+COMPACT_VERSION = 1
+
+_FLAG_SIGNED = 0x10
+
+_MAX_ITEMS = 0x0F
+
+_SIGNATURE_LENGTH = 16
+
+_TAG_NONE = 0
+_TAG_INT = 1
+_TAG_STR = 2
+
+
+def encode_varint(value):
+    """
+    Encodes a non-negative :class:`int` as a LEB128 varint.
+    """
+
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def decode_varint(data, position=0):
+    """
+    Decodes a varint from :data:`data` starting at :data:`position`.
+
+    :returns:
+        A ``(value, new_position)`` tuple.
+
+    """
+
+    value = shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, position
+        shift += 7
+
+
+def b64url_encode(data):
+    """
+    Base64url encodes :class:`bytes` without padding.
+    """
+
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def b64url_decode(data):
+    """
+    Decodes base64url encoded :class:`str` with or without padding.
+    """
+
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _sign(secret, payload):
+    if isinstance(secret, str):
+        secret = secret.encode("utf-8")
+    return hmac.new(secret, payload, hashlib.sha256).digest()[:_SIGNATURE_LENGTH]
+
+
+def _quote(item):
+    return parse.quote(item, safe="").replace("~", "%7E")
+
+
+def is_compact(serialized):
+    """
+    Returns ``True`` if :data:`serialized` credentials are in the compact
+    format.
+    """
+
+    return serialized.startswith(COMPACT_PREFIX)
+
+
+def encode_credentials(provider_id, provider_type_id, items, secret=None):
+    """
+    Encodes credentials to the compact format.
+
+    :param int provider_id:
+        The ``id`` of the provider in the :doc:`config`.
+
+    :param str provider_type_id:
+        :attr:`.AuthorizationProvider.type_id` e.g. ``"2-5"``.
+
+    :param tuple items:
+        Output of the provider's ``to_tuple()``.
+
+    :param str secret:
+        If set, the output will be signed with HMAC-SHA256.
+
+    :returns:
+        :class:`str`
+
+    """
+
+    if len(items) > _MAX_ITEMS:
+        raise CredentialsError(
+            f"Compact credentials can hold at most {_MAX_ITEMS} items!"
+        )
+
+    provider_type, _, index = str(provider_type_id).partition("-")
+
+    first = COMPACT_VERSION << 5 | (_FLAG_SIGNED if secret else 0) | len(items)
+    header = bytearray((first,))
+    header += encode_varint(int(provider_id))
+    header += encode_varint(int(provider_type))
+    header += encode_varint(int(index))
+
+    tags = bytearray((len(items) + 3) // 4)
+    integers = bytearray()
+    fields = [COMPACT_PREFIX]
+    for i, item in enumerate(items):
+        if item is None:
+            tag = _TAG_NONE
+        elif isinstance(item, int):
+            tag = _TAG_INT
+            # Zigzag so that negative numbers stay short.
+            integers += encode_varint(item << 1 if item >= 0 else (-item << 1) - 1)
+        else:
+            tag = _TAG_STR
+            fields.append(_quote(str(item)))
+        tags[i // 4] |= tag << (i % 4 * 2)
+
+    fields[0] += b64url_encode(bytes(header + tags + integers))
+    serialized = COMPACT_PREFIX.join(fields)
+
+    if secret:
+        signature = _sign(secret, serialized.encode("utf-8"))
+        serialized += COMPACT_PREFIX + b64url_encode(signature)
+
+    return serialized
+
+
+def decode_credentials(serialized, secret=None):
+    """
+    Decodes credentials encoded by :func:`.encode_credentials`.
+
+    :param str serialized:
+        The compact credentials.
+
+    :param str secret:
+        If set, the credentials must be signed with it.
+
+    :raises:
+        :exc:`.CredentialsError` if the credentials are malformed or the
+        signature doesn't match.
+
+    :returns:
+        A ``(provider_id, provider_type_id, items)`` tuple.
+
+    """
+
+    fields = serialized[len(COMPACT_PREFIX):].split(COMPACT_PREFIX)
+
+    try:
+        header = b64url_decode(fields[0])
+        first = header[0]
+    except (ValueError, IndexError):
+        raise CredentialsError("Malformed compact credentials!")
+
+    version = first >> 5
+    if version != COMPACT_VERSION:
+        raise CredentialsError(f"Unsupported compact credentials version {version}!")
+
+    if first & _FLAG_SIGNED:
+        signed, _, signature = serialized.rpartition(COMPACT_PREFIX)
+        fields.pop()
+        if secret and not hmac.compare_digest(
+            signature, b64url_encode(_sign(secret, signed.encode("utf-8")))
+        ):
+            raise CredentialsError("Credentials signature mismatch!")
+    elif secret:
+        raise CredentialsError("Credentials are not signed!")
+
+    try:
+        provider_id, position = decode_varint(header, 1)
+        provider_type, position = decode_varint(header, position)
+        index, position = decode_varint(header, position)
+        count = first & _MAX_ITEMS
+        tags = header[position: position + (count + 3) // 4]
+        position += (count + 3) // 4
+        strings = iter(fields[1:])
+        items = []
+        for i in range(count):
+            tag = tags[i // 4] >> (i % 4 * 2) & 0x03
+            if tag == _TAG_NONE:
+                items.append(None)
+            elif tag == _TAG_INT:
+                zigzag, position = decode_varint(header, position)
+                items.append((zigzag >> 1) ^ -(zigzag & 1))
+            elif tag == _TAG_STR:
+                items.append(parse.unquote(next(strings)))
+            else:
+                raise ValueError(f"Unknown item tag {tag}!")
+    except (ValueError, IndexError, StopIteration):
+        raise CredentialsError("Malformed compact credentials!")
+
+    return provider_id, f"{provider_type}-{index}", items
+
+
+class SessionCodec:
+    """
+    Abstract base class for codecs which convert the :class:`.Session` data
+    to a signed cookie value and back.
+    """
+
+    __metaclass__ = abc.ABCMeta
+
+    @abc.abstractmethod
+    def encode(self, data, secret, name):
+        """
+        Converts the session data to a signed string with timestamp.
+
+        :param dict data:
+            The session data.
+
+        :param str secret:
+            Secret used to sign the value.
+
+        :param str name:
+            Session cookie name which is signed together with the value.
+
+        :returns:
+            :class:`str` Cookie value.
+
+        """
+
+    @abc.abstractmethod
+    def decode(self, value, secret, name, max_age):
+        """
+        Verifies and converts the value created by :meth:`.encode` back to
+        the session data.
+
+        :param str value:
+            Cookie value.
+
+        :param str secret:
+            Secret used to sign the value.
+
+        :param str name:
+            Session cookie name.
+
+        :param int max_age:
+            Maximum allowed age of the value in seconds.
+
+        :raises:
+            :exc:`.SessionError` if the signature doesn't match.
+
+        :returns:
+            :class:`dict` or ``None`` if the value is expired or has been
+            encoded by a different codec.
+
+        """
+
+
+class PickleSessionCodec(SessionCodec):
+    """
+    The original codec which pickles and percent encodes the data and signs
+    it with HMAC-SHA1. Supports any picklable data.
+    """
+
+    @staticmethod
+    def _signature(secret, *parts):
+        signature = hmac.new(secret.encode("latin-1"), digestmod=hashlib.sha1)
+        signature.update("|".join(parts).encode("latin-1"))
+        return signature.hexdigest()
+
+    def encode(self, data, secret, name):
+        # 1. Serialize
+        serialized = pickle.dumps(data).decode("latin-1")
+
+        # 2. Encode
+        # Percent encoding produces smaller result then urlsafe base64.
+        encoded = parse.quote(serialized, "")
+
+        # 3. Concatenate
+        timestamp = str(int(time.time()))
+        signature = self._signature(secret, name, encoded, timestamp)
+        return "|".join([encoded, timestamp, signature])
+
+    def decode(self, value, secret, name, max_age):
+        # 3. Split
+        encoded, timestamp, signature = value.split("|")
+
+        # Verify signature
+        if not signature == self._signature(secret, name, encoded, timestamp):
+            raise SessionError(f'Invalid signature "{signature}"!')
+
+        # Verify timestamp
+        if int(timestamp) < int(time.time()) - max_age:
+            return None
+
+        # 2. Decode
+        decoded = parse.unquote_plus(encoded)
+
+        # 1. Deserialize
+        return pickle.loads(decoded.encode("latin-1"))
+
+
+class JSONSessionCodec(SessionCodec):
+    """
+    Encodes the data as compact JSON which is zlib compressed if longer
+    than :data:`compress_threshold`, then base64url encoded and signed with
+    HMAC-SHA256::
+
+        <payload>.<timestamp>.<signature>
+
+    Compressed payloads are prefixed with ``z``. Supports only JSON
+    serializable data, tuples become lists. The data stored by the
+    |oauth1|_ and |oauth2|_ providers qualify, the data of the
+    :class:`.openid.OpenID` provider don't.
+
+    """
+
+    _COMPRESSED = "z"
+
+    def __init__(self, compress_threshold=256):
+        """
+        :param int compress_threshold:
+            Payloads of this many bytes and more get compressed if it makes
+            them shorter. ``None`` disables compression.
+
+        """
+
+        self.compress_threshold = compress_threshold
+
+    @staticmethod
+    def _signature(secret, name, payload, timestamp):
+        if isinstance(secret, str):
+            secret = secret.encode("utf-8")
+        message = "|".join((name, payload, timestamp)).encode("utf-8")
+        return b64url_encode(hmac.new(secret, message, hashlib.sha256).digest())
+
+    def encode(self, data, secret, name):
+        serialized = json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+        payload = b64url_encode(serialized)
+        if (
+            self.compress_threshold is not None
+            and len(serialized) >= self.compress_threshold
+        ):
+            compressed = self._COMPRESSED + b64url_encode(zlib.compress(serialized))
+            if len(compressed) < len(payload):
+                payload = compressed
+
+        timestamp = str(int(time.time()))
+        signature = self._signature(secret, name, payload, timestamp)
+        return ".".join((payload, timestamp, signature))
+
+    def decode(self, value, secret, name, max_age):
+        parts = value.split(".")
+        if len(parts) != 3:
+            # Probably a cookie of another codec.
+            return None
+        payload, timestamp, signature = parts
+
+        if not hmac.compare_digest(
+            signature, self._signature(secret, name, payload, timestamp)
+        ):
+            raise SessionError(f'Invalid signature "{signature}"!')
+
+        if int(timestamp) < int(time.time()) - max_age:
+            return None
+
+        # Plain payloads can't start with "z", the "{" of a JSON object
+        # always encodes to "e".
+        if payload.startswith(self._COMPRESSED):
+            serialized = zlib.decompress(b64url_decode(payload[1:]))
+        else:
+            serialized = b64url_decode(payload)
+
+        return json.loads(serialized)
@@ -1,29 +1,34 @@
 import collections
+from concurrent import futures
 import copy
 import datetime
-import hashlib
-import hmac
+import functools
 import json
 import logging
-
-try:
-    import cPickle as pickle
-except ImportError:
-    import pickle
+import os
+import re
+import secrets
 import sys
 import threading
 import time
 from xml.etree import ElementTree
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from authomatic.exceptions import (
     ConfigError,
     CredentialsError,
+    FetchError,
     ImportStringError,
     RequestElementsError,
     SessionError,
 )
-from authomatic import six
+from authomatic import codecs
 from authomatic.six.moves import urllib_parse as parse
+from authomatic.transport import AsyncioTransport, ConnectionPool
 
 import urllib
 
@@ -36,6 +41,34 @@ _logger.addHandler(logging.StreamHandler(sys.stdout))
 
 _counter = None
 
+#: Marks a lazily computed attribute which hasn't been computed yet.
+_MISSING = object()
+
+#: First characters of JSON documents which :func:`json.loads` accepts.
+_JSON_START = '{["-0123456789tfnNI'
+
+#: Match the first non-whitespace character without copying the body.
+_FIRST_CHAR = re.compile(r"\s*(\S)")
+_FIRST_BYTE = re.compile(rb"\s*(\S)")
+
+#: Matches the bytes which don't occur in text.
+_BINARY_CHARS = re.compile(b"[\x00-\x06\x0b\x0e-\x1a\x1c-\x1f]")
+
+#: Response headers which apply only to a single connection and must not be
+#: forwarded by a proxy.
+HOP_BY_HOP_HEADERS = frozenset(
+    (
+        "connection",
+        "keep-alive",
+        "proxy-authenticate",
+        "proxy-authorization",
+        "te",
+        "trailer",
+        "transfer-encoding",
+        "upgrade",
+    )
+)
+
 
 def normalize_dict(dict_):
     """
@@ -142,32 +175,158 @@ def escape(s):
     return parse.quote(s.encode("utf-8"), safe="~")
 
 
-def json_qs_parser(body):
+def _stdlib_json_loads(body):
+    if isinstance(body, bytes):
+        # json.loads() detects the encoding of bytes and decodes them with
+        # surrogatepass which is slower than this.
+        try:
+            body = body.decode("utf-8")
+        except UnicodeDecodeError:
+            pass
+    return json.loads(body)
+
+
+def _orjson_loads(body):
+    try:
+        return orjson.loads(body)
+    except ValueError:
+        # E.g. NaN, leave it to json.
+        return json.loads(body)
+
+
+_json_loads = _stdlib_json_loads
+
+
+def set_json_backend(name="json"):
+    """
+    Selects the JSON parser used by :func:`.json_qs_parser`.
+
+    :param str name:
+        Either ``"json"`` for the standard library, which is the default, or
+        ``"orjson"`` for the faster `orjson <https://pypi.org/project/orjson/>`_
+        which must be installed. Beware that *orjson* doesn't parse integers
+        which don't fit in 64 bits exactly.
+
+    """
+
+    global _json_loads
+
+    if name == "json":
+        _json_loads = _stdlib_json_loads
+    elif name == "orjson":
+        if orjson is None:
+            raise ImportError("The orjson JSON backend requires orjson!")
+        _json_loads = _orjson_loads
+    else:
+        raise ValueError(f"Unknown JSON backend {name!r}!")
+
+
+def json_loads(body):
+    """
+    Parses JSON from :class:`str` or :class:`bytes` with the backend selected
+    by :func:`.set_json_backend`.
+    """
+
+    return _json_loads(body)
+
+
+def _parse_xml(body):
+    return ElementTree.fromstring(body)
+
+
+def _parse_qs(body):
+    if isinstance(body, bytes):
+        try:
+            body = body.decode("utf-8")
+        except UnicodeDecodeError:
+            pass
+    return dict(parse.parse_qsl(body))
+
+
+# ElementTree.ParseError is a SyntaxError which pylint can infer.
+_PARSE_ERRORS = (OverflowError, TypeError, ValueError, SyntaxError)
+
+
+def _sniff_parsers(body):
+    """
+    Returns the parsers which can succeed on the :data:`body` in the order
+    of the original JSON, XML, query string trial chain.
+    """
+
+    if isinstance(body, bytes):
+        match = _FIRST_BYTE.match(body)
+        first = match and match.group(1).decode("latin-1")
+    else:
+        match = _FIRST_CHAR.match(body)
+        first = match and match.group(1)
+
+    if first and first in _JSON_START:
+        return (json_loads, _parse_xml, _parse_qs)
+    if first == "<":
+        # JSON never starts with "<".
+        return (_parse_xml, _parse_qs)
+    return (_parse_qs,)
+
+
+@functools.lru_cache(maxsize=64)
+def _content_type_parser(content_type):
+    """
+    Returns the parser of the media type of the ``Content-Type`` header
+    value or ``None`` if the body has to be sniffed.
+    """
+
+    media_type = content_type.partition(";")[0].strip().lower()
+    if media_type == "application/json" or media_type.endswith("+json"):
+        return json_loads
+    if media_type in ("application/xml", "text/xml") or media_type.endswith(
+        "+xml"
+    ):
+        return _parse_xml
+    if media_type == "application/x-www-form-urlencoded":
+        return _parse_qs
+    # E.g. text/plain or text/html which providers use for anything.
+    return None
+
+
+def json_qs_parser(body, content_type=None):
     """
     Parses response body from JSON, XML or query string.
 
+    The format is chosen by the ``Content-Type``. If it is missing or
+    ambiguous or if the body doesn't match it, the format is guessed from
+    the first character of the body.
+
     :param body:
-        string
+        :class:`str` or :class:`bytes`. JSON and XML are parsed straight
+        from :class:`bytes`.
+
+    :param str content_type:
+        Value of the ``Content-Type`` header of the response.
 
     :returns:
         :class:`dict`, :class:`list` if input is JSON or query string,
         :class:`xml.etree.ElementTree.Element` if XML.
 
     """
-    try:
-        # Try JSON first.
-        return json.loads(body)
-    except (OverflowError, TypeError, ValueError):
-        pass
 
-    try:
-        # Then XML.
-        return ElementTree.fromstring(body)
-    except (ElementTree.ParseError, TypeError, ValueError):
-        pass
+    if content_type:
+        parser = _content_type_parser(content_type)
+        if parser is not None:
+            try:
+                return parser(body)
+            except _PARSE_ERRORS:
+                # The provider lied about the Content-Type.
+                pass
 
-    # Finally query string.
-    return dict(parse.parse_qsl(body))
+    parsers = _sniff_parsers(body)
+    for parser in parsers[:-1]:
+        try:
+            return parser(body)
+        except _PARSE_ERRORS:
+            pass
+
+    # The last resort, query string parsing never fails.
+    return parsers[-1](body)
 
 
 def import_string(import_name, silent=False):
@@ -210,6 +369,16 @@ def resolve_provider_class(class_):
     return class_
 
 
+@functools.lru_cache(maxsize=None)
+def _resolve_provider_type(provider_type):
+    """
+    Same as :func:`.resolve_provider_class` but resolves each provider type
+    only once.
+    """
+
+    return resolve_provider_class(provider_type)
+
+
 def id_to_name(config, short_name):
     """
     Returns the provider :doc:`config` key based on it's ``id`` value.
@@ -228,6 +397,99 @@ def id_to_name(config, short_name):
     raise Exception(f"No provider with id={short_name} found in the config!")
 
 
+class ProviderRegistry:
+    """
+    Precomputed lookups of the providers in a :doc:`config`.
+
+    Provider classes are resolved lazily, each at most once.
+
+    """
+
+    def __init__(self, config):
+        """
+        :param dict config:
+            :doc:`config`
+
+        """
+
+        self.config = config
+        self._names = {}
+        self._classes = {}
+        self._type_ids = None
+        self._lock = threading.Lock()
+
+        for name, cfg in config.items():
+            if isinstance(cfg, dict) and "id" in cfg:
+                # Keep the first one like id_to_name() does.
+                self._names.setdefault(cfg["id"], name)
+
+    def name(self, short_name):
+        """
+        Returns the provider :doc:`config` key based on its ``id`` value.
+        Same as :func:`.id_to_name`.
+        """
+
+        try:
+            return self._names[short_name]
+        except KeyError:
+            raise Exception(f"No provider with id={short_name} found in the config!")
+
+    def provider_class(self, provider_name):
+        """
+        Returns the resolved ``class_`` of the provider.
+
+        :raises:
+            :exc:`.ConfigError` if the provider or its ``class_`` is not in
+            the :doc:`config`.
+
+        """
+
+        try:
+            return self._classes[provider_name]
+        except KeyError:
+            pass
+
+        provider_settings = self.config.get(provider_name)
+        if not provider_settings:
+            raise ConfigError(f'Provider name "{provider_name}" not specified!')
+
+        class_ = provider_settings.get("class_")
+        if not class_:
+            raise ConfigError(
+                'The "class_" key not specified in the config'
+                f" for provider {provider_name}!"
+            )
+
+        ProviderClass = resolve_provider_class(class_)
+        self._classes[provider_name] = ProviderClass
+        return ProviderClass
+
+    def by_type_id(self, type_id):
+        """
+        Returns the provider class of the :doc:`config` with the
+        :attr:`.AuthorizationProvider.type_id` or ``None``.
+        """
+
+        if self._type_ids is None:
+            with self._lock:
+                if self._type_ids is None:
+                    type_ids = {}
+                    for name, cfg in self.config.items():
+                        if not (isinstance(cfg, dict) and cfg.get("class_")):
+                            continue
+                        try:
+                            ProviderClass = self.provider_class(name)
+                            class_type_id = getattr(ProviderClass, "type_id", None)
+                        except (ImportStringError, ValueError):
+                            # Not importable or not in its PROVIDER_ID_MAP.
+                            continue
+                        if class_type_id:
+                            type_ids.setdefault(class_type_id, ProviderClass)
+                    self._type_ids = type_ids
+
+        return self._type_ids.get(type_id)
+
+
 class ReprMixin:
     """
     Provides __repr__() method with output *ClassName(arg1=value, arg2=value)*.
@@ -281,14 +543,11 @@ class ReprMixin:
         return "{0}({1})".format(name, ", ".join(args))
 
 
-class Future(threading.Thread):
+class Future:
     """
-    Represents an activity run in a separate thread. Subclasses the standard
-    library :class:`threading.Thread` and adds :attr:`.get_result` method.
-
-    .. warning::
-
-        |async|
+    Represents an activity run asynchronously by an :class:`.Executor`.
+    Wraps a standard library :class:`concurrent.futures.Future` and adds the
+    :meth:`.get_result` method.
 
     """
 
@@ -297,21 +556,18 @@ class Future(threading.Thread):
         :param callable func:
             The function to be run in separate thread.
 
-        Calls :data:`func` in separate thread and returns immediately.
-        Accepts arbitrary positional and keyword arguments which will be
-        passed to :data:`func`.
+        Submits :data:`func` to the :data:`.default_executor` and returns
+        immediately. Accepts arbitrary positional and keyword arguments which
+        will be passed to :data:`func`.
         """
 
-        super().__init__()
-        self._func = func
-        self._args = args
-        self._kwargs = kwargs
-        self._result = None
-
-        self.start()
+        self._future = default_executor.submit_raw(func, *args, **kwargs)
 
-    def run(self):
-        self._result = self._func(*self._args, **self._kwargs)
+    @classmethod
+    def _wrap(cls, future):
+        instance = cls.__new__(cls)
+        instance._future = future
+        return instance
 
     def get_result(self, timeout=None):
         """
@@ -326,21 +582,232 @@ class Future(threading.Thread):
             :class:`float` or ``None`` A timeout for the :data:`func` to
             return in seconds.
 
+        :raises:
+            Any exception raised by the :data:`func`.
+
+        :returns:
+            The result of the wrapped :data:`func` or ``None`` if it didn't
+            return within the :data:`timeout` or has been cancelled.
+
+        """
+
+        try:
+            return self._future.result(timeout)
+        except (futures.TimeoutError, futures.CancelledError):
+            return None
+
+    def result(self, timeout=None):
+        """
+        Same as :meth:`.get_result` but raises
+        :class:`concurrent.futures.TimeoutError` if the :data:`func` didn't
+        return within the :data:`timeout` and
+        :class:`concurrent.futures.CancelledError` if it has been cancelled.
+        """
+
+        return self._future.result(timeout)
+
+    def exception(self, timeout=None):
+        """
+        Waits for the wrapped :data:`func` to finish and returns the exception
+        it raised or ``None``.
+        """
+
+        return self._future.exception(timeout)
+
+    def cancel(self):
+        """
+        Cancels the :data:`func` if it is still waiting in the queue.
+
         :returns:
-            The result of the wrapped :data:`func`.
+            ``True`` if the :data:`func` has been cancelled.
 
         """
 
-        self.join(timeout)
-        return self._result
+        return self._future.cancel()
+
+    def cancelled(self):
+        return self._future.cancelled()
+
+    def running(self):
+        return self._future.running()
+
+    def done(self):
+        return self._future.done()
+
+    def add_done_callback(self, callback):
+        """
+        Calls the :data:`callback` with this :class:`.Future` as the only
+        argument once the :data:`func` finishes or is cancelled.
+        """
+
+        self._future.add_done_callback(lambda future: callback(self))
+
+    def join(self, timeout=None):
+        """
+        Waits for the :data:`func` to finish. Kept for compatibility with the
+        former :class:`threading.Thread` based implementation.
+        """
+
+        futures.wait([self._future], timeout)
+
+
+def as_completed(futures_, timeout=None):
+    """
+    Yields :class:`.Future` instances as they complete, finished or cancelled.
+
+    :param futures_:
+        Iterable of :class:`.Future` instances.
+
+    :param float timeout:
+        Maximum number of seconds to wait. Raises
+        :class:`concurrent.futures.TimeoutError` if it elapses.
+
+    """
+
+    wrapped = {f._future: f for f in futures_}
+    for future in futures.as_completed(wrapped, timeout):
+        yield wrapped[future]
+
+
+def wait_all(futures_, timeout=None):
+    """
+    Waits for all :class:`.Future` instances and returns their results in the
+    order in which they were passed. Exceptions are propagated.
+
+    :param futures_:
+        Iterable of :class:`.Future` instances.
+
+    :param float timeout:
+        Maximum number of seconds to wait for all of them. Raises
+        :class:`concurrent.futures.TimeoutError` if it elapses.
+
+    :returns:
+        :class:`list` of results.
+
+    """
+
+    futures_ = list(futures_)
+    done, not_done = futures.wait([f._future for f in futures_], timeout)
+    if not_done:
+        raise futures.TimeoutError(
+            f"{len(not_done)} of {len(futures_)} futures did not finish in time!"
+        )
+    return [f.result() for f in futures_]
+
+
+# Marks the worker threads of an Executor.
+_worker = threading.local()
+
+
+class Executor:
+    """
+    Bounded thread pool which runs the asynchronous methods like
+    :meth:`.Authomatic.async_access`, :meth:`.User.async_update` and
+    :meth:`.Credentials.async_refresh`.
+
+    At most :data:`max_workers` threads are started and at most
+    :data:`queue_depth` further calls wait in the queue. When the queue is
+    full, :meth:`.submit` blocks until a slot frees up.
+
+    """
+
+    def __init__(self, max_workers=None, queue_depth=None):
+        """
+        :param int max_workers:
+            Maximum number of worker threads. Default is the
+            :class:`concurrent.futures.ThreadPoolExecutor` default.
+
+        :param int queue_depth:
+            Maximum number of calls waiting for a worker. ``None`` means
+            unbounded.
+
+        """
+
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+        self.queue_depth = queue_depth
+        self._executor = futures.ThreadPoolExecutor(
+            self.max_workers,
+            thread_name_prefix="authomatic",
+            initializer=self._init_worker,
+        )
+        self._slots = None
+        if queue_depth is not None:
+            self._slots = threading.BoundedSemaphore(self.max_workers + queue_depth)
+
+    def _init_worker(self):
+        _worker.executor = self
+
+    def in_worker(self):
+        """
+        Tells whether the current thread is one of the worker threads.
+
+        :returns:
+            :class:`bool`
+
+        """
+
+        return getattr(_worker, "executor", None) is self
+
+    def submit_raw(self, func, *args, **kwargs):
+        """
+        Same as :meth:`.submit` but returns the underlying
+        :class:`concurrent.futures.Future`.
+        """
+
+        if self._slots is None:
+            return self._executor.submit(func, *args, **kwargs)
+
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(func, *args, **kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Schedules :data:`func` to be called with the arguments.
+
+        :returns:
+            :class:`.Future`
+
+        """
+
+        return Future._wrap(self.submit_raw(func, *args, **kwargs))
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        """
+        Frees the worker threads. See
+        :meth:`concurrent.futures.Executor.shutdown`.
+        """
+
+        self._executor.shutdown(wait, cancel_futures=cancel_futures)
+
+
+#: The :class:`.Executor` used by :class:`.Future` and by providers which are
+#: not bound to an :class:`.Authomatic` instance.
+default_executor = Executor()
 
 
 class Session:
     """
     A dictionary-like secure cookie session implementation.
+
+    The cookie is decoded at most once and the ``Set-Cookie`` header is only
+    written by :meth:`.save` if the data has been modified.
     """
 
-    def __init__(self, adapter, secret, name="authomatic", max_age=600, secure=False):
+    def __init__(
+        self,
+        adapter,
+        secret,
+        name="authomatic",
+        max_age=600,
+        secure=False,
+        codec=None,
+    ):
         """
         :param str secret:
             Session secret used to sign the session cookie.
@@ -351,6 +818,9 @@ class Session:
         :param bool secure:
             If ``True`` the session cookie will be saved with ``Secure``
             attribute.
+        :param codec:
+            :class:`.codecs.SessionCodec` which converts the data to the
+            cookie value. Default is :class:`.codecs.PickleSessionCodec`.
         """
 
         self.adapter = adapter
@@ -358,7 +828,21 @@ class Session:
         self.secret = secret
         self.max_age = max_age
         self.secure = secure
+        self.codec = codec or codecs.PickleSessionCodec()
         self._data = {}
+        self._loaded = False
+        self._dirty = False
+
+        #: :class:`int` Number of times the cookie has been decoded.
+        self.decode_count = 0
+
+        #: :class:`int` Number of times the cookie has been encoded and
+        #: written.
+        self.encode_count = 0
+
+        #: :class:`int` Number of :meth:`.save` calls which didn't write the
+        #: cookie because nothing has changed.
+        self.skipped_save_count = 0
 
     def create_cookie(self, delete=None):
         """
@@ -392,11 +876,23 @@ class Session:
             expires="; Expires=Thu, 01-Jan-1970 00:00:01 GMT" if delete else "",
         )
 
+    @property
+    def dirty(self):
+        """
+        ``True`` if the data has been modified since it was loaded or saved.
+        """
+
+        return self._dirty
+
     def save(self):
         """
-        Adds the session cookie to headers.
+        Adds the session cookie to headers if the data has been modified.
         """
-        if self.data:
+        if not self._dirty:
+            self.skipped_save_count += 1
+            return
+
+        if self._data:
             cookie = self.create_cookie()
             cookie_len = len(cookie)
 
@@ -407,39 +903,49 @@ class Session:
                 )
 
             self.adapter.set_header("Set-Cookie", cookie)
+            self.encode_count += 1
 
-            # Reset data
-            self._data = {}
+        self._dirty = False
 
     def delete(self):
         self.adapter.set_header("Set-Cookie", self.create_cookie(delete=True))
+        self._data = {}
+        self._loaded = True
+        self._dirty = False
 
     def _get_data(self):
         """
         Extracts the session data from cookie.
         """
         cookie = self.adapter.cookies.get(self.name)
-        return self._deserialize(cookie) if cookie else {}
+        if not cookie:
+            return {}
+        self.decode_count += 1
+        return self._deserialize(cookie)
 
-    @property
-    def data(self):
+    def _load(self):
         """
-        Gets session data lazily.
+        Decodes the cookie only once and only if no value has been set
+        before.
+
+        :returns:
+            The session data.
+
         """
-        if not self._data:
-            self._data = self._get_data()
-        # Always return a dict, even if deserialization returned nothing
-        if self._data is None:
-            self._data = {}
+
+        if not self._loaded:
+            if not self._data:
+                # Always a dict, even if deserialization returned nothing
+                self._data = self._get_data() or {}
+            self._loaded = True
         return self._data
 
-    def _signature(self, *parts):
+    @property
+    def data(self):
         """
-        Creates signature for the session.
+        Gets session data lazily. See :meth:`._load`.
         """
-        signature = hmac.new(six.b(self.secret), digestmod=hashlib.sha1)
-        signature.update(six.b("|".join(parts)))
-        return signature.hexdigest()
+        return self._load()
 
     def _serialize(self, value):
         """
@@ -453,22 +959,7 @@ class Session:
 
         """
 
-        # data = copy.deepcopy(value)
-        data = value
-
-        # 1. Serialize
-        serialized = pickle.dumps(data).decode("latin-1")
-
-        # 2. Encode
-        # Percent encoding produces smaller result then urlsafe base64.
-        encoded = parse.quote(serialized, "")
-
-        # 3. Concatenate
-        timestamp = str(int(time.time()))
-        signature = self._signature(self.name, encoded, timestamp)
-        concatenated = "|".join([encoded, timestamp, signature])
-
-        return concatenated
+        return self.codec.encode(value, self.secret, self.name)
 
     def _deserialize(self, value):
         """
@@ -482,38 +973,82 @@ class Session:
 
         """
 
-        # 3. Split
-        encoded, timestamp, signature = value.split("|")
-
-        # Verify signature
-        if not signature == self._signature(self.name, encoded, timestamp):
-            raise SessionError(f'Invalid signature "{signature}"!')
-
-        # Verify timestamp
-        if int(timestamp) < int(time.time()) - self.max_age:
-            return None
-
-        # 2. Decode
-        decoded = parse.unquote_plus(encoded)
-
-        # 1. Deserialize
-        deserialized = pickle.loads(decoded.encode("latin-1"))
-
-        return deserialized
+        return self.codec.decode(value, self.secret, self.name, self.max_age)
 
     def __setitem__(self, key, value):
-        self._data[key] = value
+        if key not in self._data or self._data[key] != value:
+            self._data[key] = value
+            self._dirty = True
 
     def __getitem__(self, key):
         return self.data.__getitem__(key)
 
     def __delitem__(self, key):
-        return self._data.__delitem__(key)
+        self.data.__delitem__(key)
+        self._dirty = True
 
     def get(self, key, default=None):
         return self.data.get(key, default)
 
 
+class ServerSession(Session):
+    """
+    A :class:`.Session` whose cookie holds only a random session id while
+    the data live in a :class:`.extras.interfaces.BaseSessionStore` e.g.
+    :class:`.stores.MemorySessionStore` or :class:`.stores.SQLiteSessionStore`.
+
+    The data are stored for :data:`max_age` seconds.
+
+    """
+
+    def __init__(self, adapter, secret, store, **kwargs):
+        """
+        :param store:
+            :class:`.extras.interfaces.BaseSessionStore` instance.
+
+        Other arguments are the same as of :class:`.Session`.
+        """
+
+        super().__init__(adapter, secret, **kwargs)
+        self.store = store
+        self._session_id = None
+
+    @property
+    def session_id(self):
+        """
+        The id of the session. A new one is generated if the cookie didn't
+        reference any stored data.
+        """
+
+        if self._session_id is None:
+            self._session_id = secrets.token_urlsafe(24)
+        return self._session_id
+
+    def save(self):
+        if self._dirty and not self._data and self._session_id is not None:
+            # All items have been removed.
+            self.store.delete(self._session_id)
+        super().save()
+
+    def delete(self):
+        # Decoding the cookie finds the id of the stored data.
+        self._load()
+        if self._session_id is not None:
+            self.store.delete(self._session_id)
+        super().delete()
+
+    def _serialize(self, value):
+        self.store.set(self.session_id, value, self.max_age)
+        return self.session_id
+
+    def _deserialize(self, value):
+        data = self.store.get(value)
+        if data is not None:
+            # Reuse the id only if it references existing data.
+            self._session_id = value
+        return data
+
+
 class User(ReprMixin):
     """
     Provides unified interface to selected **user** info returned by different
@@ -581,6 +1116,17 @@ class User(ReprMixin):
         #: Only present when using the :class:`authomatic.providers.gaeopenid.GAEOpenID` provider.
         self.gae_user = kwargs.get("gae_user")
 
+    def __getattr__(self, name):
+        # Called only for missing attributes, which are those whose
+        # SecondaryUserInfo fetch has been deferred.
+        provider = self.__dict__.get("provider")
+        if name in getattr(provider, "_deferred_user_info", ()):
+            provider._load_deferred_user_info(name)
+            return self.__dict__.get(name)
+        raise AttributeError(
+            f"'{type(self).__name__}' object has no attribute '{name}'"
+        )
+
     def update(self):
         """
         Updates the user info by fetching the **provider's** user info URL.
@@ -592,20 +1138,50 @@ class User(ReprMixin):
 
         return self.provider.update_user()
 
-    def async_update(self):
+    async def aupdate(self):
         """
-        Same as :meth:`.update` but runs asynchronously in a separate thread.
+        Same as :meth:`.update` but a coroutine which doesn't block the
+        event loop.
 
-        .. warning::
+        :returns:
+            Updated instance of this class.
 
-            |async|
+        """
+
+        return await self.provider.aupdate_user()
+
+    async def aload(self, *names):
+        """
+        Loads the attributes whose :class:`.SecondaryUserInfo` fetch has been
+        deferred without blocking the event loop. Reading a deferred
+        attribute otherwise makes a blocking fetch.
+
+        :param str names:
+            Names of the attributes to load. Default is all deferred
+            attributes.
+
+        :returns:
+            This instance.
+
+        """
+
+        deferred = getattr(self.provider, "_deferred_user_info", None)
+        if deferred:
+            await self.provider._arun(
+                self.provider._deferred_user_info_flow(names or list(deferred))
+            )
+        return self
+
+    def async_update(self):
+        """
+        Same as :meth:`.update` but runs asynchronously in a separate thread.
 
         :returns:
             :class:`.Future` instance representing the separate thread.
 
         """
 
-        return Future(self.update)
+        return self.provider._executor.submit(self.update)
 
     def to_dict(self):
         """
@@ -619,6 +1195,10 @@ class User(ReprMixin):
         # copy the dictionary
         d = copy.copy(self.__dict__)
 
+        # Don't fetch the deferred attributes.
+        for name in getattr(self.provider, "_deferred_user_info", ()):
+            d.setdefault(name, None)
+
         # Keep only the provider name to avoid circular reference
         d["provider"] = self.provider.name
         d["credentials"] = self.credentials.serialize() if self.credentials else None
@@ -700,6 +1280,18 @@ class Credentials(ReprMixin):
         #: :class:`int` Expiration date as UNIX timestamp.
         self.expiration_time = int(kwargs.get("expiration_time", 0))
 
+        #: The :class:`.Executor` used by :meth:`.async_refresh`.
+        self.executor = kwargs.get("executor")
+
+        #: The :class:`.metrics.MetricsCollector` notified by :meth:`.refresh`.
+        self.metrics = kwargs.get("metrics")
+
+        #: The :class:`.tracing.Tracer` which traces :meth:`.refresh`.
+        self.tracer = kwargs.get("tracer")
+
+        #: The :class:`.refresh.RefreshCoordinator` used by :meth:`.refresh`.
+        self.refresh_coordinator = kwargs.get("refresh_coordinator")
+
         #: A :doc:`Provider <providers>` instance**.
         provider = kwargs.get("provider")
 
@@ -729,6 +1321,13 @@ class Credentials(ReprMixin):
             #: :class:`str` Consumer secret specified in the :doc:`config`.
             self.consumer_secret = provider.consumer_secret
 
+            self.executor = self.executor or provider._executor
+            self.metrics = self.metrics or provider._metrics
+            self.tracer = self.tracer or provider._tracer
+            self.refresh_coordinator = (
+                self.refresh_coordinator or provider._refresh_coordinator
+            )
+
         else:
             self.provider_name = kwargs.get("provider_name", "")
             self.provider_type = kwargs.get("provider_type", "")
@@ -830,25 +1429,44 @@ class Credentials(ReprMixin):
 
         if hasattr(self.provider_class, "refresh_credentials"):
             if force or self.expire_soon(soon):
-                logging.info(f"PROVIDER NAME: {self.provider_name}")
+                logging.info("PROVIDER NAME: %s", self.provider_name)
                 return self.provider_class(
                     self, None, self.provider_name
                 ).refresh_credentials(self)
 
-    def async_refresh(self, *args, **kwargs):
+    async def arefresh(self, force=False, soon=86400):
         """
-        Same as :meth:`.refresh` but runs asynchronously in a separate thread.
+        Same as :meth:`.refresh` but a coroutine which doesn't block the
+        event loop.
 
-        .. warning::
+        :param bool force:
+            If ``True`` the credentials will be refreshed even if they
+            won't expire soon.
+
+        :param int soon:
+            Number of seconds specifying what means *soon*.
+
+        """
+
+        if hasattr(self.provider_class, "arefresh_credentials"):
+            if force or self.expire_soon(soon):
+                logging.info("PROVIDER NAME: %s", self.provider_name)
+                return await self.provider_class(
+                    self, None, self.provider_name
+                ).arefresh_credentials(self)
 
-            |async|
+    def async_refresh(self, *args, **kwargs):
+        """
+        Same as :meth:`.refresh` but runs asynchronously in a separate thread.
 
         :returns:
             :class:`.Future` instance representing the separate thread.
 
         """
 
-        return Future(self.refresh, *args, **kwargs)
+        return (self.executor or default_executor).submit(
+            self.refresh, *args, **kwargs
+        )
 
     def provider_type_class(self):
         """
@@ -860,13 +1478,21 @@ class Credentials(ReprMixin):
 
         """
 
-        return resolve_provider_class(self.provider_type)
+        return _resolve_provider_type(self.provider_type)
 
-    def serialize(self):
+    def serialize(self, compact=False, secret=None):
         """
         Converts the credentials to a percent encoded string to be stored for
         later use.
 
+        :param bool compact:
+            If ``True`` the credentials will be serialized to the shorter
+            versioned format of :func:`.codecs.encode_credentials`.
+
+        :param str secret:
+            If set, the compact credentials will be signed with HMAC-SHA256.
+            Implies :data:`compact`.
+
         :returns:
             :class:`string`
 
@@ -882,6 +1508,11 @@ class Credentials(ReprMixin):
         # Get the provider type specific items.
         rest = self.provider_type_class().to_tuple(self)
 
+        if compact or secret:
+            return codecs.encode_credentials(
+                self.provider_id, self.provider_type_id, rest, secret
+            )
+
         # Provider ID and provider type ID are always the first two items.
         result = (self.provider_id, self.provider_type_id) + rest
 
@@ -895,7 +1526,7 @@ class Credentials(ReprMixin):
         return parse.quote(concatenated, "")
 
     @classmethod
-    def deserialize(cls, config, credentials):
+    def deserialize(cls, config, credentials, registry=None, secret=None):
         """
         A *class method* which reconstructs credentials created by
         :meth:`serialize`. You can also pass it a :class:`.Credentials`
@@ -907,6 +1538,12 @@ class Credentials(ReprMixin):
         :param str credentials:
             :class:`string` The serialized credentials or
             :class:`.Credentials` instance.
+        :param registry:
+            :class:`.ProviderRegistry` of the :data:`config` to speed up the
+            provider lookup.
+        :param str secret:
+            If set, only compact credentials signed with this secret are
+            accepted.
 
         :returns:
             :class:`.Credentials`
@@ -917,35 +1554,49 @@ class Credentials(ReprMixin):
         if isinstance(credentials, Credentials):
             return credentials
 
-        decoded = parse.unquote_plus(credentials)
+        if codecs.is_compact(credentials):
+            provider_id, provider_type_id, items = codecs.decode_credentials(
+                credentials, secret
+            )
+        elif secret:
+            raise CredentialsError("Credentials are not signed!")
+        else:
+            decoded = parse.unquote_plus(credentials)
 
-        split = decoded.split("\n")
+            split = decoded.split("\n")
 
-        # We need the provider ID to move forward.
-        if split[0] is None:
-            raise CredentialsError(
-                "To deserialize credentials you need to specify a unique "
-                'integer under the "id" key in the config for each provider!'
-            )
+            # We need the provider ID to move forward.
+            if split[0] is None:
+                raise CredentialsError(
+                    "To deserialize credentials you need to specify a unique "
+                    'integer under the "id" key in the config for each provider!'
+                )
+
+            provider_id, provider_type_id, items = int(split[0]), split[1], split[2:]
 
-        # Get provider config by short name.
-        provider_name = id_to_name(config, int(split[0]))
-        cfg = config.get(provider_name)
+        if registry is not None:
+            provider_name = registry.name(provider_id)
+            cfg = config.get(provider_name)
+            ProviderClass = registry.provider_class(provider_name)
+        else:
+            # Get provider config by short name.
+            provider_name = id_to_name(config, provider_id)
+            cfg = config.get(provider_name)
 
-        # Get the provider class.
-        ProviderClass = resolve_provider_class(cfg.get("class_"))
+            # Get the provider class.
+            ProviderClass = resolve_provider_class(cfg.get("class_"))
 
         deserialized = Credentials(config)
 
-        deserialized.provider_id = int(split[0])
+        deserialized.provider_id = provider_id
         deserialized.provider_type = ProviderClass.get_type()
-        deserialized.provider_type_id = split[1]
+        deserialized.provider_type_id = provider_type_id
         deserialized.provider_class = ProviderClass
         deserialized.provider_name = provider_name
         deserialized.provider_class = ProviderClass
 
         # Add provider type specific properties.
-        return ProviderClass.reconstruct(split[2:], deserialized, cfg)
+        return ProviderClass.reconstruct(items, deserialized, cfg)
 
 
 class LoginResult(ReprMixin):
@@ -1123,12 +1774,15 @@ class Response(ReprMixin):
         :param function content_parser:
             Callable which accepts :attr:`.content` as argument,
             parses it and returns the parsed data as :class:`dict`.
+            The default :func:`.json_qs_parser` gets the raw :class:`bytes`
+            and the ``Content-Type`` instead.
         """
 
         self.httplib_response = httplib_response
         self.content_parser = content_parser or json_qs_parser
-        self._data = None
-        self._content = None
+        self._body = _MISSING
+        self._content = _MISSING
+        self._data = _MISSING
 
         #: Same as :attr:`httplib.HTTPResponse.msg`.
         self.msg = httplib_response.msg
@@ -1172,14 +1826,108 @@ class Response(ReprMixin):
         """
         return self.httplib_response.getheaders()
 
+    def close(self):
+        """
+        Closes the response. A response fetched with ``stream=True`` holds
+        its connection, and thus a slot of the
+        :attr:`.transport.ConnectionPool.max_per_host` limit, until its body
+        has been read or it has been closed. Close it or use it as a context
+        manager if the body may not be read completely::
+
+            with authomatic.access(credentials, url, stream=True) as response:
+                for chunk in response.iter_content():
+                    ...
+
+        """
+
+        close = getattr(self.httplib_response, "close", None)
+        if close:
+            close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
     @staticmethod
     def is_binary_string(content):
         """
         Return true if string is binary data.
         """
 
-        textchars = bytearray([7, 8, 9, 10, 12, 13, 27]) + bytearray(range(0x20, 0x100))
-        return bool(content.translate(None, textchars))
+        return _BINARY_CHARS.search(content) is not None
+
+    @classmethod
+    def decode_content(cls, content):
+        """
+        Decodes :class:`bytes` to :class:`str` unless they are binary data.
+        """
+
+        if cls.is_binary_string(content):
+            return content
+        return content.decode("utf-8")
+
+    @property
+    def content_length(self):
+        """
+        The ``Content-Length`` header as :class:`int` or ``None``.
+        """
+
+        length = self.getheader("Content-Length")
+        if length and length.isdigit():
+            return int(length)
+        return None
+
+    def iter_content(self, chunk_size=65536, max_size=None):
+        """
+        Iterates over the response body in :class:`bytes` chunks without
+        holding all of it in memory, e.g. to forward a large download.
+
+        The body can be read only once, either by this method or by
+        :attr:`.content` and :attr:`.data`. If they have been read before,
+        the already read body is iterated.
+
+        :param int chunk_size:
+            Maximum size of a chunk in bytes.
+
+        :param int max_size:
+            Maximum allowed size of the body in bytes.
+
+        :raises:
+            :exc:`.FetchError` if the body is longer than :data:`max_size`.
+
+        """
+
+        if self._body is not _MISSING:
+            body = self._body
+            self._check_size(len(body), max_size)
+            for i in range(0, len(body), chunk_size):
+                yield body[i: i + chunk_size]
+            return
+
+        self._check_size(self.content_length, max_size)
+
+        received = 0
+        while True:
+            chunk = self.httplib_response.read(chunk_size)
+            if not chunk:
+                return
+            received += len(chunk)
+            self._check_size(received, max_size)
+            yield chunk
+
+    def _check_size(self, size, max_size):
+        if max_size is not None and size is not None and size > max_size:
+            self.close()
+            raise FetchError(
+                f"Response body exceeds {max_size} bytes!", status=self.status
+            )
+
+    def _read_body(self):
+        if self._body is _MISSING:
+            self._body = self.httplib_response.read()
+        return self._body
 
     @property
     def content(self):
@@ -1187,12 +1935,8 @@ class Response(ReprMixin):
         The whole response content.
         """
 
-        if not self._content:
-            content = self.httplib_response.read()
-            if self.is_binary_string(content):
-                self._content = content
-            else:
-                self._content = content.decode("utf-8")
+        if self._content is _MISSING:
+            self._content = self.decode_content(self._read_body())
         return self._content
 
     @property
@@ -1201,10 +1945,38 @@ class Response(ReprMixin):
         A :class:`dict` of data parsed from :attr:`.content`.
         """
 
-        if not self._data:
-            self._data = self.content_parser(self.content)
+        if self._data is _MISSING:
+            if self.content_parser is json_qs_parser:
+                self._data = json_qs_parser(
+                    self._read_body(), self.getheader("Content-Type")
+                )
+            else:
+                self._data = self.content_parser(self.content)
         return self._data
 
+    @data.setter
+    def data(self, value):
+        self._data = value
+
+
+class AccessResult(ReprMixin):
+    """
+    Result of a single request of :meth:`.Authomatic.access_many`.
+    """
+
+    def __init__(self, index, request, response=None, error=None):
+        #: :class:`int` Position of the :attr:`.request` in the input.
+        self.index = index
+
+        #: The request as passed to :meth:`.Authomatic.access_many`.
+        self.request = request
+
+        #: :class:`.Response` or ``None`` if the request failed.
+        self.response = response
+
+        #: The exception raised by the request or ``None``.
+        self.error = error
+
 
 class UserInfoResponse(Response):
     """
@@ -1298,6 +2070,19 @@ class RequestElements(tuple):
         )
 
 
+def _set_status(adapter, status):
+    """
+    Sets the response status with the :meth:`.BaseAdapter.set_status` or,
+    for adapters which don't implement it, to their ``status`` attribute.
+    """
+
+    set_status = getattr(adapter, "set_status", None)
+    if set_status is None:
+        adapter.status = status
+    else:
+        set_status(status)
+
+
 class Authomatic:
     def __init__(
         self,
@@ -1312,6 +2097,22 @@ class Authomatic:
         logging_level=logging.INFO,
         prefix="authomatic",
         logger=None,
+        connection_pool=None,
+        pool_max_idle=10,
+        pool_max_per_host=10,
+        pool_idle_timeout=60,
+        pool_wait_timeout=30,
+        async_transport=None,
+        executor=None,
+        max_workers=None,
+        queue_depth=None,
+        credentials_secret=None,
+        session_codec=None,
+        session_store=None,
+        metrics=None,
+        tracer=None,
+        login_state_store=None,
+        refresh_coordinator=None,
     ):
         """
         Encapsulates all the functionality of this package.
@@ -1360,6 +2161,94 @@ class Authomatic:
         :param logger:
             A :class:`logging.logger` instance.
 
+        :param connection_pool:
+            A :class:`.transport.ConnectionPool` instance used to fetch
+            **provider** URLs. If not set, a new pool is created from the
+            ``pool_*`` arguments.
+
+        :param int pool_max_idle:
+            Maximum number of idle keep-alive connections kept per host.
+            ``0`` disables connection reuse.
+            Default is ``10``.
+
+        :param int pool_max_per_host:
+            Maximum number of simultaneously open connections per host.
+            ``None`` means no limit.
+            Default is ``10``.
+
+        :param float pool_idle_timeout:
+            Idle connections older than this in seconds will not be reused.
+            Default is ``60``.
+
+        :param float pool_wait_timeout:
+            Seconds to wait for a connection to a host with
+            ``pool_max_per_host`` open connections before raising
+            :exc:`.FetchError`. ``None`` means waiting forever.
+            Default is ``30``.
+
+        :param async_transport:
+            A :class:`.transport.AsyncTransport` instance used by the
+            coroutine methods like :meth:`.aaccess` and :meth:`.alogin`.
+            Default is :class:`.transport.AsyncioTransport`.
+
+        :param executor:
+            An :class:`.Executor` instance which runs the asynchronous
+            methods like :meth:`.async_access`. If not set, a new one is
+            created from :data:`max_workers` and :data:`queue_depth`.
+
+        :param int max_workers:
+            Maximum number of threads running the asynchronous methods.
+            Default is the :class:`concurrent.futures.ThreadPoolExecutor`
+            default.
+
+        :param int queue_depth:
+            Maximum number of asynchronous calls waiting for a free thread.
+            Further calls block until a thread frees up. ``None`` means
+            unbounded.
+            Default is ``None``.
+
+        :param str credentials_secret:
+            If set, only compact credentials serialized with
+            ``credentials.serialize(secret=credentials_secret)`` are accepted.
+            Default is ``None``.
+
+        :param session_codec:
+            :class:`.codecs.SessionCodec` of the default :class:`.Session`
+            e.g. :class:`.codecs.JSONSessionCodec` which produces smaller
+            cookies than the default :class:`.codecs.PickleSessionCodec`.
+
+        :param session_store:
+            :class:`.extras.interfaces.BaseSessionStore` instance. If set,
+            the default session is a :class:`.ServerSession` which keeps the
+            data in the store and only a session id in the cookie.
+
+        :param metrics:
+            :class:`.metrics.MetricsCollector` notified of the latency,
+            status and outcome of fetches, logins, refreshes and accesses
+            e.g. :class:`.metrics.InMemoryMetrics`.
+
+        :param tracer:
+            :class:`.tracing.Tracer` which creates trace spans of logins,
+            refreshes, accesses and their fetches. Tracing is disabled if
+            ``None``.
+
+        :param login_state_store:
+            :class:`.extras.interfaces.BaseLoginStateStore` instance e.g.
+            :class:`.stores.SQLiteLoginStateStore`. If set, the |oauth1|_
+            and |oauth2|_ providers keep the state of the
+            *login procedure* there for :data:`session_max_age` seconds
+            instead of in the session, keyed by the request token or the
+            CSRF token, and the callback request may be handled by any
+            process which shares the store. Each state can be read only
+            once. The session keeps only the token, which binds the state to
+            the browser which started the *login procedure*.
+
+        :param refresh_coordinator:
+            :class:`.refresh.RefreshCoordinator` which makes sure that
+            credentials with the same refresh token are refreshed only once
+            when several threads or processes refresh them at the same
+            time.
+
         """
 
         self.config = config
@@ -1374,6 +2263,60 @@ class Authomatic:
         self.prefix = prefix
         self._logger = logger or logging.getLogger(str(id(self)))
         self._logger.setLevel(logging_level)
+        self.connection_pool = connection_pool or ConnectionPool(
+            max_idle=pool_max_idle,
+            max_per_host=pool_max_per_host,
+            idle_timeout=pool_idle_timeout,
+            wait_timeout=pool_wait_timeout,
+        )
+        self.async_transport = async_transport or AsyncioTransport()
+        self.executor = executor or Executor(max_workers, queue_depth)
+        self.credentials_secret = credentials_secret
+        self.session_codec = session_codec
+        self.session_store = session_store
+        self.metrics = metrics
+        self.tracer = tracer
+        self.login_state_store = login_state_store
+        self.refresh_coordinator = refresh_coordinator
+
+    @property
+    def config(self):
+        """
+        The :doc:`config`. Setting it invalidates the :attr:`.registry`.
+        """
+
+        return self._config
+
+    @config.setter
+    def config(self, value):
+        self._config = value
+        self._registry = None
+
+    @property
+    def registry(self):
+        """
+        :class:`.ProviderRegistry` of the :attr:`.config` built on first
+        use.
+
+        .. note::
+
+            Call :meth:`.invalidate_registry` after modifying the
+            :attr:`.config` in place.
+
+        """
+
+        registry = self._registry
+        if registry is None:
+            registry = self._registry = ProviderRegistry(self._config)
+        return registry
+
+    def invalidate_registry(self):
+        """
+        Discards the :attr:`.registry` so that it gets rebuilt from the
+        :attr:`.config` on next use.
+        """
+
+        self._registry = None
 
     def login(
         self,
@@ -1418,51 +2361,81 @@ class Authomatic:
         """
 
         if provider_name:
-            # retrieve required settings for current provider and raise
-            # exceptions if missing
-            provider_settings = self.config.get(provider_name)
-            if not provider_settings:
-                raise ConfigError(f'Provider name "{provider_name}" not specified!')
-
-            if session is None or session_saver is None:
-                session = Session(
-                    adapter=adapter,
-                    secret=self.secret,
-                    max_age=self.session_max_age,
-                    name=self.prefix,
-                    secure=self.secure_cookie,
-                )
+            provider = self._login_provider(
+                adapter, provider_name, callback, session, session_saver, **kwargs
+            )
 
-                session_saver = session.save
+            # return login result
+            return provider.login()
 
-            # Resolve provider class.
-            class_ = provider_settings.get("class_")
-            if not class_:
-                raise ConfigError(
-                    'The "class_" key not specified in the config'
-                    f" for provider {provider_name}!"
-                )
-            ProviderClass = resolve_provider_class(class_)
+        # Act like backend.
+        self.backend(adapter)
+
+    async def alogin(
+        self,
+        adapter,
+        provider_name,
+        callback=None,
+        session=None,
+        session_saver=None,
+        **kwargs,
+    ):
+        """
+        Same as :meth:`.login` but a coroutine which doesn't block the
+        event loop while fetching the **provider**.
 
-            # FIXME: Find a nicer solution
-            ProviderClass._logger = self._logger
+        Unlike :meth:`.login`, it requires the :data:`provider_name`.
 
-            # instantiate provider class
-            provider = ProviderClass(
-                self,
+        :returns:
+            :class:`.LoginResult`
+
+        """
+
+        provider = self._login_provider(
+            adapter, provider_name, callback, session, session_saver, **kwargs
+        )
+
+        return await provider.alogin()
+
+    def _login_provider(
+        self, adapter, provider_name, callback, session, session_saver, **kwargs
+    ):
+        """
+        Instantiates the **provider** for the :meth:`.login` procedure.
+        """
+
+        # Resolve provider class and raise exceptions if settings are missing.
+        ProviderClass = self.registry.provider_class(provider_name)
+
+        if session is None or session_saver is None:
+            session_kwargs = dict(
                 adapter=adapter,
-                provider_name=provider_name,
-                callback=callback,
-                session=session,
-                session_saver=session_saver,
-                **kwargs,
+                secret=self.secret,
+                max_age=self.session_max_age,
+                name=self.prefix,
+                secure=self.secure_cookie,
+                codec=self.session_codec,
             )
+            if self.session_store is None:
+                session = Session(**session_kwargs)
+            else:
+                session = ServerSession(store=self.session_store, **session_kwargs)
 
-            # return login result
-            return provider.login()
+            session_saver = session.save
 
-        # Act like backend.
-        self.backend(adapter)
+        # FIXME: Find a nicer solution
+        ProviderClass._logger = self._logger
+
+        # instantiate provider class
+        return ProviderClass(
+            self,
+            adapter=adapter,
+            provider_name=provider_name,
+            callback=callback,
+            session=session,
+            session_saver=session_saver,
+            **kwargs,
+        )
 
     def credentials(self, credentials):
         """
@@ -1477,7 +2450,16 @@ class Authomatic:
 
         """
 
-        return Credentials.deserialize(self.config, credentials)
+        credentials = Credentials.deserialize(
+            self.config, credentials, self.registry, self.credentials_secret
+        )
+        credentials.executor = credentials.executor or self.executor
+        credentials.metrics = credentials.metrics or self.metrics
+        credentials.tracer = credentials.tracer or self.tracer
+        credentials.refresh_coordinator = (
+            credentials.refresh_coordinator or self.refresh_coordinator
+        )
+        return credentials
 
     def access(
         self,
@@ -1489,6 +2471,7 @@ class Authomatic:
         body="",
         max_redirects=5,
         content_parser=None,
+        stream=False,
     ):
         """
         Accesses **protected resource** on behalf of the **user**.
@@ -1515,25 +2498,50 @@ class Authomatic:
             A function to be used to parse the :attr:`.Response.data`
             from :attr:`.Response.content`.
 
+        :param bool stream:
+            If ``True`` the body is read on demand e.g. by
+            :meth:`.Response.iter_content`. The response must then be read
+            completely or closed, see :meth:`.Response.close`.
+
         :returns:
             :class:`.Response`
 
         """
 
-        # Deserialize credentials.
-        credentials = Credentials.deserialize(self.config, credentials)
-
-        # Resolve provider class.
-        ProviderClass = credentials.provider_class
-        logging.info(f"ACCESS HEADERS: {headers}")
+        logging.info("ACCESS HEADERS: %s", headers)
         # Access resource and return response.
-
-        provider = ProviderClass(
-            self, adapter=None, provider_name=credentials.provider_name
+        return self._access_provider(credentials).access(
+            url=url,
+            params=params,
+            method=method,
+            headers=headers,
+            body=body,
+            max_redirects=max_redirects,
+            content_parser=content_parser,
+            stream=stream,
         )
-        provider.credentials = credentials
 
-        return provider.access(
+    async def aaccess(
+        self,
+        credentials,
+        url,
+        params=None,
+        method="GET",
+        headers=None,
+        body="",
+        max_redirects=5,
+        content_parser=None,
+    ):
+        """
+        Same as :meth:`.Authomatic.access` but a coroutine which doesn't
+        block the event loop.
+
+        :returns:
+            :class:`.Response`
+
+        """
+
+        return await self._access_provider(credentials).aaccess(
             url=url,
             params=params,
             method=method,
@@ -1543,21 +2551,167 @@ class Authomatic:
             content_parser=content_parser,
         )
 
-    def async_access(self, *args, **kwargs):
+    #: Names of :meth:`.access` arguments matched by the items of
+    #: positional :meth:`.access_many` requests.
+    _access_args = (
+        "credentials",
+        "url",
+        "params",
+        "method",
+        "headers",
+        "body",
+        "max_redirects",
+        "content_parser",
+    )
+
+    def access_many(self, requests, concurrency=10):
         """
-        Same as :meth:`.Authomatic.access` but runs asynchronously in a
-        separate thread.
+        Accesses many **protected resources** concurrently and yields
+        :class:`.AccessResult` instances as they finish.
 
-        .. warning::
+        The requests run in the :attr:`.executor`, each with its own
+        **provider** instance. Each distinct :data:`credentials` value is
+        deserialized only once and requests to the same host are spread
+        over at most ``pool_max_per_host`` threads so that they reuse the
+        pooled keep-alive connections. A failed request doesn't stop the
+        others, its exception is reported in :attr:`.AccessResult.error`.
 
-            |async|
+        :param requests:
+            Iterable of requests. Each is either a :class:`dict` of
+            :meth:`.access` keyword arguments or a tuple of its positional
+            arguments e.g. ``(credentials, url)``. It is consumed lazily,
+            at most :data:`concurrency` requests ahead of those in flight.
+
+        :param int concurrency:
+            Maximum number of requests in flight.
+
+        :returns:
+            Generator of :class:`.AccessResult`.
+
+        """
+
+        requests = enumerate(requests)
+        exhausted = False
+        # Requests read ahead, grouped by host preserving their order.
+        pending = collections.OrderedDict()
+        buffered = 0
+
+        per_host = self.connection_pool.max_per_host or concurrency
+        deserialized = {}
+        in_flight = {}
+        active = collections.Counter()
+
+        try:
+            while True:
+                # Read at most concurrency requests ahead.
+                while not exhausted and buffered < concurrency:
+                    try:
+                        index, request = next(requests)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    if isinstance(request, dict):
+                        kwargs = dict(request)
+                    else:
+                        kwargs = dict(zip(self._access_args, request))
+                    host = parse.urlsplit(kwargs.get("url", "")).netloc
+                    pending.setdefault(host, collections.deque()).append(
+                        (index, request, kwargs)
+                    )
+                    buffered += 1
+
+                # Round-robin over the hosts.
+                for host in list(pending):
+                    queue = pending[host]
+                    while (
+                        queue
+                        and active[host] < per_host
+                        and len(in_flight) < concurrency
+                    ):
+                        index, request, kwargs = queue.popleft()
+                        buffered -= 1
+                        credentials = kwargs.pop("credentials", None)
+                        try:
+                            if credentials not in deserialized:
+                                deserialized[credentials] = self._access_credentials(
+                                    credentials
+                                )
+                        except Exception as e:
+                            yield AccessResult(index, request, error=e)
+                            continue
+
+                        future = self.executor.submit_raw(
+                            self._access_one,
+                            deserialized[credentials],
+                            index,
+                            request,
+                            kwargs,
+                        )
+                        in_flight[future] = host
+                        active[host] += 1
+
+                    if not queue:
+                        del pending[host]
+
+                if not in_flight:
+                    if exhausted and not pending:
+                        return
+                    continue
+
+                done, _ = futures.wait(in_flight, return_when=futures.FIRST_COMPLETED)
+                for future in done:
+                    active[in_flight.pop(future)] -= 1
+                    yield future.result()
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+    def _access_one(self, credentials, index, request, kwargs):
+        # Providers aren't thread-safe, each request gets its own.
+        try:
+            response = self._access_provider(credentials).access(**kwargs)
+            return AccessResult(index, request, response=response)
+        except Exception as e:
+            return AccessResult(index, request, error=e)
+
+    def _access_credentials(self, credentials):
+        """
+        Deserializes the :data:`credentials` to access **protected
+        resources**.
+        """
+
+        return Credentials.deserialize(
+            self.config, credentials, self.registry, self.credentials_secret
+        )
+
+    def _access_provider(self, credentials):
+        """
+        Instantiates the **provider** to access **protected resources**
+        with the :data:`credentials`.
+        """
+
+        credentials = self._access_credentials(credentials)
+
+        # Resolve provider class.
+        ProviderClass = credentials.provider_class
+
+        provider = ProviderClass(
+            self, adapter=None, provider_name=credentials.provider_name
+        )
+        provider.credentials = credentials
+        return provider
+
+    def async_access(self, *args, **kwargs):
+        """
+        Same as :meth:`.Authomatic.access` but runs asynchronously in a
+        separate thread of the :attr:`.executor`.
 
         :returns:
             :class:`.Future` instance representing the separate thread.
 
         """
 
-        return Future(self.access, *args, **kwargs)
+        return self.executor.submit(self.access, *args, **kwargs)
 
     def request_elements(
         self,
@@ -1657,7 +2811,9 @@ class Authomatic:
             )
 
         # Get the provider class
-        credentials = Credentials.deserialize(self.config, credentials)
+        credentials = Credentials.deserialize(
+            self.config, credentials, self.registry, self.credentials_secret
+        )
         ProviderClass = credentials.provider_class
 
         # Create request elements
@@ -1675,7 +2831,7 @@ class Authomatic:
             return request_elements.to_json()
         return request_elements
 
-    def backend(self, adapter):
+    def backend(self, adapter, stream=False, chunk_size=65536, max_body_size=None):
         """
         Converts a *request handler* to a JSON backend which you can use with
         :ref:`authomatic.js <js>`.
@@ -1689,7 +2845,22 @@ class Authomatic:
                     authomatic.backend(Webapp2Adapter(self))
 
         :param adapter:
-            The only argument is an :doc:`adapter <adapters>`.
+            An :doc:`adapter <adapters>`.
+
+        :param bool stream:
+            If ``True`` the ``fetch`` response content is forwarded in chunks
+            of :data:`chunk_size` bytes written to the adapter one by one,
+            so that large downloads don't have to fit in memory. Hop-by-hop
+            headers like ``Transfer-Encoding`` are not forwarded.
+
+        :param int chunk_size:
+            Size of the forwarded chunks in bytes.
+
+        :param int max_body_size:
+            Maximum size of the forwarded ``fetch`` response content in
+            bytes. Larger responses are answered with ``502 Bad Gateway``,
+            or interrupted with :exc:`.FetchError` if streamed and their
+            ``Content-Length`` is unknown.
 
         The *request handler* will now accept these request parameters:
 
@@ -1777,7 +2948,10 @@ class Authomatic:
         headers = adapter.params.get("headers")
         headers = json.loads(headers) if headers else {}
 
-        ProviderClass = Credentials.deserialize(self.config, credentials).provider_class
+        credentials = Credentials.deserialize(
+            self.config, credentials, self.registry, self.credentials_secret
+        )
+        ProviderClass = credentials.provider_class
 
         if request_type == "auto":
             # If there is a "callback" param, it's a JSONP request.
@@ -1794,16 +2968,42 @@ class Authomatic:
 
         if request_type == "fetch":
             # Access protected resource
-            response = self.access(credentials, url, params, method, headers, body)
-            result = response.content
+            response = self.access(
+                credentials,
+                url,
+                params,
+                method,
+                headers,
+                body,
+                stream=stream or max_body_size is not None,
+            )
 
-            # Forward status
-            adapter.status = str(response.status) + " " + str(response.reason)
+            try:
+                if stream:
+                    result = response.iter_content(chunk_size, max_body_size)
+                    # Fail before anything is forwarded if Content-Length
+                    # is too large.
+                    response._check_size(response.content_length, max_body_size)
+                elif max_body_size is None:
+                    result = response.content
+                else:
+                    result = response.decode_content(
+                        b"".join(response.iter_content(chunk_size, max_body_size))
+                    )
+            except FetchError as e:
+                _set_status(adapter, "502 Bad Gateway")
+                adapter.set_header("Content-Type", "application/json")
+                result = json.dumps({"error": e.message})
+            else:
+                # Forward status
+                _set_status(adapter, f"{response.status} {response.reason}")
 
-            # Forward headers
-            for k, v in response.getheaders():
-                logging.info(f"    {k}: {v}")
-                adapter.set_header(k, v)
+                # Forward headers
+                for k, v in response.getheaders():
+                    if stream and k.lower() in HOP_BY_HOP_HEADERS:
+                        continue
+                    logging.info("    %s: %s", k, v)
+                    adapter.set_header(k, v)
 
         elif request_type == "elements":
             # Create request elements
@@ -1828,4 +3028,12 @@ class Authomatic:
         adapter.set_header(AUTHOMATIC_HEADER, request_type)
 
         # Write result to response
-        adapter.write(result)
+        if isinstance(result, (str, bytes)):
+            adapter.write(result)
+        else:
+            try:
+                for chunk in result:
+                    adapter.write(chunk)
+            finally:
+                # Releases the connection if the client went away.
+                response.close()
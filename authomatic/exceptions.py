@@ -81,3 +81,7 @@ class FetchError(BaseError):
 
 class RequestElementsError(BaseError):
     pass
+
+
+class IDTokenError(FailureError):
+    pass
@@ -70,3 +70,60 @@ class BaseConfig:
         """
         Same as :meth:`dict.values`.
         """
+
+
+class BaseSessionStore:
+    """
+    Abstract class for storages of the :class:`.ServerSession` data.
+    """
+
+    __metaclass__ = abc.ABCMeta
+
+    @abc.abstractmethod
+    def get(self, session_id):
+        """
+        Returns the data stored under the :data:`session_id` or ``None`` if
+        there are none or they have expired.
+        """
+
+    @abc.abstractmethod
+    def set(self, session_id, data, ttl):
+        """
+        Stores the :data:`data` under the :data:`session_id` for :data:`ttl`
+        seconds.
+        """
+
+    @abc.abstractmethod
+    def delete(self, session_id):
+        """
+        Removes the data stored under the :data:`session_id` if any.
+        """
+
+
+class BaseLoginStateStore:
+    """
+    Abstract class for storages of the values which the *login procedure*
+    needs between the redirect to the **provider** and the callback, e.g.
+    the OAuth 2.0 CSRF token or the OAuth 1.0a request token secret.
+
+    The values are keyed by the CSRF token or the request token which the
+    callback request carries, so that any node can handle it without the
+    session cookie.
+
+    """
+
+    __metaclass__ = abc.ABCMeta
+
+    @abc.abstractmethod
+    def set(self, key, value, ttl):
+        """
+        Stores the :data:`value` under the :data:`key` for :data:`ttl`
+        seconds.
+        """
+
+    @abc.abstractmethod
+    def pop(self, key):
+        """
+        Removes and returns the value stored under the :data:`key` or
+        returns ``None`` if there is none or it has expired.
+        """
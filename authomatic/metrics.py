@@ -0,0 +1,333 @@
+"""
+Metrics
+-------
+
+Instrumentation of the requests Authomatic makes to **providers**.
+
+Pass a :class:`.MetricsCollector` to :class:`.Authomatic` and it will be
+notified of every HTTP request to a **provider** and of every *login
+procedure* step, credentials refreshment and protected resource access::
+
+    metrics = InMemoryMetrics()
+    authomatic = Authomatic(CONFIG, "secret", metrics=metrics)
+
+    # In the /metrics handler
+    response.write(metrics.render_prometheus())
+
+Fetches are labeled with the *phase* of the procedure they belong to:
+
+``request_token``
+    |oauth1|_ request token.
+``token``
+    Access token exchange.
+``discovery``
+    OpenID Connect discovery document.
+``jwks``
+    JSON Web Key Set of the OpenID Connect ``id_token`` verification.
+``user_info``
+    Fetches of the user info e.g. by :meth:`.BaseProvider.update_user`.
+``refresh``
+    Credentials refreshment.
+``access``
+    Protected resource access.
+
+.. autosummary::
+    :nosignatures:
+
+    MetricsCollector
+    InMemoryMetrics
+
+"""
+
+import bisect
+import collections
+import threading
+
+
+__all__ = ["MetricsCollector", "InMemoryMetrics", "DEFAULT_BUCKETS"]
+
+
+#: Upper bounds of the latency histogram buckets in seconds.
+DEFAULT_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class MetricsCollector:
+    """
+    Base class of metrics collectors which ignores everything.
+
+    Override the methods you are interested in. They are called
+    synchronously from the threads doing the work, so they should be fast
+    and thread-safe.
+
+    """
+
+    def observe_fetch(
+        self, provider, phase, method, status, duration, size=None, error=None
+    ):
+        """
+        Called after each HTTP request to a **provider**, redirects included.
+
+        :param str provider:
+            Name of the provider in the :doc:`config`.
+
+        :param str phase:
+            The phase of the procedure e.g. ``"token"``.
+
+        :param str method:
+            HTTP method.
+
+        :param int status:
+            HTTP status code or ``None`` if the request failed.
+
+        :param float duration:
+            Seconds until the response has been read, or only until its
+            headers arrived if it is streamed.
+
+        :param int size:
+            Size of the response body in bytes if known.
+
+        :param str error:
+            Class name of the exception if the request failed.
+
+        """
+
+    def observe_operation(
+        self, provider, operation, duration, outcome, status=None, error=None
+    ):
+        """
+        Called after a *login procedure* step, credentials refreshment or
+        protected resource access.
+
+        :param str provider:
+            Name of the provider in the :doc:`config`.
+
+        :param str operation:
+            One of ``"login"``, ``"refresh"`` and ``"access"``.
+
+        :param float duration:
+            Seconds the operation took, including all its fetches.
+
+        :param str outcome:
+            ``"success"``, ``"redirect"`` if a *login procedure* continues
+            after a redirect, ``"failure"`` if a provider responded with an
+            error status, ``"skipped"`` if credentials didn't need to be
+            refreshed or ``"error"`` if an exception was raised.
+
+        :param int status:
+            HTTP status code of the last response if any.
+
+        :param str error:
+            Class name of the exception if the outcome is ``"error"``.
+
+        """
+
+
+class _Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, buckets, value):
+        self.counts[bisect.bisect_left(buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _escape(value):
+    return (
+        str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+    )
+
+
+def _labels(names, values, extra=""):
+    labels = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    if extra:
+        labels = f"{labels},{extra}" if labels else extra
+    return "{" + labels + "}"
+
+
+class InMemoryMetrics(MetricsCollector):
+    """
+    Aggregates the metrics in memory and renders them in the
+    `Prometheus text format
+    <https://prometheus.io/docs/instrumenting/exposition_formats/>`_.
+
+    Collects:
+
+    ``authomatic_fetch_duration_seconds``
+        Histogram of fetch latency per provider and phase.
+    ``authomatic_fetches_total``
+        Counter of fetches per provider, phase and status code.
+    ``authomatic_fetch_errors_total``
+        Counter of failed fetches per provider, phase and error class.
+    ``authomatic_fetch_response_bytes_total``
+        Counter of received bytes per provider and phase.
+    ``authomatic_operation_duration_seconds``
+        Histogram of operation latency per provider and operation.
+    ``authomatic_operations_total``
+        Counter of operations per provider, operation and outcome.
+    ``authomatic_operation_errors_total``
+        Counter of failed operations per provider, operation and error
+        class.
+
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """
+        :param buckets:
+            Sorted upper bounds of the latency histogram buckets in seconds.
+
+        """
+
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """
+        Forgets all collected metrics.
+        """
+
+        with self._lock:
+            self._fetch_duration = {}
+            self._fetches = collections.Counter()
+            self._fetch_errors = collections.Counter()
+            self._fetch_bytes = collections.Counter()
+            self._operation_duration = {}
+            self._operations = collections.Counter()
+            self._operation_errors = collections.Counter()
+
+    def _observe(self, histograms, key, value):
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms[key] = _Histogram(self.buckets)
+        histogram.observe(self.buckets, value)
+
+    def observe_fetch(
+        self, provider, phase, method, status, duration, size=None, error=None
+    ):
+        with self._lock:
+            self._observe(self._fetch_duration, (provider, phase), duration)
+            self._fetches[provider, phase, status or ""] += 1
+            if error:
+                self._fetch_errors[provider, phase, error] += 1
+            if size:
+                self._fetch_bytes[provider, phase] += size
+
+    def observe_operation(
+        self, provider, operation, duration, outcome, status=None, error=None
+    ):
+        with self._lock:
+            self._observe(self._operation_duration, (provider, operation), duration)
+            self._operations[provider, operation, outcome] += 1
+            if error:
+                self._operation_errors[provider, operation, error] += 1
+
+    def snapshot(self):
+        """
+        Returns the collected metrics as a :class:`dict` of metric names to
+        :class:`dict` of label value tuples to values. Histogram values are
+        ``(count, sum, bucket_counts)`` tuples where ``bucket_counts`` are
+        cumulative.
+        """
+
+        def histograms(data):
+            return {
+                key: (h.count, h.sum, self._cumulative(h.counts))
+                for key, h in data.items()
+            }
+
+        with self._lock:
+            return {
+                "authomatic_fetch_duration_seconds": histograms(
+                    self._fetch_duration
+                ),
+                "authomatic_fetches_total": dict(self._fetches),
+                "authomatic_fetch_errors_total": dict(self._fetch_errors),
+                "authomatic_fetch_response_bytes_total": dict(self._fetch_bytes),
+                "authomatic_operation_duration_seconds": histograms(
+                    self._operation_duration
+                ),
+                "authomatic_operations_total": dict(self._operations),
+                "authomatic_operation_errors_total": dict(self._operation_errors),
+            }
+
+    @staticmethod
+    def _cumulative(counts):
+        total = 0
+        cumulative = []
+        for count in counts:
+            total += count
+            cumulative.append(total)
+        return cumulative
+
+    def render_prometheus(self):
+        """
+        Renders the collected metrics in the Prometheus text format.
+
+        :returns:
+            :class:`str`
+
+        """
+
+        snapshot = self.snapshot()
+        bounds = [repr(float(b)) for b in self.buckets] + ["+Inf"]
+        lines = []
+
+        def histogram(name, help_, label_names):
+            lines.append(f"# HELP {name} {help_}")
+            lines.append(f"# TYPE {name} histogram")
+            for key, (count, sum_, buckets) in sorted(snapshot[name].items()):
+                for bound, value in zip(bounds, buckets):
+                    labels = _labels(label_names, key, f'le="{bound}"')
+                    lines.append(f"{name}_bucket{labels} {value}")
+                labels = _labels(label_names, key)
+                lines.append(f"{name}_sum{labels} {sum_!r}")
+                lines.append(f"{name}_count{labels} {count}")
+
+        def counter(name, help_, label_names):
+            lines.append(f"# HELP {name} {help_}")
+            lines.append(f"# TYPE {name} counter")
+            for key, value in sorted(snapshot[name].items(), key=str):
+                lines.append(f"{name}{_labels(label_names, key)} {value}")
+
+        histogram(
+            "authomatic_fetch_duration_seconds",
+            "Latency of HTTP requests to providers.",
+            ("provider", "phase"),
+        )
+        counter(
+            "authomatic_fetches_total",
+            "HTTP requests to providers by status code.",
+            ("provider", "phase", "status"),
+        )
+        counter(
+            "authomatic_fetch_errors_total",
+            "Failed HTTP requests to providers by error class.",
+            ("provider", "phase", "error"),
+        )
+        counter(
+            "authomatic_fetch_response_bytes_total",
+            "Bytes received from providers.",
+            ("provider", "phase"),
+        )
+        histogram(
+            "authomatic_operation_duration_seconds",
+            "Latency of logins, refreshes and accesses.",
+            ("provider", "operation"),
+        )
+        counter(
+            "authomatic_operations_total",
+            "Logins, refreshes and accesses by outcome.",
+            ("provider", "operation", "outcome"),
+        )
+        counter(
+            "authomatic_operation_errors_total",
+            "Failed logins, refreshes and accesses by error class.",
+            ("provider", "operation", "error"),
+        )
+
+        return "\n".join(lines) + "\n"
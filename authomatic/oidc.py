@@ -0,0 +1,448 @@
+"""
+OpenID Connect
+--------------
+
+Local validation of the OpenID Connect ``id_token`` which some |oauth2|_
+**providers** return with the access token. Its claims provide the
+**user** info without the request to the user info URL.
+
+Enable it with the ``verify_id_token`` option of a provider which has a
+:attr:`.OAuth2.jwks_uri` e.g. :class:`.oauth2.Google` and request the
+``openid`` scope::
+
+    CONFIG = {
+        'google': {
+            'class_': oauth2.Google,
+            'consumer_key': '#####',
+            'consumer_secret': '#####',
+            'scope': ['openid', 'profile', 'email'],
+            'verify_id_token': True,
+        },
+    }
+
+Only RS256 signatures are supported. The JSON Web Key Sets are cached in the
+process-wide :data:`.default_jwks_cache` and refetched when they expire or
+when a token is signed with an unknown key id, i.e. after a key rotation.
+
+The :class:`.oauth2.OpenIDConnect` provider reads its endpoints from the
+discovery document of the ``issuer``, which is cached in the process-wide
+:data:`.default_discovery_cache`. To share it between processes and
+restarts, give it a directory::
+
+    oidc.default_discovery_cache = oidc.DiscoveryCache(
+        directory="/var/cache/authomatic"
+    )
+
+.. autosummary::
+    :nosignatures:
+
+    JWKSCache
+    DiscoveryCache
+    verify_id_token
+
+"""
+
+import hashlib
+import hmac
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+
+from authomatic.codecs import b64url_decode
+from authomatic.exceptions import IDTokenError
+
+
+__all__ = [
+    "JWKSCache",
+    "default_jwks_cache",
+    "DiscoveryCache",
+    "default_discovery_cache",
+    "max_age",
+    "decode_jwt",
+    "verify_rs256",
+    "verify_id_token",
+]
+
+# The DER encoded DigestInfo prefix of SHA-256, RFC 8017 section 9.2.
+_SHA256_DIGEST_INFO = bytes.fromhex("3031300d060960864801650304020105000420")
+
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+def _b64url_int(value):
+    return int.from_bytes(b64url_decode(value), "big")
+
+
+def max_age(cache_control, default=None):
+    """
+    Returns the ``max-age`` of a ``Cache-Control`` header value in seconds
+    or :data:`default`.
+    """
+
+    match = _MAX_AGE.search(cache_control or "")
+    return int(match.group(1)) if match else default
+
+
+class JWKSCache:
+    """
+    Caches the RSA keys of JSON Web Key Sets by their URL.
+
+    Thread-safe, the fetching is up to the caller::
+
+        if cache.needs_fetch(jwks_uri, kid):
+            cache.set(jwks_uri, fetch(jwks_uri))
+        keys = cache.get(jwks_uri)
+
+    """
+
+    def __init__(self, ttl=3600, min_refresh_interval=60):
+        """
+        :param int ttl:
+            Seconds for which a key set is cached if :meth:`.set` doesn't
+            get another TTL e.g. from the ``Cache-Control`` header.
+
+        :param int min_refresh_interval:
+            Minimum number of seconds between fetches of a key set caused
+            by unknown key ids, so that tokens with made up key ids can't
+            make us fetch it on every login.
+
+        """
+
+        self.ttl = ttl
+        self.min_refresh_interval = min_refresh_interval
+        # jwks_uri: (keys, expires, fetched)
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, jwks_uri):
+        """
+        :returns:
+            :class:`dict` of key ids to ``(modulus, exponent)`` tuples or
+            ``None`` if the key set is not cached or has expired.
+
+        """
+
+        with self._lock:
+            entry = self._entries.get(jwks_uri)
+        if entry is None or entry[1] <= time.time():
+            return None
+        return entry[0]
+
+    def needs_fetch(self, jwks_uri, kid=None):
+        """
+        Returns ``True`` if the key set is not cached, has expired or lacks
+        the :data:`kid` and hasn't been fetched recently.
+        """
+
+        with self._lock:
+            entry = self._entries.get(jwks_uri)
+        now = time.time()
+        if entry is None or entry[1] <= now:
+            return True
+        keys, _, fetched = entry
+        if kid is not None and kid not in keys:
+            return fetched + self.min_refresh_interval <= now
+        return False
+
+    def set(self, jwks_uri, jwks, ttl=None):
+        """
+        Caches the RSA signing keys of the parsed JSON Web Key Set.
+
+        :param dict jwks:
+            The key set e.g. ``{"keys": [{"kty": "RSA", "kid": ...}]}``.
+
+        :param int ttl:
+            Seconds to cache the keys for. Default is :attr:`.ttl`.
+
+        """
+
+        keys = {}
+        for jwk in jwks.get("keys", []) if isinstance(jwks, dict) else []:
+            if jwk.get("kty") != "RSA" or jwk.get("use", "sig") != "sig":
+                continue
+            try:
+                keys[jwk.get("kid")] = (_b64url_int(jwk["n"]), _b64url_int(jwk["e"]))
+            except (KeyError, TypeError, ValueError):
+                continue
+
+        now = time.time()
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            self._entries[jwks_uri] = (keys, now + ttl, now)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+#: The process-wide :class:`.JWKSCache`.
+default_jwks_cache = JWKSCache()
+
+
+class DiscoveryCache:
+    """
+    Caches OpenID Connect discovery documents by their URL in memory and
+    optionally in a directory.
+
+    Thread-safe, the fetching is up to the caller. An expired document
+    with an ``ETag`` can be revalidated::
+
+        document = cache.get(url)
+        if document is None:
+            response = fetch(url, {"If-None-Match": cache.etag(url)})
+            if response.status == 304:
+                document = cache.revalidate(url)
+            else:
+                document = response.data
+                cache.set(url, document, response.getheader("ETag"))
+
+    """
+
+    def __init__(self, ttl=86400, directory=None):
+        """
+        :param int ttl:
+            Seconds for which a document is cached if :meth:`.set` doesn't
+            get another TTL e.g. from the ``Cache-Control`` header.
+
+        :param str directory:
+            If set, the documents are also stored in files in this
+            directory so that they survive restarts and are shared by
+            processes. Unreadable files are ignored.
+
+        """
+
+        self.ttl = ttl
+        self.directory = directory
+        # url: (document, etag, expires)
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _path(self, url):
+        name = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{name}.json")
+
+    def _entry(self, url):
+        with self._lock:
+            entry = self._entries.get(url)
+        if self.directory and (entry is None or entry[2] <= time.time()):
+            # Another process may have refreshed it.
+            try:
+                with open(self._path(url), encoding="utf-8") as f:
+                    stored = json.load(f)
+                stored = (stored["document"], stored["etag"], stored["expires"])
+            except (OSError, ValueError, KeyError, TypeError):
+                return entry
+            if entry is None or stored[2] > entry[2]:
+                entry = stored
+                with self._lock:
+                    self._entries[url] = entry
+        return entry
+
+    def _store(self, url, document, etag, ttl):
+        entry = (document, etag, time.time() + (self.ttl if ttl is None else ttl))
+        with self._lock:
+            self._entries[url] = entry
+        if self.directory:
+            data = dict(url=url, document=document, etag=etag, expires=entry[2])
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                fd, path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(data, f)
+                os.replace(path, self._path(url))
+            except OSError:
+                pass
+
+    def get(self, url):
+        """
+        :returns:
+            The cached document or ``None`` if it is not cached or has
+            expired.
+
+        """
+
+        entry = self._entry(url)
+        if entry is None or entry[2] <= time.time():
+            return None
+        return entry[0]
+
+    def etag(self, url):
+        """
+        :returns:
+            The ``ETag`` of the cached document, even if it has expired, or
+            ``None``.
+
+        """
+
+        entry = self._entry(url)
+        return entry[1] if entry else None
+
+    def set(self, url, document, etag=None, ttl=None):
+        """
+        Caches a fetched document.
+
+        :param dict document:
+            The parsed discovery document.
+
+        :param str etag:
+            The ``ETag`` header of the response.
+
+        :param int ttl:
+            Seconds to cache the document for. Default is :attr:`.ttl`.
+
+        """
+
+        self._store(url, document, etag, ttl)
+
+    def revalidate(self, url, ttl=None):
+        """
+        Renews the expired document after a ``304 Not Modified`` response.
+
+        :returns:
+            The document or ``None`` if it is not cached at all.
+
+        """
+
+        entry = self._entry(url)
+        if entry is None:
+            return None
+        self._store(url, entry[0], entry[1], ttl)
+        return entry[0]
+
+    def clear(self):
+        """
+        Clears the in-memory cache. The files are left alone.
+        """
+
+        with self._lock:
+            self._entries.clear()
+
+
+#: The process-wide :class:`.DiscoveryCache`.
+default_discovery_cache = DiscoveryCache()
+
+
+def decode_jwt(token):
+    """
+    Decodes a JSON Web Token **without** verifying it.
+
+    :returns:
+        A ``(header, claims, signing_input, signature)`` tuple.
+
+    :raises:
+        :class:`.IDTokenError` if the token is malformed.
+
+    """
+
+    try:
+        header, claims, signature = str(token).split(".")
+        signing_input = f"{header}.{claims}".encode("ascii")
+        header = json.loads(b64url_decode(header))
+        claims = json.loads(b64url_decode(claims))
+        signature = b64url_decode(signature)
+    except (ValueError, UnicodeError) as e:
+        raise IDTokenError(f"Malformed id_token: {e}")
+
+    if not isinstance(header, dict) or not isinstance(claims, dict):
+        raise IDTokenError("Malformed id_token!")
+    return header, claims, signing_input, signature
+
+
+def verify_rs256(signing_input, signature, modulus, exponent):
+    """
+    Verifies an RSASSA-PKCS1-v1_5 SHA-256 signature.
+
+    :returns:
+        :class:`bool`
+
+    """
+
+    length = (modulus.bit_length() + 7) // 8
+    if len(signature) != length:
+        return False
+
+    value = int.from_bytes(signature, "big")
+    if value >= modulus:
+        return False
+
+    digest_info = _SHA256_DIGEST_INFO + hashlib.sha256(signing_input).digest()
+    if length < len(digest_info) + 11:
+        return False
+    expected = (
+        b"\x00\x01" + b"\xff" * (length - len(digest_info) - 3) + b"\x00" + digest_info
+    )
+    return hmac.compare_digest(
+        pow(value, exponent, modulus).to_bytes(length, "big"), expected
+    )
+
+
+def verify_id_token(token, keys, issuers, audience, leeway=60):
+    """
+    Verifies the signature and the claims of an OpenID Connect ``id_token``.
+
+    :param str token:
+        The ``id_token``.
+
+    :param dict keys:
+        Key ids to ``(modulus, exponent)`` tuples, see :meth:`.JWKSCache.get`.
+
+    :param issuers:
+        The accepted values of the ``iss`` claim. ``{tid}`` is replaced with
+        the ``tid`` claim of multi-tenant providers.
+
+    :param str audience:
+        The client id i.e. the ``consumer_key``.
+
+    :param int leeway:
+        Tolerated clock skew in seconds.
+
+    :raises:
+        :class:`.IDTokenError` if the token is not valid.
+
+    :returns:
+        :class:`dict` of the claims.
+
+    """
+
+    header, claims, signing_input, signature = decode_jwt(token)
+
+    if header.get("alg") != "RS256":
+        raise IDTokenError(f"Unsupported id_token algorithm {header.get('alg')}!")
+
+    kid = header.get("kid")
+    if kid is None and len(keys) == 1:
+        key = next(iter(keys.values()))
+    else:
+        key = keys.get(kid)
+    if key is None:
+        raise IDTokenError(f"Unknown id_token key id {kid}!")
+
+    if not verify_rs256(signing_input, signature, *key):
+        raise IDTokenError("Invalid id_token signature!")
+
+    tid = str(claims.get("tid", ""))
+    if claims.get("iss") not in [i.replace("{tid}", tid) for i in issuers]:
+        raise IDTokenError(f"Invalid id_token issuer {claims.get('iss')}!")
+
+    aud = claims.get("aud")
+    audiences = aud if isinstance(aud, list) else [aud]
+    if audience not in audiences:
+        raise IDTokenError(f"Invalid id_token audience {aud}!")
+    if len(audiences) > 1 and claims.get("azp", audience) != audience:
+        raise IDTokenError(f"Invalid id_token authorized party {claims['azp']}!")
+
+    now = time.time()
+    try:
+        if float(claims["exp"]) <= now - leeway:
+            raise IDTokenError("The id_token has expired!")
+        if float(claims.get("iat", 0)) > now + leeway:
+            raise IDTokenError("The id_token has been issued in the future!")
+        if float(claims.get("nbf", 0)) > now + leeway:
+            raise IDTokenError("The id_token is not valid yet!")
+    except (KeyError, TypeError, ValueError):
+        raise IDTokenError("Invalid id_token time claims!")
+
+    return claims
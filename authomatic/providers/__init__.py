@@ -12,6 +12,7 @@ Abstract base classes for implementation of protocol specific providers.
 .. autosummary::
 
     login_decorator
+    SecondaryUserInfo
     BaseProvider
     AuthorizationProvider
     AuthenticationProvider
@@ -19,23 +20,29 @@ Abstract base classes for implementation of protocol specific providers.
 """
 
 import abc
+import asyncio
 import base64
+from concurrent import futures
+import contextvars
+import functools
 import hashlib
 import logging
 import random
-import ssl
 import sys
+import time
 import traceback
 import uuid
 
 import authomatic.core
+import authomatic.tracing
+import authomatic.transport
 from authomatic.exceptions import (
     ConfigError,
     FetchError,
     CredentialsError,
 )
 from authomatic import six
-from authomatic.six.moves import urllib_parse as parse, http_client
+from authomatic.six.moves import urllib_parse as parse
 from authomatic.exceptions import CancellationError
 
 __all__ = [
@@ -43,9 +50,49 @@ __all__ = [
     "AuthorizationProvider",
     "AuthenticationProvider",
     "login_decorator",
+    "SecondaryUserInfo",
+    "type_id_to_class",
 ]
 
 
+#: Maps :attr:`.BaseProvider.PROVIDER_TYPE_ID` to the name of the module with
+#: the ``PROVIDER_ID_MAP`` of the providers of that type.
+_type_id_modules = {}
+
+
+class _classproperty:
+    """
+    Read-only property which is also accessible on the class.
+    """
+
+    def __init__(self, fget):
+        self.fget = fget
+        self.__doc__ = fget.__doc__
+
+    def __get__(self, instance, owner):
+        return self.fget(owner)
+
+
+def type_id_to_class(type_id):
+    """
+    Returns the provider class with the :attr:`.AuthorizationProvider.type_id`.
+
+    :param str type_id:
+        e.g. ``"2-5"``.
+
+    :returns:
+        :class:`.AuthorizationProvider` subclass or ``None``.
+
+    """
+
+    provider_type_id, _, index = str(type_id).partition("-")
+    try:
+        module = sys.modules[_type_id_modules[int(provider_type_id)]]
+        return module.PROVIDER_ID_MAP[int(index)]
+    except (KeyError, ValueError, IndexError, AttributeError):
+        return None
+
+
 def _error_traceback_html(exc_info, traceback_):
     """
     Generates error traceback HTML.
@@ -74,6 +121,110 @@ def _error_traceback_html(exc_info, traceback_):
     return html.format(error=exc_info[1], traceback=traceback_)
 
 
+def _reported_login_error(provider, error):
+    """
+    Decides what to do with an exception raised during the *login procedure*.
+
+    Must be called from within the ``except`` block.
+
+    :returns:
+        The :data:`error` if it should be reported in the
+        :attr:`.LoginResult.error`, otherwise ``None`` and the caller
+        should re-raise it.
+
+    """
+
+    if provider.settings.report_errors:
+        if not isinstance(error, CancellationError):
+            provider._log(
+                logging.ERROR,
+                "Reported suppressed exception: %r!",
+                error,
+                exc_info=1,
+            )
+        return error
+
+    if provider.settings.debug:
+        # TODO: Check whether it actually works without middleware
+        provider.write(_error_traceback_html(sys.exc_info(), traceback.format_exc()))
+
+
+def _login_span(provider):
+    """
+    Starts the span of a step of the *login procedure*.
+
+    All steps of the *login procedure* share the correlation id. It is
+    derived from the :meth:`.BaseProvider._login_correlation_token` if the
+    provider has one, otherwise it is kept in the session unless the
+    provider doesn't use the session.
+
+    """
+
+    tracer = provider._tracer
+    if tracer is None:
+        return authomatic.tracing.NOOP_SPAN
+
+    token = provider._login_correlation_token()
+    if token:
+        # The token itself must not leak to the exported spans.
+        correlation_id = hashlib.sha256(token.encode("utf-8")).hexdigest()[:32]
+    elif provider._stateless_login:
+        correlation_id = tracer.new_correlation_id()
+    else:
+        correlation_id = provider._session_get("correlation_id")
+        if not correlation_id:
+            correlation_id = tracer.new_correlation_id()
+            provider._session_set("correlation_id", correlation_id)
+    provider._correlation_id = correlation_id
+    return provider._span("authomatic.login")
+
+
+def _observe_login(provider, started, error, span):
+    """
+    Reports a step of the *login procedure* to the
+    :class:`.metrics.MetricsCollector` and to its span.
+    """
+
+    if error:
+        outcome = "error"
+        span.record_error(error)
+    elif provider.user:
+        outcome = "success"
+    else:
+        # The user has been redirected to the provider.
+        outcome = "redirect"
+    span.set_attribute("outcome", outcome)
+    provider._observe_operation("login", started, outcome, error=error)
+
+
+def _finish_login(provider, error):
+    """
+    Creates the :class:`.LoginResult` if the *login procedure* has finished,
+    otherwise saves the session.
+    """
+
+    # If there is user or error the login procedure has finished
+    if provider.user or error:
+        result = authomatic.core.LoginResult(provider)
+        # Add error to result
+        result.error = error
+
+        # delete session cookie
+        session = provider.session
+        if isinstance(session, authomatic.core.Session) and (
+            not provider._stateless_login or provider.adapter.cookies.get(session.name)
+        ):
+            session.delete()
+
+        provider._log(logging.INFO, "Procedure finished.")
+
+        if provider.callback:
+            provider.callback(result)
+        return result
+    # Save session
+    provider.save_session()
+
+
 def login_decorator(func):
     """
     Decorate the :meth:`.BaseProvider.login` implementations with this
@@ -82,50 +233,119 @@ def login_decorator(func):
     Provides mechanism for error reporting and returning result which
     makes the :meth:`.BaseProvider.login` implementation cleaner.
 
+    Works with coroutine functions too e.g. :meth:`.BaseProvider.alogin`.
+
     """
 
+    if asyncio.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def async_wrap(provider, *args, **kwargs):
+            error = None
+            started = time.perf_counter()
+
+            with _login_span(provider) as span:
+                try:
+                    await func(provider, *args, **kwargs)
+                except Exception as e:  # pylint:disable=broad-except
+                    error = _reported_login_error(provider, e)
+                    if error is None:
+                        _observe_login(provider, started, e, span)
+                        raise
+
+                _observe_login(provider, started, error, span)
+            return _finish_login(provider, error)
+
+        return async_wrap
+
+    @functools.wraps(func)
     def wrap(provider, *args, **kwargs):
         error = None
-        result = authomatic.core.LoginResult(provider)
+        started = time.perf_counter()
 
-        try:
-            func(provider, *args, **kwargs)
-        except Exception as e:  # pylint:disable=broad-except
-            if provider.settings.report_errors:
-                error = e
-                if not isinstance(error, CancellationError):
-                    provider._log(
-                        logging.ERROR,
-                        f"Reported suppressed exception: {repr(error)}!",
-                        exc_info=1,
-                    )
-            else:
-                if provider.settings.debug:
-                    # TODO: Check whether it actually works without middleware
-                    provider.write(
-                        _error_traceback_html(sys.exc_info(), traceback.format_exc())
-                    )
-                raise
+        with _login_span(provider) as span:
+            try:
+                func(provider, *args, **kwargs)
+            except Exception as e:  # pylint:disable=broad-except
+                error = _reported_login_error(provider, e)
+                if error is None:
+                    _observe_login(provider, started, e, span)
+                    raise
+
+            _observe_login(provider, started, error, span)
+        return _finish_login(provider, error)
 
-        # If there is user or error the login procedure has finished
-        if provider.user or error:
-            result = authomatic.core.LoginResult(provider)
-            # Add error to result
-            result.error = error
+    return wrap
 
-            # delete session cookie
-            if isinstance(provider.session, authomatic.core.Session):
-                provider.session.delete()
 
-            provider._log(logging.INFO, "Procedure finished.")
+class SecondaryUserInfo:
+    """
+    Declares an additional fetch which completes the user info of a
+    **provider** whose :attr:`.BaseProvider.user_info_url` doesn't return
+    all of the :attr:`.BaseProvider.supported_user_attributes`.
 
-            if provider.callback:
-                provider.callback(result)
-            return result
-        # Save session
-        provider.save_session()
+    The fetch is only made when the user info is fetched e.g. by
+    :meth:`.BaseProvider.update_user` and only if some of its
+    :attr:`.attributes` are listed in the ``user_info_attributes`` of the
+    :doc:`config`. Otherwise it is deferred until one of the
+    :attr:`.attributes` of the :class:`.User` is read or until
+    :meth:`.User.aload` is awaited.
+
+    """
+
+    def __init__(self, attributes, url, merge, required=False):
+        """
+        :param attributes:
+            Names of the :class:`.User` attributes which the fetch provides
+            e.g. ``("email",)``.
+
+        :param url:
+            Either a :class:`str` which is formatted with the
+            ``user_info_url`` keyword argument, in which case the fetch runs
+            concurrently with the fetch of the user info URL, or a
+            callable which accepts the user info data and returns the URL or
+            ``None`` if there is nothing to fetch.
+
+        :param callable merge:
+            Accepts the user info data and the data of the additional fetch
+            and returns the merged user info data.
+
+        :param bool required:
+            If ``True`` the fetch is never deferred and its response is
+            returned instead of the user info response if it fails.
+
+        """
+
+        self.attributes = tuple(attributes)
+        self.url = url
+        self.merge = merge
+        self.required = required
+
+    @property
+    def concurrent(self):
+        """
+        ``True`` if the fetch doesn't need the user info data.
+        """
+
+        return not callable(self.url)
+
+    def url_for(self, user_info_url, data):
+        """
+        :returns:
+            The URL to fetch or ``None``.
+
+        """
+
+        if self.concurrent:
+            return self.url.format(user_info_url=user_info_url)
+        return self.url(data)
 
-    return wrap
+
+class _ConcurrentFlows(list):
+    """
+    Fetch flows to be run concurrently, see
+    :meth:`.BaseProvider._concurrent_step`.
+    """
 
 
 class BaseProvider:
@@ -141,6 +361,16 @@ class BaseProvider:
 
     supported_user_attributes = authomatic.core.SupportedUserAttributes()
 
+    # True if the login procedure doesn't use the session.
+    _stateless_login = False
+
+    # Returned by get_type(), set by __init_subclass__() on subclasses.
+    _provider_type = __name__ + ".object"
+
+    #: Sequence of :class:`.SecondaryUserInfo` fetches needed to get all the
+    #: :attr:`.supported_user_attributes`.
+    secondary_user_info = ()
+
     def __init__(
         self,
         settings,
@@ -174,6 +404,13 @@ class BaseProvider:
         #: :class:`.core.User`.
         self.user = None
 
+        # Shared by the trace spans of the login procedure.
+        self._correlation_id = None
+
+        # Maps the attributes of the user to their deferred
+        # SecondaryUserInfo fetches.
+        self._deferred_user_info = {}
+
         #: :class:`bool` If ``True``, the
         #: :attr:`.BaseProvider.user_authorization_url` will be displayed
         #: in a *popup mode*, if the **provider** supports it.
@@ -217,6 +454,17 @@ class BaseProvider:
 
         """
 
+    async def alogin(self):
+        """
+        Same as :meth:`.login` but a coroutine.
+
+        Providers which don't implement a non-blocking *login procedure*
+        run :meth:`.login` in the default executor of the event loop.
+
+        """
+
+        return await asyncio.get_running_loop().run_in_executor(None, self.login)
+
     # ========================================================================
     # Exposed methods
     # ========================================================================
@@ -239,10 +487,14 @@ class BaseProvider:
             "user": self.user.id if self.user else None,
         }
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._provider_type = cls.__module__ + "." + cls.__bases__[0].__name__
+
     @classmethod
     def get_type(cls):
         """
-        Returns the provider type.
+        Returns the provider type. Computed once per class.
 
         :returns:
             :class:`str` The full dotted path to base class e.g.
@@ -250,7 +502,7 @@ class BaseProvider:
 
         """
 
-        return cls.__module__ + "." + cls.__bases__[0].__name__
+        return cls._provider_type
 
     def update_user(self):
         """
@@ -261,12 +513,24 @@ class BaseProvider:
 
         """
 
+    async def aupdate_user(self):
+        """
+        Same as :meth:`.update_user` but a coroutine.
+
+        Providers which don't implement a non-blocking user update run
+        :meth:`.update_user` in the default executor of the event loop.
+
+        """
+
+        return await asyncio.get_running_loop().run_in_executor(None, self.update_user)
+
     # ========================================================================
     # Internal methods
     # ========================================================================
 
-    @property
-    def type_id(self):
+    # _classproperty passes the class.
+    @_classproperty
+    def type_id(cls):  # pylint:disable=no-self-argument
         pass
 
     def _kwarg(self, kwargs, kwname, default=None):
@@ -302,6 +566,17 @@ class BaseProvider:
                 return value
         return default
 
+    def _login_correlation_token(self):
+        """
+        Override this to return a token which all requests of the
+        *login procedure* carry e.g. the CSRF token, so that their trace
+        spans share a correlation id without storing it in the session.
+
+        :returns:
+            :class:`str` or ``None``.
+
+        """
+
     def _session_key(self, key):
         """
         Generates session key string.
@@ -313,19 +588,61 @@ class BaseProvider:
 
         return f"{self.settings.prefix}:{self.name}:{key}"
 
-    def _session_set(self, key, value):
+    @property
+    def _login_state_store(self):
+        """
+        The :class:`.extras.interfaces.BaseLoginStateStore` of the
+        :class:`.Authomatic` instance or ``None``.
+        """
+
+        return getattr(self.settings, "login_state_store", None)
+
+    def _session_set(self, key, value, token=None):
         """
         Saves a value to session.
+
+        :param str token:
+            The CSRF or request token which the callback request carries.
+            If given and there is a :attr:`._login_state_store`, the value
+            is saved there instead and only the token is saved to session
+            to bind the value to the browser.
+
         """
 
-        self.session[self._session_key(key)] = value
+        store = self._login_state_store
+        if store is not None and token:
+            store.set(
+                f"{self._session_key(key)}:{token}",
+                value,
+                getattr(self.settings, "session_max_age", 600),
+            )
+            self.session[self._session_key(f"{key}:token")] = token
+        else:
+            self.session[self._session_key(key)] = value
 
-    def _session_get(self, key):
+    def _session_get(self, key, token=None):
         """
         Retrieves a value from session.
+
+        :param str token:
+            If given and there is a :attr:`._login_state_store`, the value
+            saved by :meth:`._session_set` with the same token is removed
+            from the store and returned, but only if the session holds the
+            same token i.e. the request comes from the browser which
+            started the *login procedure*.
+
         """
 
-        return self.session.get(self._session_key(key))
+        store = self._login_state_store
+        if store is None or token is None:
+            return self.session.get(self._session_key(key))
+        # The callback request may lack the token.
+        if not token:
+            return None
+        value = store.pop(f"{self._session_key(key)}:{token}")
+        if self.session.get(self._session_key(f"{key}:token")) != token:
+            return None
+        return value
 
     @staticmethod
     def csrf_generator(secret):
@@ -349,22 +666,36 @@ class BaseProvider:
         return hashed[shift: shift - span - 1]
 
     @classmethod
-    def _log(cls, level, msg, **kwargs):
+    def _get_logger(cls):
+        return getattr(cls, "_logger", None) or authomatic.core._logger
+
+    @classmethod
+    def _log(cls, level, msg, *args, **kwargs):
         """
         Logs a message with pre-formatted prefix.
 
+        Nothing is formatted if the :data:`level` is disabled.
+
         :param int level:
             Logging level as specified in the
             `login module <http://docs.python.org/2/library/logging.html>`_ of
             Python standard library.
 
         :param str msg:
-            The actual message.
+            The actual message. A ``%`` format string if there are
+            :data:`args`.
+
+        :param args:
+            Arguments merged into :data:`msg` only when the record is
+            emitted.
 
         """
 
-        logger = getattr(cls, "_logger", None) or authomatic.core._logger
-        logger.log(level, ": ".join(("authomatic", cls.__name__, msg)), **kwargs)
+        logger = cls._get_logger()
+        if logger.isEnabledFor(level):
+            logger.log(
+                level, ": ".join(("authomatic", cls.__name__, msg)), *args, **kwargs
+            )
 
     @classmethod
     def _log_param(cls, param, value="", last=None, level=logging.DEBUG, **kwargs):
@@ -387,10 +718,247 @@ class BaseProvider:
             Python standard library.
 
         """
+        if not cls._get_logger().isEnabledFor(logging.DEBUG):
+            return
         info_style = " \u251c\u2500 "
         last_style = " \u2514\u2500 "
         style = "" if last is None else last_style if last else info_style
-        cls._log(logging.DEBUG, f"{style}{param}: {value!s}")
+        cls._log(logging.DEBUG, "%s%s: %s", style, param, value)
+
+    def _log_fetch(
+        self,
+        method,
+        url,
+        params,
+        headers,
+        body,
+        certificate_file,
+        ssl_verify,
+        response,
+        started,
+    ):
+        """
+        Logs a single DEBUG record describing a fetch and its response.
+
+        The record has an ``authomatic_fetch`` attribute with the same data
+        as a :class:`dict` for structured log handlers.
+
+        """
+
+        logger = self._get_logger()
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+
+        fetch = {
+            "method": method,
+            "url": url,
+            "params": params,
+            "headers": headers,
+            "body": body,
+            "certificate": certificate_file,
+            "ssl_verify": ssl_verify,
+            "status": response.status,
+            "response_headers": response.getheaders(),
+            "elapsed": time.perf_counter() - started,
+        }
+        self._log(
+            logging.DEBUG,
+            "Fetched %(method)s %(url)s -> %(status)s in %(elapsed).3fs, "
+            "params: %(params)s, headers: %(headers)s, body: %(body)s, "
+            "certificate: %(certificate)s, SSL verify: %(ssl_verify)s, "
+            "response headers: %(response_headers)s",
+            fetch,
+            extra={"authomatic_fetch": fetch},
+        )
+
+    @property
+    def _connection_pool(self):
+        """
+        The :class:`.transport.ConnectionPool` of the :class:`.Authomatic`
+        instance or the :data:`.transport.default_pool`.
+        """
+
+        return (
+            getattr(self.settings, "connection_pool", None)
+            or authomatic.transport.default_pool
+        )
+
+    @property
+    def _executor(self):
+        """
+        The :class:`.core.Executor` of the :class:`.Authomatic` instance or
+        the :data:`.core.default_executor`.
+        """
+
+        return (
+            getattr(self.settings, "executor", None)
+            or authomatic.core.default_executor
+        )
+
+    @property
+    def _metrics(self):
+        """
+        The :class:`.metrics.MetricsCollector` of the :class:`.Authomatic`
+        instance or ``None``.
+        """
+
+        return getattr(self.settings, "metrics", None)
+
+    def _observe_fetch(self, phase, method, started, response=None, error=None):
+        metrics = self._metrics
+        if metrics is None:
+            return
+        metrics.observe_fetch(
+            self.name,
+            phase,
+            method,
+            response.status if response else None,
+            time.perf_counter() - started,
+            size=getattr(response, "length", None),
+            error=type(error).__name__ if error else None,
+        )
+
+    def _observe_operation(
+        self, operation, started, outcome, response=None, error=None
+    ):
+        metrics = self._metrics
+        if metrics is None:
+            return
+        metrics.observe_operation(
+            self.name,
+            operation,
+            time.perf_counter() - started,
+            outcome,
+            status=response.status if response is not None else None,
+            error=type(error).__name__ if error else None,
+        )
+
+    @property
+    def _tracer(self):
+        """
+        The :class:`.tracing.Tracer` of the :class:`.Authomatic` instance or
+        ``None``.
+        """
+
+        return getattr(self.settings, "tracer", None)
+
+    @property
+    def _refresh_coordinator(self):
+        """
+        The :class:`.refresh.RefreshCoordinator` of the :class:`.Authomatic`
+        instance or ``None``.
+        """
+
+        return getattr(self.settings, "refresh_coordinator", None)
+
+    def _span(self, name, **attributes):
+        """
+        Starts a trace span or returns the :data:`.tracing.NOOP_SPAN` if
+        tracing is disabled.
+
+        :returns:
+            :class:`.tracing.Span`
+
+        """
+
+        tracer = self._tracer
+        if tracer is None:
+            return authomatic.tracing.NOOP_SPAN
+        return tracer.start_span(
+            name, correlation_id=self._correlation_id, provider=self.name, **attributes
+        )
+
+    @property
+    def _async_transport(self):
+        """
+        The :class:`.transport.AsyncTransport` of the :class:`.Authomatic`
+        instance or the :data:`.transport.default_async_transport`.
+        """
+
+        return (
+            getattr(self.settings, "async_transport", None)
+            or authomatic.transport.default_async_transport
+        )
+
+    def _prepare_request(self, url, method, params, headers, body):
+        """
+        Prepares the request sent by :meth:`._fetch` and :meth:`._afetch`.
+
+        :returns:
+            A ``(url_parsed, request_path, params, headers, body)`` tuple.
+
+        """
+        # 'magic' using _kwarg method
+        # pylint:disable=no-member
+        params = params or {}
+        params.update(self.access_params)
+
+        headers = headers or {}
+        headers.update(self.access_headers)
+
+        url_parsed = parse.urlsplit(url)
+        query = parse.urlencode(params)
+
+        if method in ("POST", "PUT", "PATCH"):
+            if not body:
+                # Put querystring to body
+                body = query
+                query = ""
+                headers.update({"Content-Type": "application/x-www-form-urlencoded"})
+        request_path = parse.urlunsplit(
+            ("", "", url_parsed.path or "", query or "", "")
+        )
+
+        return url_parsed, request_path, params, headers, body
+
+    def _fetch_span(self, url_parsed, method, phase, hop):
+        """
+        Starts the span of a fetch. The query string is left out of the URL
+        because it may contain credentials.
+        """
+
+        if self._tracer is None:
+            return authomatic.tracing.NOOP_SPAN
+        return self._span(
+            "authomatic.fetch",
+            phase=phase,
+            method=method,
+            url=parse.urlunsplit(
+                (url_parsed.scheme, url_parsed.netloc, url_parsed.path, "", "")
+            ),
+            hop=hop,
+        )
+
+    def _redirect_location(self, url, response, max_redirects):
+        """
+        Returns the URL to which the :data:`response` redirects or ``None``.
+
+        :raises:
+            :exc:`.FetchError` if the URL redirects to itself or if there are
+            no more redirects remaining.
+
+        """
+
+        location = response.getheader("Location")
+
+        if response.status in (300, 301, 302, 303, 307) and location:
+            if location == url:
+                raise FetchError(
+                    "Url redirects to itself!", url=location, status=response.status
+                )
+
+            if max_redirects > 0:
+                self._log(
+                    logging.DEBUG,
+                    "Redirecting to %s, remaining redirects: %s",
+                    location,
+                    max_redirects - 1,
+                )
+                return location
+
+            raise FetchError(
+                "Max redirects reached!", url=location, status=response.status
+            )
 
     def _fetch(
         self,
@@ -403,6 +971,10 @@ class BaseProvider:
         content_parser=None,
         certificate_file=None,
         ssl_verify=True,
+        ssl_context=None,
+        stream=False,
+        phase="fetch",
+        hop=0,
     ):
         """
         Fetches a URL.
@@ -425,106 +997,359 @@ class BaseProvider:
         :param int max_redirects:
             Number of maximum HTTP redirects to follow.
 
-        :param function content_parser:
-            A callable to be used to parse the :attr:`.Response.data`
-            from :attr:`.Response.content`.
+        :param function content_parser:
+            A callable to be used to parse the :attr:`.Response.data`
+            from :attr:`.Response.content`.
+
+        :param str certificate_file:
+            Optional certificate file to be used for HTTPS connection.
+
+        :param bool ssl_verify:
+            Verify SSL on HTTPS connection.
+
+        :param ssl_context:
+            A prebuilt :class:`ssl.SSLContext` for HTTPS connection.
+            Overrides :data:`certificate_file` and :data:`ssl_verify`.
+
+        :param bool stream:
+            If ``True`` the body is not read in advance but by
+            :meth:`.Response.iter_content` or :attr:`.Response.content`.
+
+        :param str phase:
+            Phase of the procedure the fetch belongs to reported to the
+            :class:`.metrics.MetricsCollector` e.g. ``"token"``.
+
+        :param int hop:
+            Number of redirects followed so far.
+        """
+
+        url_parsed, request_path, params, headers, body = self._prepare_request(
+            url, method, params, headers, body
+        )
+
+        if url_parsed.scheme.lower() == "https" and not ssl_context:
+            ssl_context = authomatic.transport.ssl_context_cache.get(
+                certificate_file, ssl_verify
+            )
+
+        # Send the request over a pooled keep-alive connection.
+        started = time.perf_counter()
+        with self._fetch_span(url_parsed, method, phase, hop) as span:
+            try:
+                response = self._connection_pool.request(
+                    url_parsed.scheme,
+                    url_parsed.hostname,
+                    url_parsed.port,
+                    method,
+                    request_path,
+                    body,
+                    headers,
+                    ssl_context=ssl_context,
+                    stream=stream,
+                    span=None if self._tracer is None else self._span,
+                )
+            except Exception as e:
+                self._observe_fetch(phase, method, started, error=e)
+                raise FetchError(
+                    "Fetching URL failed", original_message=str(e), url=request_path
+                )
+            span.set_attribute("status", response.status)
+
+        self._observe_fetch(phase, method, started, response)
+        self._log_fetch(
+            method,
+            url,
+            params,
+            headers,
+            body,
+            certificate_file,
+            ssl_verify,
+            response,
+            started,
+        )
+
+        try:
+            location = self._redirect_location(url, response, max_redirects)
+        except FetchError:
+            response.close()
+            raise
+
+        if location:
+            # Don't hold the connection of the redirect response.
+            response.close()
+            # Call this method again.
+            return self._fetch(
+                url=location,
+                params=params,
+                method=method,
+                headers=headers,
+                max_redirects=max_redirects - 1,
+                content_parser=content_parser,
+                certificate_file=certificate_file,
+                ssl_verify=ssl_verify,
+                ssl_context=ssl_context,
+                stream=stream,
+                phase=phase,
+                hop=hop + 1,
+            )
+
+        return authomatic.core.Response(response, content_parser)
+
+    async def _afetch(
+        self,
+        url,
+        method="GET",
+        params=None,
+        headers=None,
+        body="",
+        max_redirects=5,
+        content_parser=None,
+        certificate_file=None,
+        ssl_verify=True,
+        ssl_context=None,
+        stream=False,
+        phase="fetch",
+        hop=0,
+    ):
+        """
+        Same as :meth:`._fetch` but a coroutine which sends the request
+        through the non-blocking :class:`.transport.AsyncTransport`.
+
+        The :class:`.transport.AsyncTransport` always reads the whole body so
+        :data:`stream` has no effect.
+        """
+
+        url_parsed, request_path, params, headers, body = self._prepare_request(
+            url, method, params, headers, body
+        )
+
+        if url_parsed.scheme.lower() == "https" and not ssl_context:
+            ssl_context = authomatic.transport.ssl_context_cache.get(
+                certificate_file, ssl_verify
+            )
+
+        started = time.perf_counter()
+        with self._fetch_span(url_parsed, method, phase, hop) as span:
+            try:
+                response = await self._async_transport.request(
+                    url_parsed.scheme,
+                    url_parsed.hostname,
+                    url_parsed.port,
+                    method,
+                    request_path,
+                    body,
+                    headers,
+                    ssl_context=ssl_context,
+                )
+            except Exception as e:
+                self._observe_fetch(phase, method, started, error=e)
+                raise FetchError(
+                    "Fetching URL failed", original_message=str(e), url=request_path
+                )
+            span.set_attribute("status", response.status)
+
+        self._observe_fetch(phase, method, started, response)
+        self._log_fetch(
+            method,
+            url,
+            params,
+            headers,
+            body,
+            certificate_file,
+            ssl_verify,
+            response,
+            started,
+        )
+
+        location = self._redirect_location(url, response, max_redirects)
+        if location:
+            return await self._afetch(
+                url=location,
+                params=params,
+                method=method,
+                headers=headers,
+                max_redirects=max_redirects - 1,
+                content_parser=content_parser,
+                certificate_file=certificate_file,
+                ssl_verify=ssl_verify,
+                ssl_context=ssl_context,
+                phase=phase,
+                hop=hop + 1,
+            )
+
+        return authomatic.core.Response(response, content_parser)
+
+    # ========================================================================
+    # Fetch flows
+    # ========================================================================
+
+    # A fetch flow is a generator which yields the arguments of the fetches
+    # it needs and receives the responses back. The same flow is run either
+    # by the blocking _run() or by the asyncio based _arun().
+
+    @staticmethod
+    def _fetch_step(*args, **kwargs):
+        """
+        Describes a :meth:`._fetch` call to be yielded from a fetch flow.
+        """
+
+        return args, kwargs
+
+    @staticmethod
+    def _concurrent_step(*flows):
+        """
+        Describes fetch flows to be run concurrently, to be yielded from a
+        fetch flow which then receives the :class:`list` of their return
+        values.
+        """
+
+        return _ConcurrentFlows(flows)
+
+    def _run(self, flow):
+        """
+        Runs a fetch flow with the blocking :meth:`._fetch`.
+
+        :returns:
+            The return value of the flow.
+
+        """
+
+        try:
+            step = next(flow)
+            while True:
+                try:
+                    if isinstance(step, _ConcurrentFlows):
+                        response = self._run_concurrent(step)
+                    else:
+                        args, kwargs = step
+                        response = self._fetch(*args, **kwargs)
+                except Exception as e:  # pylint:disable=broad-except
+                    step = flow.throw(e)
+                else:
+                    step = flow.send(response)
+        except StopIteration as e:
+            return e.value
+
+    def _run_concurrent(self, flows):
+        """
+        Runs the first of the :data:`flows` with :meth:`._run` in the
+        current thread and the others on the :attr:`._executor`.
+
+        If this call is itself running on a worker of the :attr:`._executor`,
+        the :data:`flows` run one after another in the current thread
+        because the worker would otherwise wait for its own pool.
 
-        :param str certificate_file:
-            Optional certificate file to be used for HTTPS connection.
+        :returns:
+            :class:`list` of the return values of the :data:`flows`.
 
-        :param bool ssl_verify:
-            Verify SSL on HTTPS connection.
         """
-        # 'magic' using _kwarg method
-        # pylint:disable=no-member
-        params = params or {}
-        params.update(self.access_params)
 
-        headers = headers or {}
-        headers.update(self.access_headers)
+        executor = self._executor
+        if executor.in_worker():
+            return [self._run(flow) for flow in flows]
 
-        url_parsed = parse.urlsplit(url)
-        query = parse.urlencode(params)
+        pending = [
+            executor.submit_raw(contextvars.copy_context().run, self._run, flow)
+            for flow in flows[1:]
+        ]
+        try:
+            first = self._run(flows[0])
+        finally:
+            futures.wait(pending)
+        return [first] + [future.result() for future in pending]
 
-        if method in ("POST", "PUT", "PATCH"):
-            if not body:
-                # Put querystring to body
-                body = query
-                query = ""
-                headers.update({"Content-Type": "application/x-www-form-urlencoded"})
-        request_path = parse.urlunsplit(
-            ("", "", url_parsed.path or "", query or "", "")
-        )
+    async def _arun(self, flow):
+        """
+        Runs a fetch flow with the non-blocking :meth:`._afetch`.
 
-        self._log_param("host", url_parsed.hostname, last=False)
-        self._log_param("method", method, last=False)
-        self._log_param("body", body, last=False)
-        self._log_param("params", params, last=False)
-        self._log_param("headers", headers, last=False)
-        self._log_param("certificate", certificate_file, last=False)
-        self._log_param("SSL verify", ssl_verify, last=True)
-
-        # Connect
-        if url_parsed.scheme.lower() == "https":
-            if ssl_verify:
-                context = ssl.create_default_context(
-                    purpose=ssl.Purpose.SERVER_AUTH, cafile=certificate_file
-                )
-            else:
-                context = ssl._create_unverified_context()
+        :returns:
+            The return value of the flow.
 
-            connection = http_client.HTTPSConnection(
-                url_parsed.hostname, port=url_parsed.port, context=context
-            )
-        else:
-            connection = http_client.HTTPConnection(
-                url_parsed.hostname, port=url_parsed.port
-            )
+        """
 
         try:
-            connection.request(method, request_path, body, headers)
-        except Exception as e:
-            raise FetchError(
-                "Fetching URL failed", original_message=str(e), url=request_path
-            )
+            step = next(flow)
+            while True:
+                try:
+                    if isinstance(step, _ConcurrentFlows):
+                        response = list(
+                            await asyncio.gather(*[self._arun(f) for f in step])
+                        )
+                    else:
+                        args, kwargs = step
+                        response = await self._afetch(*args, **kwargs)
+                except Exception as e:  # pylint:disable=broad-except
+                    step = flow.throw(e)
+                else:
+                    step = flow.send(response)
+        except StopIteration as e:
+            return e.value
 
-        response = connection.getresponse()
-        location = response.getheader("Location")
+    @staticmethod
+    def _outcome(response):
+        if response is None:
+            return "skipped"
+        if 200 <= response.status < 300:
+            return "success"
+        return "failure"
 
-        if response.status in (300, 301, 302, 303, 307) and location:
-            if location == url:
-                raise FetchError(
-                    "Url redirects to itself!", url=location, status=response.status
-                )
+    def _run_measured(self, operation, flow):
+        """
+        Same as :meth:`._run` but reports the :data:`operation` to the
+        :class:`.metrics.MetricsCollector` and traces it.
+        """
 
-            if max_redirects > 0:
-                remaining_redirects = max_redirects - 1
-
-                self._log_param("Redirecting to", url)
-                self._log_param("Remaining redirects", remaining_redirects)
-
-                # Call this method again.
-                response = self._fetch(
-                    url=location,
-                    params=params,
-                    method=method,
-                    headers=headers,
-                    max_redirects=remaining_redirects,
-                    certificate_file=certificate_file,
-                    ssl_verify=ssl_verify,
-                )
+        started = time.perf_counter()
+        with self._span("authomatic." + operation) as span:
+            try:
+                response = self._run(flow)
+            except Exception as e:
+                self._observe_operation(operation, started, "error", error=e)
+                raise
+            outcome = self._outcome(response)
+            span.set_attribute("outcome", outcome)
+        self._observe_operation(operation, started, outcome, response)
+        return response
 
-            else:
-                raise FetchError(
-                    "Max redirects reached!", url=location, status=response.status
-                )
-        else:
-            self._log_param("Got response")
-            self._log_param("url", url, last=False)
-            self._log_param("status", response.status, last=False)
-            self._log_param("headers", response.getheaders(), last=True)
+    async def _arun_measured(self, operation, flow):
+        """
+        Same as :meth:`._arun` but reports the :data:`operation` to the
+        :class:`.metrics.MetricsCollector` and traces it.
+        """
 
-        return authomatic.core.Response(response, content_parser)
+        started = time.perf_counter()
+        with self._span("authomatic." + operation) as span:
+            try:
+                response = await self._arun(flow)
+            except Exception as e:
+                self._observe_operation(operation, started, "error", error=e)
+                raise
+            outcome = self._outcome(response)
+            span.set_attribute("outcome", outcome)
+        self._observe_operation(operation, started, outcome, response)
+        return response
+
+    def _defer_user_info(self, secondary):
+        """
+        Removes the attributes of the :data:`secondary` fetches which the
+        user info didn't provide from the :attr:`.user` so that reading them
+        calls :meth:`._load_deferred_user_info`.
+        """
+
+        for s in secondary:
+            for name in s.attributes:
+                if self.user.__dict__.get(name) is None:
+                    self.user.__dict__.pop(name, None)
+                    self._deferred_user_info[name] = s
+
+    def _restore_deferred_user_info(self):
+        """
+        Sets the deferred attributes of the :attr:`.user` to ``None``.
+        """
+
+        for name in self._deferred_user_info:
+            self.user.__dict__.setdefault(name, None)
+        self._deferred_user_info.clear()
 
     def _update_or_create_user(self, data, credentials=None, content=None):
         """
@@ -535,50 +1360,55 @@ class BaseProvider:
 
         """
 
-        if not self.user:
-            self.user = authomatic.core.User(self, credentials=credentials)
+        with self._span("authomatic.user"):
+            if not self.user:
+                self.user = authomatic.core.User(self, credentials=credentials)
 
-        self.user.content = content
-        self.user.data = data
+            self._restore_deferred_user_info()
 
-        # Update.
-        for key in self.user.__dict__:
-            # Exclude data.
-            if key not in ("data", "content"):
-                # Extract every data item whose key matches the user
-                # property name, but only if it has a value.
-                value = data.get(key)
-                if value:
-                    setattr(self.user, key, value)
+            self.user.content = content
+            self.user.data = data
 
-        # Handle different structure of data by different providers.
-        self.user = self._x_user_parser(self.user, data)
+            # Update.
+            for key in self.user.__dict__:
+                # Exclude data.
+                if key not in ("data", "content"):
+                    # Extract every data item whose key matches the user
+                    # property name, but only if it has a value.
+                    value = data.get(key)
+                    if value:
+                        setattr(self.user, key, value)
 
-        if self.user.id:
-            self.user.id = str(self.user.id)
+            # Handle different structure of data by different providers.
+            self.user = self._x_user_parser(self.user, data)
 
-        # TODO: Move to User
-        # If there is no user.name,
-        if not self.user.name:
-            if self.user.first_name and self.user.last_name:
-                # Create it from first name and last name if available.
-                self.user.name = " ".join((self.user.first_name, self.user.last_name))
-            else:
-                # Or use one of these.
-                self.user.name = (
-                    self.user.username
-                    or self.user.nickname
-                    or self.user.first_name
-                    or self.user.last_name
-                )
+            if self.user.id:
+                self.user.id = str(self.user.id)
 
-        if not self.user.location:
-            if self.user.city and self.user.country:
-                self.user.location = f"{self.user.city}, {self.user.country}"
-            else:
-                self.user.location = self.user.city or self.user.country
+            # TODO: Move to User
+            # If there is no user.name,
+            if not self.user.name:
+                if self.user.first_name and self.user.last_name:
+                    # Create it from first name and last name if available.
+                    self.user.name = " ".join(
+                        (self.user.first_name, self.user.last_name)
+                    )
+                else:
+                    # Or use one of these.
+                    self.user.name = (
+                        self.user.username
+                        or self.user.nickname
+                        or self.user.first_name
+                        or self.user.last_name
+                    )
 
-        return self.user
+            if not self.user.location:
+                if self.user.city and self.user.country:
+                    self.user.location = f"{self.user.city}, {self.user.country}"
+                else:
+                    self.user.location = self.user.city or self.user.country
+
+            return self.user
 
     @staticmethod
     def _x_user_parser(user, data):
@@ -670,6 +1500,12 @@ class AuthorizationProvider(BaseProvider):
             Applied by :meth:`.access()`, :meth:`.update_user()` and
             :meth:`.User.update()`
 
+        :arg list user_info_attributes:
+            Names of the :class:`.User` attributes needed by the app. The
+            :class:`.SecondaryUserInfo` fetches providing none of them are
+            deferred until their attribute is read or until
+            :meth:`.User.aload` is awaited. Default is none.
+
         """
 
         super().__init__(*args, **kwargs)
@@ -827,24 +1663,32 @@ class AuthorizationProvider(BaseProvider):
     # Exposed methods
     # ========================================================================
 
-    @property
-    def type_id(self):
+    # _classproperty passes the class.
+    @_classproperty
+    def type_id(cls):  # pylint:disable=no-self-argument
         """
         A short string representing the provider implementation id used for
         serialization of :class:`.Credentials` and to identify the type of
-        provider in JavaScript.
+        provider in JavaScript. Accessible also on the class.
 
         The part before hyphen denotes the type of the provider, the part
         after hyphen denotes the class id e.g.
         ``oauth2.Facebook.type_id = '2-5'``,
         ``oauth1.Twitter.type_id = '1-5'``.
 
+        See :func:`.type_id_to_class` for the reverse lookup.
+
         """
 
-        cls = self.__class__
         mod = sys.modules.get(cls.__module__)
 
-        return str(self.PROVIDER_TYPE_ID) + "-" + str(mod.PROVIDER_ID_MAP.index(cls))
+        return str(cls.PROVIDER_TYPE_ID) + "-" + str(mod.PROVIDER_ID_MAP.index(cls))
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Remember where the PROVIDER_ID_MAP of a provider type is.
+        if "PROVIDER_TYPE_ID" in cls.__dict__:
+            _type_id_modules.setdefault(cls.PROVIDER_TYPE_ID, cls.__module__)
 
     def access(
         self,
@@ -857,6 +1701,8 @@ class AuthorizationProvider(BaseProvider):
         content_parser=None,
         certificate_file=None,
         ssl_verify=True,
+        ssl_context=None,
+        stream=False,
     ):
         """
         Fetches the **protected resource** of an authenticated **user**.
@@ -889,54 +1735,88 @@ class AuthorizationProvider(BaseProvider):
         :param bool ssl_verify:
             Verify SSL on HTTPS connection.
 
+        :param ssl_context:
+            A prebuilt :class:`ssl.SSLContext` for HTTPS connection.
+
+        :param bool stream:
+            If ``True`` the body is read on demand e.g. by
+            :meth:`.Response.iter_content`. The connection is held until
+            the body has been read or the response closed, see
+            :meth:`.Response.close`.
+
         :returns:
             :class:`.Response`
 
         """
 
-        if not self.user and not self.credentials:
-            raise CredentialsError("There is no authenticated user!")
+        return self._run_measured(
+            "access",
+            self._access_flow(
+                url,
+                params=params,
+                method=method,
+                headers=headers,
+                body=body,
+                max_redirects=max_redirects,
+                content_parser=content_parser,
+                certificate_file=certificate_file,
+                ssl_verify=ssl_verify,
+                ssl_context=ssl_context,
+                stream=stream,
+            ),
+        )
 
-        headers = headers or {}
+    async def aaccess(
+        self,
+        url,
+        params=None,
+        method="GET",
+        headers=None,
+        body="",
+        max_redirects=5,
+        content_parser=None,
+        certificate_file=None,
+        ssl_verify=True,
+        ssl_context=None,
+    ):
+        """
+        Same as :meth:`.access` but a coroutine which doesn't block the
+        event loop.
 
-        self._log_param("Accessing protected resource", url, level=logging.INFO)
+        :returns:
+            :class:`.Response`
 
-        request_elements = self.create_request_elements(
-            request_type=self.PROTECTED_RESOURCE_REQUEST_TYPE,
-            credentials=self.credentials,
-            url=url,
-            body=body,
+        """
+
+        kwargs = dict(
             params=params,
-            headers=headers,
             method=method,
-        )
-
-        response = self._fetch(
-            *request_elements,
+            headers=headers,
+            body=body,
             max_redirects=max_redirects,
             content_parser=content_parser,
             certificate_file=certificate_file,
             ssl_verify=ssl_verify,
+            ssl_context=ssl_context,
         )
 
-        status = response.status
-        self._log_param("Got response. HTTP status", status, level=logging.INFO)
-        return response
+        if self._overrides("access"):
+            return await asyncio.get_running_loop().run_in_executor(
+                None, functools.partial(self.access, url, **kwargs)
+            )
+
+        return await self._arun_measured("access", self._access_flow(url, **kwargs))
 
     def async_access(self, *args, **kwargs):
         """
         Same as :meth:`.access` but runs asynchronously in a separate thread.
 
-        .. warning::
-
-            |async|
-
         :returns:
             :class:`.Future` instance representing the separate thread.
 
         """
 
-        return authomatic.core.Future(self.access, *args, **kwargs)
+        return self._executor.submit(self.access, *args, **kwargs)
 
     def update_user(self):
         """
@@ -949,19 +1829,46 @@ class AuthorizationProvider(BaseProvider):
             :class:`.UserInfoResponse`
 
         """
-        if self.user_info_url:
-            response = self._access_user_info()
-            self.user = self._update_or_create_user(
-                response.data, content=response.content
-            )
-            return authomatic.core.UserInfoResponse(
-                self.user, response.httplib_response
+
+        return self._run(self._update_user_flow())
+
+    async def aupdate_user(self):
+        """
+        Same as :meth:`.update_user` but a coroutine.
+
+        :returns:
+            :class:`.UserInfoResponse`
+
+        """
+
+        if self._overrides("update_user", "_access_user_info", "access"):
+            return await asyncio.get_running_loop().run_in_executor(
+                None, self.update_user
             )
 
+        return await self._arun(self._update_user_flow())
+
     # ========================================================================
     # Internal methods
     # ========================================================================
 
+    def _overrides(self, *names):
+        """
+        Tells whether the class of the provider overrides any of the
+        :data:`names` methods of :class:`.AuthorizationProvider`.
+
+        The fetch flows call such overrides instead of the flows they
+        replace. Coroutines run them in the default executor of the event
+        loop.
+
+        """
+
+        cls = type(self)
+        return any(
+            getattr(cls, name) is not getattr(AuthorizationProvider, name)
+            for name in names
+        )
+
     @classmethod
     def _authorization_header(cls, credentials):
         """
@@ -1061,10 +1968,238 @@ class AuthorizationProvider(BaseProvider):
             :class:`.UserInfoResponse`
 
         """
+
+        return self._run(self._access_user_info_flow())
+
+    def _access_flow(
+        self,
+        url,
+        params=None,
+        method="GET",
+        headers=None,
+        body="",
+        max_redirects=5,
+        content_parser=None,
+        certificate_file=None,
+        ssl_verify=True,
+        ssl_context=None,
+        stream=False,
+        phase="access",
+    ):
+        """
+        Fetch flow of :meth:`.access` and :meth:`.aaccess`.
+
+        Override this instead of :meth:`.access` to handle special
+        requirements of a **provider**.
+
+        """
+
+        if not self.user and not self.credentials:
+            raise CredentialsError("There is no authenticated user!")
+
+        headers = headers or {}
+
+        self._log_param("Accessing protected resource", url, level=logging.INFO)
+
+        request_elements = self.create_request_elements(
+            request_type=self.PROTECTED_RESOURCE_REQUEST_TYPE,
+            credentials=self.credentials,
+            url=url,
+            body=body,
+            params=params,
+            headers=headers,
+            method=method,
+        )
+
+        response = yield self._fetch_step(
+            *request_elements,
+            max_redirects=max_redirects,
+            content_parser=content_parser,
+            certificate_file=certificate_file,
+            ssl_verify=ssl_verify,
+            ssl_context=ssl_context,
+            stream=stream,
+            phase=phase,
+        )
+
+        status = response.status
+        self._log_param("Got response. HTTP status", status, level=logging.INFO)
+        return response
+
+    def _split_secondary_user_info(self):
+        """
+        Splits the :attr:`.secondary_user_info` to those providing some of
+        the ``user_info_attributes`` of the :doc:`config` and the others.
+
+        :returns:
+            :class:`tuple` of the wanted and the deferred fetches.
+
+        """
+
+        wanted = set(self._kwarg({}, "user_info_attributes", ()))
+        eager, deferred = [], []
+        for secondary in self.secondary_user_info:
+            if secondary.required or wanted.intersection(secondary.attributes):
+                eager.append(secondary)
+            else:
+                deferred.append(secondary)
+        return eager, deferred
+
+    def _user_info_kwargs(self):
+        return dict(
+            certificate_file=self._kwarg({}, "certificate_file", None),
+            ssl_verify=self._kwarg({}, "ssl_verify", True),
+            ssl_context=self._kwarg({}, "ssl_context", None),
+            phase="user_info",
+        )
+
+    def _access_user_info_flow(self, secondary=None):
+        """
+        Fetch flow of :meth:`._access_user_info`.
+
+        :param secondary:
+            The :class:`.SecondaryUserInfo` fetches to merge into the
+            response data. By default those providing some of the
+            ``user_info_attributes``.
+
+        """
+
+        if secondary is None:
+            secondary = self._split_secondary_user_info()[0]
+
+        url = self.user_info_url.format(**self.user.__dict__)
+        kwargs = self._user_info_kwargs()
+
+        # An overridden access() can't take part in the concurrent step.
+        concurrent = []
+        if not self._overrides("access"):
+            concurrent = [s for s in secondary if s.concurrent]
+
+        if concurrent:
+            responses = yield self._concurrent_step(
+                self._access_flow(url, **kwargs),
+                *[
+                    self._access_flow(s.url_for(url, None), **kwargs)
+                    for s in concurrent
+                ],
+            )
+            response = responses[0]
+            fetched = list(zip(concurrent, responses[1:]))
+        else:
+            response = yield from self._user_info_access_flow(url, **kwargs)
+            fetched = []
+
+        if not 200 <= response.status < 300:
+            return response
+
+        for s in secondary:
+            if s not in concurrent:
+                secondary_response = yield from self._secondary_user_info_flow(
+                    s, url, response.data
+                )
+                fetched.append((s, secondary_response))
+
+        for s, secondary_response in fetched:
+            if secondary_response and 200 <= secondary_response.status < 300:
+                response.data = s.merge(response.data, secondary_response.data)
+            elif secondary_response and s.required:
+                return secondary_response
+
+        return response
+
+    def _secondary_user_info_flow(self, secondary, user_info_url, data):
+        """
+        Fetch flow of a :class:`.SecondaryUserInfo`.
+
+        :returns:
+            :class:`.Response` or ``None`` if there is nothing to fetch.
+
+        """
+
+        url = secondary.url_for(user_info_url, data)
+        if url:
+            return (
+                yield from self._user_info_access_flow(url, **self._user_info_kwargs())
+            )
+
+    def _user_info_access_flow(self, url, phase, **kwargs):
+        """
+        Fetch flow of a user info URL. Calls :meth:`.access` if the
+        provider overrides it.
+        """
+
+        if self._overrides("access"):
+            return self.access(url, **kwargs)
+        return (yield from self._access_flow(url, phase=phase, **kwargs))
+
+    def _update_user_flow(self):
+        """
+        Fetch flow of :meth:`.update_user` and :meth:`.aupdate_user`.
+        """
+
+        if self.user_info_url:
+            eager, deferred = self._split_secondary_user_info()
+            if self._overrides("_access_user_info"):
+                response = self._access_user_info()
+            else:
+                response = yield from self._access_user_info_flow(eager)
+            self.user = self._update_or_create_user(
+                response.data, content=response.content
+            )
+            self._defer_user_info(deferred)
+            return authomatic.core.UserInfoResponse(
+                self.user, response.httplib_response
+            )
+
+    def _load_deferred_user_info(self, name):
+        """
+        Makes the deferred :class:`.SecondaryUserInfo` fetch which provides
+        the :data:`name` attribute of the :attr:`.user` and merges it into
+        the user info.
+
+        .. warning::
+            Blocks, in coroutines await :meth:`.User.aload` before reading
+            the attribute.
+
+        """
+
+        self._run(self._deferred_user_info_flow([name]))
+
+    def _deferred_user_info_flow(self, names):
+        """
+        Fetch flow of :meth:`._load_deferred_user_info` and
+        :meth:`.User.aload`.
+
+        :param names:
+            Names of the deferred attributes to load.
+
+        """
+
+        secondary = []
+        for name in names:
+            s = self._deferred_user_info.get(name)
+            if s and s not in secondary:
+                secondary.append(s)
+        if not secondary:
+            return
+
+        others = set(self._deferred_user_info.values()).difference(secondary)
         url = self.user_info_url.format(**self.user.__dict__)
-        cert = self._kwarg({}, "certificate_file", None)
-        verify = self._kwarg({}, "ssl_verify", True)
-        return self.access(url, certificate_file=cert, ssl_verify=verify)
+        data = self.user.data
+
+        self._restore_deferred_user_info()
+
+        merged = False
+        for s in secondary:
+            response = yield from self._secondary_user_info_flow(s, url, data)
+            if response and 200 <= response.status < 300:
+                data = s.merge(data, response.data)
+                merged = True
+
+        if merged:
+            self._update_or_create_user(data, content=self.user.content)
+
+        self._defer_user_info(others)
 
 
 class AuthenticationProvider(BaseProvider):
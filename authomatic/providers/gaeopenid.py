@@ -67,7 +67,7 @@ class GAEOpenID(providers.AuthenticationProvider):
                 dest_url=self.url, federated_identity=self.identifier
             )
 
-            self._log(logging.INFO, f"Redirecting user to {url}.")
+            self._log(logging.INFO, "Redirecting user to %s.", url)
 
             self.redirect(url)
         else:
@@ -7,6 +7,9 @@ Providers which implement the |oauth1|_ protocol.
 .. autosummary::
 
     OAuth1
+    HMACSHA1SignatureGenerator
+    HMACSHA256SignatureGenerator
+    PLAINTEXTSignatureGenerator
     Bitbucket
     Flickr
     Meetup
@@ -24,11 +27,13 @@ Providers which implement the |oauth1|_ protocol.
 import abc
 import binascii
 import datetime
+import functools
 import hashlib
 import hmac
 import logging
+import re
+import secrets
 import time
-import uuid
 
 import authomatic.core as core
 from authomatic import providers
@@ -37,12 +42,14 @@ from authomatic.exceptions import (
     FailureError,
     OAuth1Error,
 )
-from authomatic import six
 from authomatic.six.moves import urllib_parse as parse
 
 
 __all__ = [
     "OAuth1",
+    "HMACSHA1SignatureGenerator",
+    "HMACSHA256SignatureGenerator",
+    "PLAINTEXTSignatureGenerator",
     "Bitbucket",
     "Flickr",
     "Meetup",
@@ -57,47 +64,84 @@ __all__ = [
 ]
 
 
+#: Parameters which are not signed.
+_UNSIGNED_PARAMS = frozenset(("oauth_signature", "realm"))
+
+_UNRESERVED = re.compile(r"[A-Za-z0-9._~-]*\Z")
+
+
+def _percent_encode(value):
+    """
+    Percent encodes everything but the unreserved characters of RFC 3986 as
+    specified here: http://oauth.net/core/1.0a/#encoding_parameters.
+    """
+
+    if isinstance(value, bytes):
+        return parse.quote(value, safe="~")
+    value = str(value)
+    # Keys, tokens, timestamps and nonces mostly need no encoding.
+    if _UNRESERVED.match(value):
+        return value
+    return parse.quote(value, safe="~")
+
+
 def _normalize_params(params):
     """
     Returns a normalized query string sorted first by key, then by value
     excluding the ``realm`` and ``oauth_signature`` parameters as specified
     here: http://oauth.net/core/1.0a/#rfc.section.9.1.1.
 
+    Each key and value is percent encoded exactly once, so there is no need
+    to fix ``+`` and ``%7E`` of :func:`urllib.parse.urlencode` afterwards.
+
     :param params:
         :class:`dict` or :class:`list` of tuples.
 
     """
 
     if isinstance(params, dict):
-        params = list(params.items())
+        params = params.items()
 
-    # remove "realm" and "oauth_signature"
-    params = sorted(
-        [(k, v) for k, v in params if k not in ("oauth_signature", "realm")]
+    return "&".join(
+        [
+            _percent_encode(k) + "=" + _percent_encode(v)
+            for k, v in sorted(p for p in params if p[0] not in _UNSIGNED_PARAMS)
+        ]
     )
-    # sort
-    # convert to query string
-    qs = parse.urlencode(params)
-    # replace "+" to "%20"
-    qs = qs.replace("+", "%20")
-    # replace "%7E" to "%20"
-    qs = qs.replace("%7E", "~")
-
-    return qs
 
 
 def _join_by_ampersand(*args):
     return "&".join([core.escape(i) for i in args])
 
 
+@functools.lru_cache(maxsize=1024)
+def _base_string_prefix(method, base):
+    return _join_by_ampersand(method, base) + "&"
+
+
 def _create_base_string(method, base, params):
     """
     Returns base string for HMAC-SHA1 signature as specified in:
     http://oauth.net/core/1.0a/#rfc.section.9.1.3.
     """
 
-    normalized_qs = _normalize_params(params)
-    return _join_by_ampersand(method, base, normalized_qs)
+    # The normalized query string consists only of unreserved characters and
+    # "%", "&" and "=" so escaping it is cheaper with str.replace().
+    normalized_qs = (
+        _normalize_params(params)
+        .replace("%", "%25")
+        .replace("&", "%26")
+        .replace("=", "%3D")
+    )
+    return _base_string_prefix(method, base) + normalized_qs
+
+
+def _create_nonce():
+    """
+    Returns a random ``oauth_nonce``.
+    """
+
+    return secrets.token_hex(16)
 
 
 class BaseSignatureGenerator:
@@ -146,12 +190,17 @@ class HMACSHA1SignatureGenerator(BaseSignatureGenerator):
     """
     HMAC-SHA1 signature generator.
 
+    The keys derived from the consumer and token secrets are cached, so
+    signing repeatedly with the same credentials is cheaper.
+
     See: http://oauth.net/core/1.0a/#anchor15
 
     """
 
     method = "HMAC-SHA1"
 
+    _digestmod = hashlib.sha1
+
     @classmethod
     def _create_key(cls, consumer_secret, token_secret=""):
         """
@@ -172,6 +221,18 @@ class HMACSHA1SignatureGenerator(BaseSignatureGenerator):
 
         return _join_by_ampersand(consumer_secret, token_secret or "")
 
+    @classmethod
+    @functools.lru_cache(maxsize=1024)
+    def _hmac(cls, consumer_secret, token_secret):
+        """
+        Returns a :class:`hmac.HMAC` with the key of the credentials already
+        processed. Signing with its copy saves escaping the secrets and
+        hashing the padded key for every request.
+        """
+
+        key = cls._create_key(consumer_secret, token_secret)
+        return hmac.new(key.encode("latin-1"), digestmod=cls._digestmod)
+
     @classmethod
     def create_signature(cls, method, base, params, consumer_secret, token_secret=""):
         """
@@ -200,15 +261,28 @@ class HMACSHA1SignatureGenerator(BaseSignatureGenerator):
         """
 
         base_string = _create_base_string(method, base, params)
-        key = cls._create_key(consumer_secret, token_secret)
-
-        hashed = hmac.new(six.b(key), base_string.encode("utf-8"), hashlib.sha1)
+        hashed = cls._hmac(consumer_secret, token_secret or "").copy()
+        hashed.update(base_string.encode("utf-8"))
 
         base64_encoded = binascii.b2a_base64(hashed.digest())[:-1]
 
         return base64_encoded
 
 
+class HMACSHA256SignatureGenerator(HMACSHA1SignatureGenerator):
+    """
+    HMAC-SHA256 signature generator for providers which support it.
+
+    Set it as the ``_signature_generator`` of an :class:`.OAuth1` subclass
+    to use it instead of :class:`.HMACSHA1SignatureGenerator`.
+
+    """
+
+    method = "HMAC-SHA256"
+
+    _digestmod = hashlib.sha256
+
+
 class PLAINTEXTSignatureGenerator(BaseSignatureGenerator):
     """
     PLAINTEXT signature generator.
@@ -271,6 +345,10 @@ class OAuth1(providers.AuthorizationProvider):
 
         self.request_token_params = self._kwarg(kwargs, "request_token_params", {})
 
+    @property
+    def _stateless_login(self):
+        return self._login_state_store is not None
+
     # ========================================================================
     # Abstract properties
     # ========================================================================
@@ -373,7 +451,7 @@ class OAuth1(providers.AuthorizationProvider):
             # http://oauth.net/core/1.0a/#rfc.section.9.1
             params["oauth_signature_method"] = cls._signature_generator.method
             params["oauth_timestamp"] = str(int(time.time()))
-            params["oauth_nonce"] = cls.csrf_generator(str(uuid.uuid4()))
+            params["oauth_nonce"] = _create_nonce()
             params["oauth_version"] = "1.0"
 
             # add signature to params
@@ -411,6 +489,17 @@ class OAuth1(providers.AuthorizationProvider):
 
     @providers.login_decorator
     def login(self):
+        self._run(self._login_flow())
+
+    @providers.login_decorator
+    async def alogin(self):
+        await self._arun(self._login_flow())
+
+    def _login_flow(self):
+        """
+        Fetch flow of :meth:`.login` and :meth:`.alogin`.
+        """
+
         # get request parameters from which we can determine the login phase
         denied = self.params.get("denied")
         verifier = self.params.get("oauth_verifier", "")
@@ -422,45 +511,51 @@ class OAuth1(providers.AuthorizationProvider):
                 logging.INFO,
                 "Continuing OAuth 1.0a authorization procedure after " "redirect.",
             )
-            token_secret = self._session_get("token_secret")
+            token_secret = self._session_get("token_secret", token=request_token)
             if not token_secret:
                 raise FailureError("Unable to retrieve token secret from storage!")
 
             # Get Access Token
             self._log(
-                logging.INFO, f"Fetching for access token from {self.access_token_url}."
-            )
-
-            self.credentials.token = request_token
-            self.credentials.token_secret = token_secret
-
-            request_elements = self.create_request_elements(
-                request_type=self.ACCESS_TOKEN_REQUEST_TYPE,
-                url=self.access_token_url,
-                credentials=self.credentials,
-                verifier=verifier,
-                params=self.access_token_params,
+                logging.INFO,
+                "Fetching for access token from %s.",
+                self.access_token_url,
             )
 
-            response = self._fetch(*request_elements)
-            self.access_token_response = response
+            with self._span("oauth1.access_token") as span:
+                self.credentials.token = request_token
+                self.credentials.token_secret = token_secret
 
-            if not self._http_status_in_category(response.status, 2):
-                raise FailureError(
-                    f"Failed to obtain OAuth 1.0a  oauth_token from {self.access_token_url}! "
-                    f"HTTP status code: {response.status}.",
-                    original_message=response.content,
-                    status=response.status,
+                request_elements = self.create_request_elements(
+                    request_type=self.ACCESS_TOKEN_REQUEST_TYPE,
                     url=self.access_token_url,
+                    credentials=self.credentials,
+                    verifier=verifier,
+                    params=self.access_token_params,
                 )
 
-            self._log(logging.INFO, "Got access token.")
-            self.credentials.token = response.data.get("oauth_token", "")
-            self.credentials.token_secret = response.data.get("oauth_token_secret", "")
+                response = yield self._fetch_step(*request_elements, phase="token")
+                span.set_attribute("status", response.status)
+                self.access_token_response = response
+
+                if not self._http_status_in_category(response.status, 2):
+                    raise FailureError(
+                        f"Failed to obtain OAuth 1.0a  oauth_token from {self.access_token_url}! "
+                        f"HTTP status code: {response.status}.",
+                        original_message=response.content,
+                        status=response.status,
+                        url=self.access_token_url,
+                    )
 
-            self.credentials = self._x_credentials_parser(
-                self.credentials, response.data
-            )
+                self._log(logging.INFO, "Got access token.")
+                self.credentials.token = response.data.get("oauth_token", "")
+                self.credentials.token_secret = response.data.get(
+                    "oauth_token_secret", ""
+                )
+
+                self.credentials = self._x_credentials_parser(
+                    self.credentials, response.data
+                )
             self._update_or_create_user(response.data, self.credentials)
 
             # =================================================================
@@ -479,67 +574,86 @@ class OAuth1(providers.AuthorizationProvider):
             # Phase 1 before redirect
             self._log(logging.INFO, "Starting OAuth 1.0a authorization procedure.")
 
-            # Fetch for request token
-            request_elements = self.create_request_elements(
-                request_type=self.REQUEST_TOKEN_REQUEST_TYPE,
-                credentials=self.credentials,
-                url=self.request_token_url,
-                callback=self.url,
-                params=self.request_token_params,
-            )
-
-            self._log(logging.INFO, "Fetching for request token and token secret.")
-            response = self._fetch(*request_elements)
-
-            # check if response status is OK
-            if not self._http_status_in_category(response.status, 2):
-                raise FailureError(
-                    f"Failed to obtain request token from {self.request_token_url}! HTTP status "
-                    f"code: {response.status} content: {response.content}",
-                    original_message=response.content,
-                    status=response.status,
+            with self._span("oauth1.request_token") as span:
+                # Fetch for request token
+                request_elements = self.create_request_elements(
+                    request_type=self.REQUEST_TOKEN_REQUEST_TYPE,
+                    credentials=self.credentials,
                     url=self.request_token_url,
+                    callback=self.url,
+                    params=self.request_token_params,
                 )
 
-            # extract request token
-            request_token = response.data.get("oauth_token")
-            if not request_token:
-                raise FailureError(
-                    f"Response from {self.request_token_url} doesn't contain oauth_token "
-                    "parameter!",
-                    original_message=response.content,
-                    url=self.request_token_url,
+                self._log(logging.INFO, "Fetching for request token and token secret.")
+                response = yield self._fetch_step(
+                    *request_elements, phase="request_token"
                 )
+                span.set_attribute("status", response.status)
+
+                # check if response status is OK
+                if not self._http_status_in_category(response.status, 2):
+                    raise FailureError(
+                        f"Failed to obtain request token from {self.request_token_url}! HTTP status "
+                        f"code: {response.status} content: {response.content}",
+                        original_message=response.content,
+                        status=response.status,
+                        url=self.request_token_url,
+                    )
 
-            # we need request token for user authorization redirect
-            self.credentials.token = request_token
+                # extract request token
+                request_token = response.data.get("oauth_token")
+                if not request_token:
+                    raise FailureError(
+                        f"Response from {self.request_token_url} doesn't contain oauth_token "
+                        "parameter!",
+                        original_message=response.content,
+                        url=self.request_token_url,
+                    )
 
-            # extract token secret and save it to storage
-            token_secret = response.data.get("oauth_token_secret")
-            if token_secret:
-                # we need token secret after user authorization redirect to get
-                # access token
-                self._session_set("token_secret", token_secret)
-            else:
-                raise FailureError(
-                    f"Failed to obtain token secret from {self.request_token_url}!",
-                    original_message=response.content,
-                    url=self.request_token_url,
+                # we need request token for user authorization redirect
+                self.credentials.token = request_token
+
+                # extract token secret and save it to storage
+                token_secret = response.data.get("oauth_token_secret")
+                if token_secret:
+                    # we need token secret after user authorization redirect to get
+                    # access token
+                    self._session_set("token_secret", token_secret, token=request_token)
+                else:
+                    raise FailureError(
+                        f"Failed to obtain token secret from {self.request_token_url}!",
+                        original_message=response.content,
+                        url=self.request_token_url,
+                    )
+
+                self._log(logging.INFO, "Got request token and token secret")
+
+            with self._span("oauth1.authorize"):
+                # Create User Authorization URL
+                request_elements = self.create_request_elements(
+                    request_type=self.USER_AUTHORIZATION_REQUEST_TYPE,
+                    credentials=self.credentials,
+                    url=self.user_authorization_url,
+                    params=self.user_authorization_params,
                 )
 
-            self._log(logging.INFO, "Got request token and token secret")
+                url = request_elements.full_url
+            self._log(logging.INFO, "Redirecting user to %s.", url)
 
-            # Create User Authorization URL
-            request_elements = self.create_request_elements(
-                request_type=self.USER_AUTHORIZATION_REQUEST_TYPE,
-                credentials=self.credentials,
-                url=self.user_authorization_url,
-                params=self.user_authorization_params,
-            )
+            self.redirect(url)
 
-            self._log(logging.INFO, f"Redirecting user to {request_elements.full_url}.")
 
-            self.redirect(request_elements.full_url)
+def _merge_bitbucket_emails(data, emails):
+    """
+    Sets the primary of the Bitbucket user :data:`emails` as the ``email`` of
+    the user info :data:`data`.
+    """
+
+    data.setdefault("email", None)
+    for item in emails or ():
+        if item.get("primary", False):
+            data.update(email=item.get("email", None))
+    return data
 
 
 class Bitbucket(OAuth1):
@@ -600,6 +714,13 @@ class Bitbucket(OAuth1):
     user_info_url = "https://api.bitbucket.org/1.0/user"
     user_email_url = "https://api.bitbucket.org/1.0/emails"
 
+    # Email is available in separate method so second request is needed.
+    secondary_user_info = (
+        providers.SecondaryUserInfo(
+            ("email",), user_email_url, _merge_bitbucket_emails
+        ),
+    )
+
     @staticmethod
     def _x_user_parser(user, data):
         _user = data.get("user", {})
@@ -611,22 +732,6 @@ class Bitbucket(OAuth1):
         user.link = "https://bitbucket.org/api{0}".format(_user.get("resource_uri"))
         return user
 
-    def _access_user_info(self):
-        """
-        Email is available in separate method so second request is needed.
-        """
-        response = super()._access_user_info()
-
-        response.data.setdefault("email", None)
-
-        email_response = self.access(self.user_email_url)
-        if email_response.data:
-            for item in email_response.data:
-                if item.get("primary", False):
-                    response.data.update(email=item.get("email", None))
-
-        return response
-
 
 class Flickr(OAuth1):
     """
@@ -1023,6 +1128,17 @@ class UbuntuOne(OAuth1):
     user_info_url = "https://one.ubuntu.com/api/account/"
 
 
+def _vimeo_info_url(data):
+    uid = data.get("oauth", {}).get("user", {}).get("id")
+    if uid:
+        return f"http://vimeo.com/api/v2/{uid}/info.json"
+
+
+def _merge_vimeo_info(data, info):
+    # The info replaces the response of the token check.
+    return info
+
+
 class Vimeo(OAuth1):
     """
     Vimeo |oauth1| provider.
@@ -1073,16 +1189,16 @@ class Vimeo(OAuth1):
         "format=json&method=vimeo.oauth.checkAccessToken"
     )
 
-    def _access_user_info(self):
-        """
-        Vimeo requires the user ID to access the user info endpoint, so we need
-        to make two requests: one to get user ID and second to get user info.
-        """
-        response = super()._access_user_info()
-        uid = response.data.get("oauth", {}).get("user", {}).get("id")
-        if uid:
-            return self.access(f"http://vimeo.com/api/v2/{uid}/info.json")
-        return response
+    # Vimeo requires the user ID to access the user info endpoint, so we need
+    # to make two requests: one to get user ID and second to get user info.
+    secondary_user_info = (
+        providers.SecondaryUserInfo(
+            ("link", "name", "picture"),
+            _vimeo_info_url,
+            _merge_vimeo_info,
+            required=True,
+        ),
+    )
 
     @staticmethod
     def _x_user_parser(user, data):
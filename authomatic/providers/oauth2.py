@@ -31,6 +31,7 @@ Providers which implement the |oauth2|_ protocol.
     Tumblr
     Vimeo
     Yahoo
+    OpenIDConnect
 
 """
 
@@ -40,8 +41,15 @@ import json
 import logging
 
 from authomatic.six.moves.urllib.parse import unquote
-from authomatic import providers
-from authomatic.exceptions import CancellationError, FailureError, OAuth2Error
+from authomatic import codecs, oidc, providers
+from authomatic.exceptions import (
+    CancellationError,
+    ConfigError,
+    FailureError,
+    IDTokenError,
+    OAuth2Error,
+    SessionError,
+)
 import authomatic.core as core
 
 
@@ -71,9 +79,14 @@ __all__ = [
     "Tumblr",
     "Vimeo",
     "Yahoo",
+    "OpenIDConnect",
 ]
 
 
+# Signs the state of the signed_state mode.
+_STATE_CODEC = codecs.JSONSessionCodec(compress_threshold=None)
+
+
 class OAuth2(providers.AuthorizationProvider):
     """
     Base class for |oauth2|_ providers.
@@ -94,6 +107,15 @@ class OAuth2(providers.AuthorizationProvider):
     #: :class:`bool` If ``False``, the provider doesn't support user_state.
     supports_user_state = True
 
+    #: :class:`str` URL of the JSON Web Key Set which signs the OpenID Connect
+    #: ``id_token``. Providers which have it support the ``verify_id_token``
+    #: option, see :mod:`authomatic.oidc`.
+    jwks_uri = None
+
+    #: Accepted ``iss`` claims of the ``id_token``. ``{tid}`` is replaced with
+    #: the ``tid`` claim.
+    id_token_issuers = ()
+
     token_request_method = "POST"  # method for requesting an access token
 
     def __init__(self, *args, **kwargs):
@@ -116,6 +138,35 @@ class OAuth2(providers.AuthorizationProvider):
         :param bool ssl_verify:
             Certificate file to employ for HTTPS connection where needed.
 
+        :param ssl_context:
+            A prebuilt :class:`ssl.SSLContext` to use for HTTPS connections
+            instead of one created from ``certificate_file`` and
+            ``ssl_verify``.
+
+        :param bool signed_state:
+            If ``True`` the ``state`` parameter is signed with the
+            :class:`.Authomatic` secret and timestamped so that it can be
+            validated without a session. The *login procedure* then neither
+            writes nor reads the session, which suits stateless nodes
+            behind a load balancer. The state expires after the
+            ``session_max_age`` of :class:`.Authomatic`. Applies only to
+            providers which support CSRF protection and user state.
+            Default is ``False``.
+
+            .. warning::
+
+                Unlike the state stored in the session, the signed state
+                is not bound to the browser which started the
+                *login procedure*.
+
+        :param bool verify_id_token:
+            If ``True`` and the access token response contains an OpenID
+            Connect ``id_token``, its signature and claims are verified
+            with the keys from the :attr:`.jwks_uri` and the **user** is
+            created from its claims, so that :meth:`.User.update` is not
+            needed for the basic user info. Requires the ``openid`` scope.
+            Default is ``False``.
+
         As well as those inherited from :class:`.AuthorizationProvider`
         constructor.
 
@@ -127,6 +178,46 @@ class OAuth2(providers.AuthorizationProvider):
         self.offline = self._kwarg(kwargs, "offline", False)
         self.cert = self._kwarg(kwargs, "certificate_file", None)
         self.verify = self._kwarg(kwargs, "ssl_verify", True)
+        self.ssl_context = self._kwarg(kwargs, "ssl_context", None)
+        self.signed_state = self._kwarg(kwargs, "signed_state", False)
+        self.verify_id_token = self._kwarg(kwargs, "verify_id_token", False)
+        self._csrf = None
+
+    @property
+    def _stateless_login(self):
+        return bool(
+            self.supports_csrf_protection
+            and (
+                self.signed_state
+                and self.supports_user_state
+                or self._login_state_store is not None
+            )
+        )
+
+    @property
+    def _signed_state(self):
+        return bool(self.signed_state and self.supports_user_state)
+
+    def _login_csrf(self):
+        """
+        The CSRF token of the *login procedure* started by this request.
+        """
+
+        if self._csrf is None:
+            self._csrf = self.csrf_generator(self.settings.secret)
+        return self._csrf
+
+    def _login_correlation_token(self):
+        if not self.supports_csrf_protection:
+            return None
+        state = self.params.get("state")
+        if not state:
+            return self._login_csrf()
+        try:
+            return self.decode_state(state, "csrf")
+        except (FailureError, ValueError, KeyError, TypeError):
+            # Invalid states are reported by the login procedure.
+            return None
 
     # ========================================================================
     # Internal methods
@@ -160,9 +251,14 @@ class OAuth2(providers.AuthorizationProvider):
         scope="",
         csrf="",
         user_state="",
+        state_secret=None,
     ):
         """
         Creates |oauth2| request elements.
+
+        :param str state_secret:
+            Signs the state, see :meth:`.encode_state`.
+
         """
 
         headers = headers or {}
@@ -190,14 +286,7 @@ class OAuth2(providers.AuthorizationProvider):
                 params["client_id"] = consumer_key
                 params["redirect_uri"] = redirect_uri
                 params["scope"] = scope
-                if cls.supports_user_state:
-                    params["state"] = base64.urlsafe_b64encode(
-                        json.dumps({"csrf": csrf, "user_state": user_state}).encode(
-                            "utf-8"
-                        )
-                    )
-                else:
-                    params["state"] = csrf
+                params["state"] = cls.encode_state(csrf, user_state, state_secret)
                 params["response_type"] = "code"
 
                 # Add authorization header
@@ -311,7 +400,37 @@ class OAuth2(providers.AuthorizationProvider):
         return credentials
 
     @classmethod
-    def decode_state(cls, state, param="user_state"):
+    def encode_state(cls, csrf, user_state="", secret=None):
+        """
+        Encodes the state parameter.
+
+        :param str csrf:
+            CSRF token.
+
+        :param str user_state:
+            Application state to be passed through the provider.
+
+        :param str secret:
+            If given, the state is signed and timestamped so that
+            :meth:`.decode_state` can validate it with the secret alone.
+
+        :returns:
+            The state.
+
+        """
+
+        if not cls.supports_user_state:
+            return csrf
+
+        data = {"csrf": csrf, "user_state": user_state}
+        if secret:
+            # <payload>.<timestamp>.<signature>, the dots never occur in the
+            # unsigned state.
+            return _STATE_CODEC.encode(data, secret, "state")
+        return base64.urlsafe_b64encode(json.dumps(data).encode("utf-8"))
+
+    @classmethod
+    def decode_state(cls, state, param="user_state", secret=None, max_age=600):
         """
         Decode state and return param.
 
@@ -322,6 +441,16 @@ class OAuth2(providers.AuthorizationProvider):
             key to query from decoded state variable. Options include 'csrf'
             and 'user_state'.
 
+        :param str secret:
+            Secret to validate a signed state with. A signed state is
+            decoded without validation if not given.
+
+        :param int max_age:
+            Maximum age of a signed state in seconds.
+
+        :raises:
+            :class:`.FailureError` if the signed state is invalid or expired.
+
         :returns:
             string value from decoded state
 
@@ -330,15 +459,113 @@ class OAuth2(providers.AuthorizationProvider):
             # urlsafe_b64 may include = which the browser quotes so must
             # unquote Cast to str to void b64decode translation error. Base64
             # should be str compatible.
-            return json.loads(
-                base64.urlsafe_b64decode(unquote(str(state))).decode("utf-8")
-            )[param]
+            state = unquote(str(state))
+            if "." in state:
+                return cls._decode_signed_state(state, secret, max_age)[param]
+            return json.loads(base64.urlsafe_b64decode(state).decode("utf-8"))[param]
         return state if param == "csrf" else ""
 
+    @staticmethod
+    def _decode_signed_state(state, secret, max_age):
+        try:
+            if not secret:
+                return json.loads(codecs.b64url_decode(state.split(".")[0]))
+            data = _STATE_CODEC.decode(state, secret, "state", max_age)
+        except (SessionError, ValueError) as e:
+            raise FailureError(f"Invalid state: {e}")
+        if data is None:
+            raise FailureError("The state has expired!")
+        return data
+
+    @staticmethod
+    def _x_id_token_parser(claims):
+        """
+        Override this to convert the verified ``id_token`` claims to the
+        user info data which the :meth:`._x_user_parser` expects.
+
+        :param dict claims:
+            The ``id_token`` claims.
+
+        :returns:
+            :class:`dict`
+
+        """
+
+        return claims
+
+    def _id_token_flow(self, id_token):
+        """
+        Fetch flow which verifies the ``id_token`` with the keys from the
+        :attr:`.jwks_uri`, fetching them only if they are not cached.
+
+        :returns:
+            :class:`dict` of the verified claims.
+
+        """
+
+        cache = oidc.default_jwks_cache
+        kid = oidc.decode_jwt(id_token)[0].get("kid")
+        if cache.needs_fetch(self.jwks_uri, kid):
+            self._log(logging.INFO, "Fetching JSON Web Key Set from %s.", self.jwks_uri)
+            response = yield self._fetch_step(
+                self.jwks_uri,
+                certificate_file=self.cert,
+                ssl_verify=self.verify,
+                ssl_context=self.ssl_context,
+                phase="jwks",
+            )
+            if response.status != 200:
+                raise IDTokenError(
+                    f"Failed to fetch JSON Web Key Set from {self.jwks_uri}! "
+                    f"HTTP status: {response.status}.",
+                    original_message=response.content,
+                    status=response.status,
+                    url=self.jwks_uri,
+                )
+            cache.set(
+                self.jwks_uri,
+                response.data,
+                oidc.max_age(response.getheader("Cache-Control")),
+            )
+
+        return oidc.verify_id_token(
+            id_token,
+            cache.get(self.jwks_uri) or {},
+            self.id_token_issuers,
+            self.consumer_key,
+        )
+
     def refresh_credentials(self, credentials):
         """
         Refreshes :class:`.Credentials` if it gives sense.
 
+        :param credentials:
+            :class:`.Credentials` to be refreshed.
+
+        :returns:
+            :class:`.Response` or ``None`` if the credentials have been
+            updated from the refresh of another process by the
+            :class:`.refresh.RefreshCoordinator`.
+
+        """
+
+        coordinator = self._refresh_coordinator
+        if coordinator is not None and self._x_refresh_credentials_if(credentials):
+            return coordinator.refresh(
+                credentials,
+                lambda: self._run_measured(
+                    "refresh", self._refresh_credentials_flow(credentials)
+                ),
+            )
+
+        return self._run_measured(
+            "refresh", self._refresh_credentials_flow(credentials)
+        )
+
+    async def arefresh_credentials(self, credentials):
+        """
+        Same as :meth:`.refresh_credentials` but a coroutine.
+
         :param credentials:
             :class:`.Credentials` to be refreshed.
 
@@ -347,6 +574,24 @@ class OAuth2(providers.AuthorizationProvider):
 
         """
 
+        coordinator = self._refresh_coordinator
+        if coordinator is not None and self._x_refresh_credentials_if(credentials):
+            return await coordinator.arefresh(
+                credentials,
+                lambda: self._arun_measured(
+                    "refresh", self._refresh_credentials_flow(credentials)
+                ),
+            )
+
+        return await self._arun_measured(
+            "refresh", self._refresh_credentials_flow(credentials)
+        )
+
+    def _refresh_credentials_flow(self, credentials):
+        """
+        Fetch flow of :meth:`.refresh_credentials`.
+        """
+
         if not self._x_refresh_credentials_if(credentials):
             return
 
@@ -363,8 +608,12 @@ class OAuth2(providers.AuthorizationProvider):
         )
 
         self._log(logging.INFO, "Refreshing credentials.")
-        response = self._fetch(
-            *request_elements, certificate_file=self.cert, ssl_verify=self.verify
+        response = yield self._fetch_step(
+            *request_elements,
+            certificate_file=self.cert,
+            ssl_verify=self.verify,
+            ssl_context=self.ssl_context,
+            phase="refresh",
         )
 
         # We no longer need consumer info.
@@ -391,6 +640,16 @@ class OAuth2(providers.AuthorizationProvider):
 
     @providers.login_decorator
     def login(self):
+        self._run(self._login_flow())
+
+    @providers.login_decorator
+    async def alogin(self):
+        await self._arun(self._login_flow())
+
+    def _login_flow(self):
+        """
+        Fetch flow of :meth:`.login` and :meth:`.alogin`.
+        """
 
         # get request parameters from which we can determine the login phase
         authorization_code = self.params.get("code")
@@ -414,23 +673,33 @@ class OAuth2(providers.AuthorizationProvider):
 
                 # validate CSRF token
                 if self.supports_csrf_protection:
-                    self._log(
-                        logging.INFO,
-                        "Validating request by comparing request state with "
-                        "stored state.",
-                    )
-                    stored_csrf = self._session_get("csrf")
-
-                    state_csrf = self.decode_state(state, "csrf")
-                    if not stored_csrf:
-                        raise FailureError("Unable to retrieve stored state!")
-                    if stored_csrf != state_csrf:
-                        raise FailureError(
-                            f'The returned state csrf cookie "{state_csrf}" doesn\'t '
-                            "match with the stored state!",
-                            url=self.user_authorization_url,
+                    with self._span("oauth2.validate_state"):
+                        self._log(
+                            logging.INFO,
+                            "Validating request by comparing request state with "
+                            "stored state.",
                         )
-                    self._log(logging.INFO, "Request is valid.")
+                        if self._signed_state:
+                            # Raises if invalid.
+                            stored_csrf = state_csrf = self.decode_state(
+                                state,
+                                "csrf",
+                                self.settings.secret,
+                                getattr(self.settings, "session_max_age", 600),
+                            )
+                        else:
+                            state_csrf = self.decode_state(state, "csrf")
+                            stored_csrf = self._session_get("csrf", token=state_csrf)
+
+                        if not stored_csrf:
+                            raise FailureError("Unable to retrieve stored state!")
+                        if stored_csrf != state_csrf:
+                            raise FailureError(
+                                f'The returned state csrf cookie "{state_csrf}" '
+                                "doesn't match with the stored state!",
+                                url=self.user_authorization_url,
+                            )
+                        self._log(logging.INFO, "Request is valid.")
                 else:
                     self._log(logging.WARN, "Skipping CSRF validation!")
 
@@ -447,60 +716,75 @@ class OAuth2(providers.AuthorizationProvider):
 
             # exchange authorization code for access token by the provider
             self._log(
-                logging.INFO, f"Fetching access token from {self.access_token_url}."
+                logging.INFO, "Fetching access token from %s.", self.access_token_url
             )
 
-            self.credentials.token = authorization_code
+            with self._span("oauth2.token") as span:
+                self.credentials.token = authorization_code
 
-            request_elements = self.create_request_elements(
-                request_type=self.ACCESS_TOKEN_REQUEST_TYPE,
-                credentials=self.credentials,
-                url=self.access_token_url,
-                method=self.token_request_method,
-                redirect_uri=self.url,
-                params=self.access_token_params,
-                headers=self.access_token_headers,
-            )
+                request_elements = self.create_request_elements(
+                    request_type=self.ACCESS_TOKEN_REQUEST_TYPE,
+                    credentials=self.credentials,
+                    url=self.access_token_url,
+                    method=self.token_request_method,
+                    redirect_uri=self.url,
+                    params=self.access_token_params,
+                    headers=self.access_token_headers,
+                )
 
-            response = self._fetch(
-                *request_elements, certificate_file=self.cert, ssl_verify=self.verify
-            )
-            self.access_token_response = response
+                response = yield self._fetch_step(
+                    *request_elements,
+                    certificate_file=self.cert,
+                    ssl_verify=self.verify,
+                    ssl_context=self.ssl_context,
+                    phase="token",
+                )
+                span.set_attribute("status", response.status)
+                self.access_token_response = response
+
+                access_token = response.data.get("access_token", "")
+                refresh_token = response.data.get("refresh_token", "")
+
+                if response.status != 200 or not access_token:
+                    raise FailureError(
+                        f"Failed to obtain OAuth 2.0 access token from {self.access_token_url}! "
+                        f"HTTP status: {response.status}, message: {response.content}.",
+                        original_message=response.content,
+                        status=response.status,
+                        url=self.access_token_url,
+                    )
 
-            access_token = response.data.get("access_token", "")
-            refresh_token = response.data.get("refresh_token", "")
+                self._log(logging.INFO, "Got access token.")
 
-            if response.status != 200 or not access_token:
-                raise FailureError(
-                    f"Failed to obtain OAuth 2.0 access token from {self.access_token_url}! "
-                    f"HTTP status: {response.status}, message: {response.content}.",
-                    original_message=response.content,
-                    status=response.status,
-                    url=self.access_token_url,
-                )
+                if refresh_token:
+                    self._log(logging.INFO, "Got refresh access token.")
 
-            self._log(logging.INFO, "Got access token.")
+                # OAuth 2.0 credentials need access_token, refresh_token,
+                # token_type and expire_in.
+                self.credentials.token = access_token
+                self.credentials.refresh_token = refresh_token
+                self.credentials.expire_in = response.data.get("expires_in")
+                self.credentials.token_type = response.data.get("token_type", "")
+                # sWe don't need these two guys anymore.
+                self.credentials.consumer_key = ""
+                self.credentials.consumer_secret = ""
 
-            if refresh_token:
-                self._log(logging.INFO, "Got refresh access token.")
-
-            # OAuth 2.0 credentials need access_token, refresh_token,
-            # token_type and expire_in.
-            self.credentials.token = access_token
-            self.credentials.refresh_token = refresh_token
-            self.credentials.expire_in = response.data.get("expires_in")
-            self.credentials.token_type = response.data.get("token_type", "")
-            # sWe don't need these two guys anymore.
-            self.credentials.consumer_key = ""
-            self.credentials.consumer_secret = ""
-
-            # update credentials
-            self.credentials = self._x_credentials_parser(
-                self.credentials, response.data
-            )
+                # update credentials
+                self.credentials = self._x_credentials_parser(
+                    self.credentials, response.data
+                )
+
+            data = response.data
+            id_token = data.get("id_token")
+            if self.verify_id_token and self.jwks_uri and id_token:
+                # The user info is in the id_token.
+                with self._span("oauth2.id_token"):
+                    claims = yield from self._id_token_flow(id_token)
+                data = dict(data)
+                data.update(self._x_id_token_parser(claims))
 
             # create user
-            self._update_or_create_user(response.data, self.credentials)
+            self._update_or_create_user(data, self.credentials)
 
             # =================================================================
             # We're done!
@@ -529,29 +813,33 @@ class OAuth2(providers.AuthorizationProvider):
 
             self._log(logging.INFO, "Starting OAuth 2.0 authorization procedure.")
 
-            csrf = ""
-            if self.supports_csrf_protection:
-                # generate csfr
-                csrf = self.csrf_generator(self.settings.secret)
-                # and store it to session
-                self._session_set("csrf", csrf)
-            else:
-                self._log(logging.WARN, "Provider doesn't support CSRF validation!")
-
-            request_elements = self.create_request_elements(
-                request_type=self.USER_AUTHORIZATION_REQUEST_TYPE,
-                credentials=self.credentials,
-                url=self.user_authorization_url,
-                redirect_uri=self.url,
-                scope=self._x_scope_parser(self.scope),
-                csrf=csrf,
-                user_state=user_state,
-                params=self.user_authorization_params,
-            )
+            with self._span("oauth2.authorize"):
+                csrf = ""
+                if self.supports_csrf_protection:
+                    # generate csfr
+                    csrf = self._login_csrf()
+                    # and store it to session unless it is signed
+                    if not self._signed_state:
+                        self._session_set("csrf", csrf, token=csrf)
+                else:
+                    self._log(logging.WARN, "Provider doesn't support CSRF validation!")
+
+                request_elements = self.create_request_elements(
+                    request_type=self.USER_AUTHORIZATION_REQUEST_TYPE,
+                    credentials=self.credentials,
+                    url=self.user_authorization_url,
+                    redirect_uri=self.url,
+                    scope=self._x_scope_parser(self.scope),
+                    csrf=csrf,
+                    user_state=user_state,
+                    params=self.user_authorization_params,
+                    state_secret=self.settings.secret if self._signed_state else None,
+                )
 
-            self._log(logging.INFO, f"Redirecting user to {request_elements.full_url}.")
+                url = request_elements.full_url
+            self._log(logging.INFO, "Redirecting user to %s.", url)
 
-            self.redirect(request_elements.full_url)
+            self.redirect(url)
 
 
 class Amazon(OAuth2):
@@ -1012,7 +1300,7 @@ class Facebook(OAuth2):
         # Always refresh.
         return True
 
-    def access(self, url, params=None, **kwargs):
+    def _access_flow(self, url, params=None, **kwargs):
         if params is None:
             params = {}
         params["fields"] = (
@@ -1020,7 +1308,7 @@ class Facebook(OAuth2):
             + "timezone,location,birthday,locale"
         )
 
-        return super().access(url, params, **kwargs)
+        return (yield from super()._access_flow(url, params, **kwargs))
 
 
 class Foursquare(OAuth2):
@@ -1141,6 +1429,27 @@ class Foursquare(OAuth2):
         return user
 
 
+def _merge_github_emails(data, emails):
+    """
+    Sets the primary or the first of the GitHub user :data:`emails` as the
+    ``email`` of the user info :data:`data`.
+    """
+
+    data["emails"] = emails
+
+    primary_email = None
+    for item in emails:
+        is_primary = item["primary"]
+        if not primary_email or is_primary:
+            primary_email = item["email"]
+
+        if is_primary:
+            break
+
+    data["email"] = primary_email
+    return data
+
+
 class GitHub(OAuth2):
     """
     GitHub |oauth2| provider.
@@ -1214,6 +1523,14 @@ class GitHub(OAuth2):
         username=True,
     )
 
+    # Email may be private, the primary one is available at a separate URL:
+    # https://docs.github.com/en/rest/users/emails
+    secondary_user_info = (
+        providers.SecondaryUserInfo(
+            ("email",), "{user_info_url}/emails", _merge_github_emails
+        ),
+    )
+
     @staticmethod
     def _x_user_parser(user, data):
         user.username = data.get("login")
@@ -1227,37 +1544,14 @@ class GitHub(OAuth2):
             credentials.token_type = cls.BEARER
         return credentials
 
-    def access(self, url, **kwargs):
+    def _access_flow(self, url, **kwargs):
         # https://developer.github.com/v3/#user-agent-required
         # GitHub requires that all API requests MUST include a valid ``User-Agent`` header.
-        headers = kwargs["headers"] = kwargs.get("headers", {})
+        headers = kwargs["headers"] = kwargs.get("headers") or {}
         if not headers.get("User-Agent"):
             headers["User-Agent"] = self.settings.config[self.name]["consumer_key"]
 
-        def parent_access(url):
-            return super().access(url, **kwargs)
-
-        response = parent_access(url)
-
-        # additional action to get email is required:
-        # https://developer.github.com/v3/users/emails/
-        if response.status == 200:
-            email_response = parent_access(url + "/emails")
-            if email_response.status == 200:
-                response.data["emails"] = email_response.data
-
-                # find first or primary email
-                primary_email = None
-                for item in email_response.data:
-                    is_primary = item["primary"]
-                    if not primary_email or is_primary:
-                        primary_email = item["email"]
-
-                    if is_primary:
-                        break
-
-                response.data["email"] = primary_email
-        return response
+        return (yield from super()._access_flow(url, **kwargs))
 
 
 class Google(OAuth2):
@@ -1303,6 +1597,8 @@ class Google(OAuth2):
     user_authorization_url = "https://accounts.google.com/o/oauth2/auth"
     access_token_url = "https://accounts.google.com/o/oauth2/token"
     user_info_url = "https://www.googleapis.com/oauth2/v3/userinfo?alt=json"
+    jwks_uri = "https://www.googleapis.com/oauth2/v3/certs"
+    id_token_issuers = ("https://accounts.google.com", "accounts.google.com")
 
     user_info_scope = ["profile", "email"]
 
@@ -1507,6 +1803,8 @@ class MicrosoftOnline(OAuth2):
     )
     access_token_url = "https://login.microsoftonline.com/common/oauth2/v2.0/token"
     user_info_url = "https://graph.microsoft.com/v1.0/me"
+    jwks_uri = "https://login.microsoftonline.com/common/discovery/v2.0/keys"
+    id_token_issuers = ("https://login.microsoftonline.com/{tid}/v2.0",)
 
     user_info_scope = ["openid profile"]
 
@@ -1543,6 +1841,20 @@ class MicrosoftOnline(OAuth2):
             credentials.token_type = cls.BEARER
         return credentials
 
+    @staticmethod
+    def _x_id_token_parser(claims):
+        # Maps the claims to the names of the Microsoft Graph user.
+        data = dict(claims)
+        data.update(
+            id=claims.get("oid") or claims.get("sub"),
+            displayName=claims.get("name", ""),
+            givenName=claims.get("given_name", ""),
+            surname=claims.get("family_name", ""),
+            mail=claims.get("email", ""),
+            userPrincipalName=claims.get("preferred_username", ""),
+        )
+        return data
+
     @staticmethod
     def _x_user_parser(user, data):
         user.id = data.get("id")
@@ -2136,11 +2448,11 @@ class TwitterX(OAuth2):
         username=True
     )
 
-    def access(self, url, **kwargs):
+    def _access_flow(self, url, **kwargs):
 
         def parent_access(url):
-            return super(TwitterX, self).access(url, **kwargs)
-        response = parent_access(url)
+            return super(TwitterX, self)._access_flow(url, **kwargs)
+        response = yield from parent_access(url)
         user_data = response.data
 
         def make_user(user, data):
@@ -2571,6 +2883,211 @@ class Yahoo(OAuth2):
         return request_elements
 
 
+class OpenIDConnect(OAuth2):
+    """
+    Generic `OpenID Connect <https://openid.net/connect/>`_ provider.
+
+    Instead of hardcoding them, it reads the
+    :attr:`.user_authorization_url`, :attr:`.access_token_url`,
+    :attr:`.user_info_url` and :attr:`.jwks_uri` from the discovery
+    document of the ``issuer``. The document is fetched once and then
+    cached in :data:`authomatic.oidc.default_discovery_cache` for as long
+    as its ``Cache-Control`` header allows and revalidated with its
+    ``ETag``::
+
+        CONFIG = {
+            'corporate': {
+                'class_': oauth2.OpenIDConnect,
+                'issuer': 'https://login.example.com/realms/staff',
+                'consumer_key': '#####',
+                'consumer_secret': '#####',
+                'verify_id_token': True,
+            },
+        }
+
+    Supported :class:`.User` properties:
+
+    * birth_date
+    * email
+    * first_name
+    * gender
+    * id
+    * last_name
+    * link
+    * locale
+    * name
+    * nickname
+    * phone
+    * picture
+    * timezone
+    * username
+
+    Unsupported :class:`.User` properties:
+
+    * city
+    * country
+    * location
+    * postal_code
+
+    """
+
+    user_authorization_url = ""
+    access_token_url = ""
+    user_info_url = ""
+
+    user_info_scope = ["openid", "profile", "email"]
+
+    supported_user_attributes = core.SupportedUserAttributes(
+        birth_date=True,
+        email=True,
+        first_name=True,
+        gender=True,
+        id=True,
+        last_name=True,
+        link=True,
+        locale=True,
+        name=True,
+        nickname=True,
+        phone=True,
+        picture=True,
+        timezone=True,
+        username=True,
+    )
+
+    def __init__(self, *args, **kwargs):
+        """
+        Accepts additional keyword arguments:
+
+        :param str issuer:
+            The issuer identifier URL of the identity provider. Required.
+
+        :param str discovery_url:
+            URL of the discovery document. Default is the issuer followed
+            by ``/.well-known/openid-configuration``.
+
+        As well as those inherited from :class:`.OAuth2` constructor.
+
+        """
+
+        super().__init__(*args, **kwargs)
+        self.issuer = self._kwarg(kwargs, "issuer", "")
+        self.discovery_url = self._kwarg(
+            kwargs,
+            "discovery_url",
+            self.issuer.rstrip("/") + "/.well-known/openid-configuration",
+        )
+
+    def _x_scope_parser(self, scope):
+        # OpenID Connect has space-separated scopes and requires openid.
+        return " ".join(["openid"] + [i for i in scope if i != "openid"])
+
+    @classmethod
+    def _x_credentials_parser(cls, credentials, data):
+        if data.get("token_type", "").lower() == "bearer":
+            credentials.token_type = cls.BEARER
+        return credentials
+
+    @staticmethod
+    def _x_user_parser(user, data):
+        user.id = data.get("sub")
+        user.username = data.get("preferred_username")
+        user.first_name = data.get("given_name")
+        user.last_name = data.get("family_name")
+        user.nickname = data.get("nickname")
+        user.link = data.get("profile")
+        user.phone = data.get("phone_number")
+        user.timezone = data.get("zoneinfo")
+        user.birth_date = data.get("birthdate")
+        return user
+
+    def _discovery_flow(self):
+        """
+        Fetch flow which sets the endpoints from the discovery document,
+        fetching it only if it is not cached.
+        """
+
+        if not self.issuer:
+            raise ConfigError(f"Issuer not specified for provider {self.name}!")
+
+        cache = oidc.default_discovery_cache
+        document = cache.get(self.discovery_url)
+        if document is None:
+            self._log(
+                logging.INFO, "Fetching discovery document from %s.", self.discovery_url
+            )
+            etag = cache.etag(self.discovery_url)
+            response = yield self._fetch_step(
+                self.discovery_url,
+                headers={"If-None-Match": etag} if etag else None,
+                certificate_file=self.cert,
+                ssl_verify=self.verify,
+                ssl_context=self.ssl_context,
+                phase="discovery",
+            )
+            ttl = oidc.max_age(response.getheader("Cache-Control"))
+
+            if response.status == 304 and etag:
+                document = cache.revalidate(self.discovery_url, ttl)
+            elif response.status == 200:
+                document = response.data
+                self._check_discovery_document(document)
+                cache.set(self.discovery_url, document, response.getheader("ETag"), ttl)
+
+            if document is None:
+                raise FailureError(
+                    f"Failed to fetch discovery document from {self.discovery_url}! "
+                    f"HTTP status: {response.status}.",
+                    original_message=response.content,
+                    status=response.status,
+                    url=self.discovery_url,
+                )
+
+        self.user_authorization_url = document["authorization_endpoint"]
+        self.access_token_url = document["token_endpoint"]
+        self.user_info_url = document.get("userinfo_endpoint", "")
+        self.jwks_uri = document.get("jwks_uri")
+        self.id_token_issuers = (document["issuer"],)
+
+    def _check_discovery_document(self, document):
+        """
+        Validates the discovery document as required by the
+        `spec <https://openid.net/specs/openid-connect-discovery-1_0.html>`_.
+        """
+
+        if not isinstance(document, dict) or not all(
+            document.get(key)
+            for key in ("issuer", "authorization_endpoint", "token_endpoint")
+        ):
+            raise FailureError(
+                f"Invalid discovery document from {self.discovery_url}!",
+                url=self.discovery_url,
+            )
+
+        if document["issuer"].rstrip("/") != self.issuer.rstrip("/"):
+            raise FailureError(
+                f'The discovery document issuer "{document["issuer"]}" '
+                f'doesn\'t match the configured issuer "{self.issuer}"!',
+                url=self.discovery_url,
+            )
+
+    def _login_flow(self):
+        yield from self._discovery_flow()
+        return (yield from super()._login_flow())
+
+    def _refresh_credentials_flow(self, credentials):
+        if self._x_refresh_credentials_if(credentials):
+            yield from self._discovery_flow()
+        return (yield from super()._refresh_credentials_flow(credentials))
+
+    def _update_user_flow(self):
+        yield from self._discovery_flow()
+        return (yield from super()._update_user_flow())
+
+    def _access_user_info_flow(self, secondary=None):
+        yield from self._discovery_flow()
+        return (yield from super()._access_user_info_flow(secondary))
+
+
 # The provider type ID is generated from this list's indexes!
 # Always append new providers at the end so that ids of existing providers
 # don't change!
@@ -2600,4 +3117,5 @@ PROVIDER_ID_MAP = [
     Tumblr,
     Vimeo,
     Yahoo,
+    OpenIDConnect,
 ]
@@ -424,7 +424,8 @@ class OpenID(providers.AuthenticationProvider):
 
             self._log(
                 logging.INFO,
-                f"Service discovery for identifier {self.identifier} successful.",
+                "Service discovery for identifier %s successful.",
+                self.identifier,
             )
 
             # add SREG extension
@@ -457,7 +458,7 @@ class OpenID(providers.AuthenticationProvider):
             if auth_request.shouldSendRedirect():
                 # can be redirected
                 url = auth_request.redirectURL(realm, return_to)
-                self._log(logging.INFO, f"Redirecting user to {url}.")
+                self._log(logging.INFO, "Redirecting user to %s.", url)
                 self.redirect(url)
             else:
                 # must be sent as POST
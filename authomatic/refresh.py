@@ -0,0 +1,701 @@
+"""
+Refresh
+-------
+
+Keeps large numbers of stored |oauth2|_ credentials fresh and makes sure
+that credentials are refreshed only once when several threads or processes
+find them expiring at the same time.
+
+.. autosummary::
+    :nosignatures:
+
+    RefreshScheduler
+    RefreshCoordinator
+
+"""
+
+import asyncio
+import collections
+import hashlib
+import heapq
+import itertools
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent import futures
+
+from authomatic import codecs
+from authomatic.exceptions import CredentialsError, FetchError
+
+
+__all__ = ["RefreshScheduler", "RefreshCoordinator"]
+
+
+_logger = logging.getLogger(__name__)
+
+
+class _Entry:
+    """
+    Credentials waiting in the :class:`.RefreshScheduler` queue.
+    """
+
+    __slots__ = ("serialized", "credentials", "due", "seq", "retries")
+
+    def __init__(self, serialized, credentials, due, seq, retries=0):
+        self.serialized = serialized
+        self.credentials = credentials
+        self.due = due
+        self.seq = seq
+        self.retries = retries
+
+
+class RefreshScheduler:
+    """
+    Refreshes serialized :class:`.Credentials` ahead of their expiry.
+
+    Credentials are kept in a heap ordered by
+    :attr:`.Credentials.expiration_time` and refreshed :data:`soon` seconds
+    before they expire by at most :data:`concurrency` threads through
+    :meth:`.OAuth2.refresh_credentials`. Credentials sharing the same
+    provider and refresh token are refreshed only once. The refreshed
+    credentials are serialized and passed to the :data:`callback` so that
+    they can be persisted, then they are scheduled again.
+
+    Either call :meth:`.run_pending` periodically or :meth:`.start` a
+    background thread.
+
+    ::
+
+        def save(old, new):
+            db.replace_credentials(old, new)
+
+        scheduler = RefreshScheduler(authomatic, save, soon=3600)
+        scheduler.extend(db.all_credentials())
+        scheduler.start()
+
+    """
+
+    def __init__(
+        self,
+        authomatic,
+        callback,
+        soon=86400,
+        concurrency=10,
+        error_callback=None,
+        retry_delay=300,
+        max_retries=3,
+    ):
+        """
+        :param authomatic:
+            The :class:`.Authomatic` instance with the :doc:`config` used to
+            get the credentials.
+
+        :param callable callback:
+            Called with the old and the new serialized credentials after a
+            successful refresh.
+
+        :param int soon:
+            Number of seconds before expiry when the credentials get
+            refreshed.
+
+        :param int concurrency:
+            Maximum number of simultaneous refreshes.
+
+        :param callable error_callback:
+            Called with the serialized credentials and the exception if a
+            refresh fails. Failures are only logged if not set.
+
+        :param int retry_delay:
+            Number of seconds after which a refresh which failed with a
+            network error is retried.
+
+        :param int max_retries:
+            Maximum number of retries of a failed refresh.
+
+        """
+
+        self.authomatic = authomatic
+        self.callback = callback
+        self.soon = soon
+        self.concurrency = concurrency
+        self.error_callback = error_callback
+        self.retry_delay = retry_delay
+        self.max_retries = max_retries
+
+        self._condition = threading.Condition()
+        self._heap = []
+        self._entries = {}
+        self._in_flight = set()
+        self._seq = itertools.count()
+        self._executor = self._create_executor()
+        self._thread = None
+        self._stopped = False
+
+    def __len__(self):
+        with self._condition:
+            return len(self._entries) + len(self._in_flight)
+
+    def _create_executor(self):
+        return futures.ThreadPoolExecutor(
+            self.concurrency, thread_name_prefix="authomatic-refresh"
+        )
+
+    @staticmethod
+    def _key(credentials):
+        return (
+            credentials.provider_name,
+            credentials.refresh_token or credentials.token,
+        )
+
+    def add(self, credentials):
+        """
+        Schedules credentials for refreshment.
+
+        Credentials which never expire or whose provider doesn't support
+        refreshment are ignored. So are credentials with the same provider
+        and refresh token as ones which are already scheduled.
+
+        :param credentials:
+            Credentials serialized with :meth:`.Credentials.serialize` or
+            :class:`.Credentials` instance.
+
+        :returns:
+            ``True`` if the credentials have been scheduled.
+
+        """
+
+        deserialized = self.authomatic.credentials(credentials)
+        if not isinstance(credentials, str):
+            credentials = self._serialize(deserialized)
+        return self._schedule(credentials, deserialized)
+
+    def _serialize(self, credentials, compact=False):
+        return credentials.serialize(
+            compact, self.authomatic.credentials_secret
+        )
+
+    def extend(self, credentials):
+        """
+        Calls :meth:`.add` for each item of the iterable.
+
+        :returns:
+            Number of scheduled credentials.
+
+        """
+
+        return sum(1 for c in credentials if self.add(c))
+
+    def _schedule(self, serialized, credentials, due=None, retries=0):
+        if not credentials.expiration_time:
+            return False
+        if not hasattr(credentials.provider_class, "refresh_credentials"):
+            return False
+
+        if due is None:
+            due = credentials.expiration_time - self.soon
+
+        key = self._key(credentials)
+        with self._condition:
+            if key in self._entries or key in self._in_flight:
+                return False
+            entry = _Entry(serialized, credentials, due, next(self._seq), retries)
+            self._entries[key] = entry
+            heapq.heappush(self._heap, (entry.due, entry.seq, key))
+            self._condition.notify_all()
+        return True
+
+    def _pop_due(self, now):
+        """
+        Moves due entries from the heap to in-flight.
+        """
+
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            _, seq, key = heapq.heappop(self._heap)
+            entry = self._entries.get(key)
+            if entry is None or entry.seq != seq:
+                continue
+            del self._entries[key]
+            self._in_flight.add(key)
+            due.append((key, entry))
+        return due
+
+    def _dispatch(self, due):
+        return [self._executor.submit(self._refresh, key, entry) for key, entry in due]
+
+    def run_pending(self):
+        """
+        Refreshes all credentials which are due and waits for them.
+
+        :returns:
+            Number of refreshed credentials.
+
+        """
+
+        with self._condition:
+            due = self._pop_due(time.time())
+        return sum(f.result() for f in self._dispatch(due))
+
+    def start(self):
+        """
+        Starts a daemon thread which refreshes credentials when they are due.
+        """
+
+        with self._condition:
+            if self._thread:
+                return
+            self._stopped = False
+            self._thread = threading.Thread(
+                target=self._loop, name="authomatic-refresh", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self, wait=True):
+        """
+        Stops the background thread. The scheduler can be started again.
+
+        :param bool wait:
+            If ``True`` waits for running refreshes to finish.
+
+        """
+
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+            thread, self._thread = self._thread, None
+            # The threads of the old executor finish the running refreshes.
+            executor, self._executor = self._executor, self._create_executor()
+        if thread and wait:
+            thread.join()
+        executor.shutdown(wait)
+
+    def _loop(self):
+        while True:
+            with self._condition:
+                while not self._stopped:
+                    now = time.time()
+                    if self._heap and self._heap[0][0] <= now:
+                        break
+                    timeout = self._heap[0][0] - now if self._heap else None
+                    self._condition.wait(timeout)
+                if self._stopped:
+                    return
+                due = self._pop_due(time.time())
+            self._dispatch(due)
+
+    def _refresh(self, key, entry):
+        """
+        Refreshes one entry.
+
+        :returns:
+            ``1`` if the credentials have been refreshed, else ``0``.
+
+        """
+
+        credentials = entry.credentials
+        retry = False
+        try:
+            provider = credentials.provider_class(
+                self.authomatic, None, credentials.provider_name
+            )
+            before = _values(credentials)
+            response = provider.refresh_credentials(credentials)
+            if response is None:
+                if _values(credentials) == before:
+                    # The provider doesn't refresh these credentials.
+                    return 0
+            elif not 200 <= response.status < 300:
+                raise CredentialsError(
+                    "Failed to refresh credentials!",
+                    original_message=response.content,
+                    status=response.status,
+                )
+            # Keep the format of the stored credentials.
+            serialized = self._serialize(
+                credentials, codecs.is_compact(entry.serialized)
+            )
+        except Exception as e:
+            retry = isinstance(e, (FetchError, OSError))
+            self._failed(entry, e)
+            return 0
+        finally:
+            with self._condition:
+                self._in_flight.discard(key)
+            if retry and entry.retries < self.max_retries:
+                self._schedule(
+                    entry.serialized,
+                    credentials,
+                    time.time() + self.retry_delay,
+                    entry.retries + 1,
+                )
+
+        try:
+            self.callback(entry.serialized, serialized)
+        except Exception as e:
+            # The credentials have been refreshed anyway.
+            self._failed(entry, e)
+
+        # Don't refresh again right away if the new lifetime is shorter than
+        # soon.
+        now = time.time()
+        expiration_time = credentials.expiration_time
+        due = max(expiration_time - self.soon, now + (expiration_time - now) / 2)
+        self._schedule(serialized, credentials, due)
+        return 1
+
+    def _failed(self, entry, error):
+        if self.error_callback:
+            self.error_callback(entry.serialized, error)
+        else:
+            _logger.warning(
+                "Failed to refresh credentials of %s: %r",
+                entry.credentials.provider_name,
+                error,
+            )
+
+
+# Step of the RefreshCoordinator flow which requests the refresh.
+_REFRESH = object()
+
+# Credentials attributes which a refresh changes.
+_REFRESHED = ("token", "refresh_token", "token_type", "expiration_time")
+
+
+class _Flight:
+    """
+    A refresh in progress in this process.
+    """
+
+    __slots__ = ("event", "values", "response", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.values = None
+        self.response = None
+        self.error = None
+
+
+class RefreshCoordinator:
+    """
+    Makes sure that only one thread of only one process refreshes
+    credentials with a given refresh token. The others wait for the refresh
+    and take over the new credentials, so that the token endpoint gets a
+    single request and providers which invalidate the old refresh tokens
+    don't reject the others.
+
+    Threads of a process share the refresh in progress and its result for
+    :data:`result_ttl` seconds. Processes share a lease in a SQLite database
+    if :data:`path` is set. The process which gets the lease refreshes the
+    credentials and stores the new ones for :data:`result_ttl` seconds, the
+    others poll the database in the meantime. If the process holding the
+    lease dies, another one takes over after :data:`lease_ttl` seconds.
+
+    The result is only taken over by credentials which don't have its access
+    token yet. Refreshing the credentials which already have it, e.g. with
+    ``force=True`` when the provider doesn't rotate the refresh token, makes
+    a new refresh.
+
+    Pass it to :class:`.Authomatic` and it will be used by
+    :meth:`.OAuth2.refresh_credentials` and thus by
+    :meth:`.Credentials.refresh` and the :class:`.RefreshScheduler`::
+
+        authomatic = Authomatic(
+            CONFIG,
+            "secret",
+            refresh_coordinator=RefreshCoordinator("/var/run/app/refresh.db"),
+        )
+
+    .. warning::
+
+        The database contains the refreshed tokens for :data:`result_ttl`
+        seconds. Protect it like the credentials themselves.
+
+    """
+
+    def __init__(
+        self,
+        path=None,
+        table="authomatic_refresh",
+        lease_ttl=30,
+        result_ttl=300,
+        poll_interval=0.05,
+    ):
+        """
+        :param str path:
+            Path to the SQLite database shared by the processes. Only the
+            threads of this process are coordinated if ``None``.
+
+        :param str table:
+            Name of the table which will be created if it doesn't exist.
+
+        :param int lease_ttl:
+            Seconds after which a lease expires if the refresh doesn't
+            finish. Should be longer than the fetch timeout.
+
+        :param int result_ttl:
+            Seconds for which the refreshed credentials are kept for
+            threads and processes which still have the old refresh token.
+
+        :param float poll_interval:
+            Seconds between the checks of a lease held by another process.
+
+        """
+
+        if not table.isidentifier():
+            raise ValueError(f"Invalid table name {table!r}!")
+
+        self.path = path
+        self.table = table
+        self.lease_ttl = lease_ttl
+        self.result_ttl = result_ttl
+        self.poll_interval = poll_interval
+        self._flights = {}
+        # key -> (expiration time, values) in the order of expiration.
+        self._results = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._connection = None
+        if path:
+            self._db_lock = threading.Lock()
+            self._connection = sqlite3.connect(
+                path, check_same_thread=False, isolation_level=None, timeout=30
+            )
+            self._connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires REAL NOT NULL, "
+                "result TEXT)"
+            )
+
+    @staticmethod
+    def _key(credentials):
+        # Hashed so that the database doesn't contain the old refresh token.
+        token = credentials.refresh_token or credentials.token or ""
+        return hashlib.sha256(
+            f"{credentials.provider_name}\0{token}".encode("utf-8")
+        ).hexdigest()
+
+    def refresh(self, credentials, refresh):
+        """
+        Calls :data:`refresh` unless another thread or process is already
+        refreshing the :data:`credentials` or has just refreshed them.
+
+        :param credentials:
+            :class:`.Credentials` to be refreshed.
+
+        :param callable refresh:
+            Refreshes the :data:`credentials` in place and returns the
+            :class:`.Response` e.g. :meth:`.OAuth2.refresh_credentials`.
+
+        :returns:
+            The :class:`.Response` of the refresh or ``None`` if the
+            credentials have been updated from a previous refresh or from
+            the refresh of another process.
+
+        """
+
+        flow = self._flow(credentials)
+        send, value = flow.send, None
+        while True:
+            try:
+                step = send(value)
+            except StopIteration as e:
+                return e.value
+            send, value = flow.send, None
+            if step is _REFRESH:
+                try:
+                    value = refresh()
+                except Exception as e:
+                    send, value = flow.throw, e
+            elif isinstance(step, threading.Event):
+                step.wait()
+            else:
+                time.sleep(step)
+
+    async def arefresh(self, credentials, refresh):
+        """
+        Same as :meth:`.refresh` but a coroutine which doesn't block the
+        event loop.
+
+        :param callable refresh:
+            Returns an awaitable e.g. :meth:`.OAuth2.arefresh_credentials`.
+
+        """
+
+        flow = self._flow(credentials)
+        send, value = flow.send, None
+        while True:
+            try:
+                step = send(value)
+            except StopIteration as e:
+                return e.value
+            send, value = flow.send, None
+            if step is _REFRESH:
+                try:
+                    value = await refresh()
+                except Exception as e:
+                    send, value = flow.throw, e
+            elif isinstance(step, threading.Event):
+                while not step.is_set():
+                    await asyncio.sleep(self.poll_interval)
+            else:
+                await asyncio.sleep(step)
+
+    def _flow(self, credentials):
+        """
+        Coordinates the refresh of the :data:`credentials`. Yields
+        ``_REFRESH`` to request the refresh and receives its response, a
+        :class:`threading.Event` or seconds to wait.
+        """
+
+        key = self._key(credentials)
+        with self._lock:
+            values = self._result(key)
+            if values is not None and values["token"] != credentials.token:
+                # A late thread with the old refresh token.
+                _update(credentials, values)
+                return None
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            yield flight.event
+            if flight.error is not None:
+                raise flight.error
+            _update(credentials, flight.values)
+            return flight.response
+
+        try:
+            flight.response = yield from self._leased_flow(key, credentials)
+            flight.values = _values(credentials)
+            return flight.response
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            response = flight.response
+            succeeded = flight.values is not None and (
+                response is None or 200 <= response.status < 300
+            )
+            with self._lock:
+                del self._flights[key]
+                if succeeded:
+                    expires = time.time() + self.result_ttl
+                    self._results[key] = (expires, flight.values)
+                    self._results.move_to_end(key)
+            flight.event.set()
+
+    def _result(self, key):
+        """
+        Returns the values of a recent refresh in this process. Must be
+        called with the lock held.
+        """
+
+        now = time.time()
+        # Drop the expired results, they're ordered by expiration.
+        while self._results:
+            expires, _ = next(iter(self._results.values()))
+            if expires > now:
+                break
+            self._results.popitem(last=False)
+
+        result = self._results.get(key)
+        return result[1] if result else None
+
+    def _leased_flow(self, key, credentials):
+        if self._connection is None:
+            return (yield _REFRESH)
+
+        owner = uuid.uuid4().hex
+        while True:
+            acquired, values = self._acquire(key, owner, credentials.token)
+            if values is not None:
+                # Another process has refreshed them.
+                _update(credentials, values)
+                return None
+            if acquired:
+                break
+            yield self.poll_interval
+
+        response = None
+        try:
+            response = yield _REFRESH
+        finally:
+            succeeded = response is not None and 200 <= response.status < 300
+            self._release(key, owner, _values(credentials) if succeeded else None)
+        return response
+
+    def _acquire(self, key, owner, token):
+        """
+        :param str token:
+            The access token of the credentials. A stored result with the
+            same token is outdated and gets replaced by a new lease.
+
+        :returns:
+            A ``(acquired, values)`` tuple where values are the refreshed
+            credentials attributes if another process has refreshed them.
+
+        """
+
+        now = time.time()
+        with self._db_lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._connection.execute(
+                    f"SELECT result FROM {self.table} WHERE key = ? AND expires > ?",
+                    (key, now),
+                ).fetchone()
+                values = json.loads(row[0]) if row and row[0] else None
+                if values is not None and values["token"] == token:
+                    row = values = None
+                if row is None:
+                    self._connection.execute(
+                        f"INSERT OR REPLACE INTO {self.table} VALUES (?, ?, ?, NULL)",
+                        (key, owner, now + self.lease_ttl),
+                    )
+                self._connection.execute("COMMIT")
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+
+        return row is None, values
+
+    def _release(self, key, owner, values):
+        """
+        Stores the refreshed :data:`values` or just releases the lease if
+        the refresh failed.
+        """
+
+        now = time.time()
+        with self._db_lock:
+            if values is None:
+                self._connection.execute(
+                    f"DELETE FROM {self.table} WHERE key = ? AND owner = ?",
+                    (key, owner),
+                )
+            else:
+                self._connection.execute(
+                    f"UPDATE {self.table} SET result = ?, expires = ? "
+                    "WHERE key = ? AND owner = ?",
+                    (json.dumps(values), now + self.result_ttl, key, owner),
+                )
+            self._connection.execute(
+                f"DELETE FROM {self.table} WHERE expires <= ?", (now,)
+            )
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+
+
+def _values(credentials):
+    return {name: getattr(credentials, name) for name in _REFRESHED}
+
+
+def _update(credentials, values):
+    if values:
+        for name, value in values.items():
+            setattr(credentials, name, value)
@@ -0,0 +1,259 @@
+"""
+Stores
+------
+
+Storages of the :class:`.ServerSession` data implementing the
+:class:`.extras.interfaces.BaseSessionStore` interface and of the *login
+procedure* state implementing the
+:class:`.extras.interfaces.BaseLoginStateStore` interface.
+
+.. autosummary::
+    :nosignatures:
+
+    MemorySessionStore
+    SQLiteSessionStore
+    MemoryLoginStateStore
+    SQLiteLoginStateStore
+
+"""
+
+import collections
+import sqlite3
+import threading
+import time
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+from authomatic.extras.interfaces import BaseLoginStateStore, BaseSessionStore
+
+
+__all__ = [
+    "MemorySessionStore",
+    "SQLiteSessionStore",
+    "MemoryLoginStateStore",
+    "SQLiteLoginStateStore",
+]
+
+
+class MemorySessionStore(BaseSessionStore):
+    """
+    Stores the session data in a dictionary of the current process.
+
+    The least recently used sessions are evicted when there are more than
+    :data:`max_entries` of them.
+
+    .. note::
+
+        Works only if all requests of a *login procedure* are handled by the
+        same process.
+
+    """
+
+    def __init__(self, max_entries=10000):
+        """
+        :param int max_entries:
+            Maximum number of stored sessions.
+
+        """
+
+        self.max_entries = max_entries
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, session_id):
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return None
+            data, expires = entry
+            if expires <= time.time():
+                del self._entries[session_id]
+                return None
+            self._entries.move_to_end(session_id)
+            # A copy so that changes are stored only by set().
+            return dict(data)
+
+    def set(self, session_id, data, ttl):
+        with self._lock:
+            self._entries[session_id] = (dict(data), time.time() + ttl)
+            self._entries.move_to_end(session_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, session_id):
+        with self._lock:
+            self._entries.pop(session_id, None)
+
+    def purge(self):
+        """
+        Removes expired sessions.
+        """
+
+        now = time.time()
+        with self._lock:
+            for session_id, (_, expires) in list(self._entries.items()):
+                if expires <= now:
+                    del self._entries[session_id]
+
+
+class SQLiteSessionStore(BaseSessionStore):
+    """
+    Stores the pickled session data in a SQLite database which can be shared
+    by processes on the same host.
+
+    Expired sessions are removed on every :data:`purge_every`-th
+    :meth:`.set`.
+
+    """
+
+    def __init__(self, path, table="authomatic_sessions", purge_every=100):
+        """
+        :param str path:
+            Path to the database file.
+
+        :param str table:
+            Name of the table which will be created if it doesn't exist.
+
+        :param int purge_every:
+            Number of writes between removals of expired sessions.
+
+        """
+
+        if not table.isidentifier():
+            raise ValueError(f"Invalid table name {table!r}!")
+
+        self.path = path
+        self.table = table
+        self.purge_every = purge_every
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "id TEXT PRIMARY KEY, data BLOB NOT NULL, expires REAL NOT NULL)"
+        )
+
+    def get(self, session_id):
+        with self._lock:
+            row = self._connection.execute(
+                f"SELECT data FROM {self.table} WHERE id = ? AND expires > ?",
+                (session_id, time.time()),
+            ).fetchone()
+        return pickle.loads(row[0]) if row else None
+
+    def set(self, session_id, data, ttl):
+        self._write(session_id, pickle.dumps(dict(data), pickle.HIGHEST_PROTOCOL), ttl)
+
+    def _write(self, key, blob, ttl):
+        with self._lock:
+            self._connection.execute(
+                f"INSERT OR REPLACE INTO {self.table} VALUES (?, ?, ?)",
+                (key, blob, time.time() + ttl),
+            )
+            self._writes += 1
+            purge = self.purge_every and self._writes % self.purge_every == 0
+        if purge:
+            self.purge()
+
+    def delete(self, session_id):
+        with self._lock:
+            self._connection.execute(
+                f"DELETE FROM {self.table} WHERE id = ?", (session_id,)
+            )
+
+    def purge(self):
+        """
+        Removes expired sessions.
+        """
+
+        with self._lock:
+            self._connection.execute(
+                f"DELETE FROM {self.table} WHERE expires <= ?", (time.time(),)
+            )
+
+    def close(self):
+        self._connection.close()
+
+
+class MemoryLoginStateStore(MemorySessionStore, BaseLoginStateStore):
+    """
+    Stores the *login procedure* state in a dictionary of the current
+    process.
+
+    The least recently stored values are evicted when there are more than
+    :data:`max_entries` of them.
+
+    .. note::
+
+        Works only if the callback request of a *login procedure* is handled
+        by the same process as the redirect to the **provider**.
+
+    """
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= time.time():
+                return None
+            return entry[0]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, time.time() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            value, expires = self._entries.pop(key, (None, 0))
+        return value if expires > time.time() else None
+
+
+class SQLiteLoginStateStore(SQLiteSessionStore, BaseLoginStateStore):
+    """
+    Stores the pickled *login procedure* state in a SQLite database which
+    can be shared by processes on the same host.
+
+    A value is returned by :meth:`.pop` to only one of the processes.
+
+    """
+
+    def __init__(self, path, table="authomatic_login_state", purge_every=100):
+        """
+        Same as :class:`.SQLiteSessionStore`.
+        """
+
+        super().__init__(path, table, purge_every)
+
+    def set(self, key, value, ttl):
+        self._write(key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), ttl)
+
+    def pop(self, key):
+        with self._lock:
+            # The write lock makes the read and delete atomic across
+            # processes.
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._connection.execute(
+                    f"SELECT data, expires FROM {self.table} WHERE id = ?", (key,)
+                ).fetchone()
+                if row:
+                    self._connection.execute(
+                        f"DELETE FROM {self.table} WHERE id = ?", (key,)
+                    )
+                self._connection.execute("COMMIT")
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+        if row and row[1] > time.time():
+            return pickle.loads(row[0])
+        return None
@@ -0,0 +1,305 @@
+"""
+Tracing
+-------
+
+Trace spans of the *login procedure*, credentials refreshment and protected
+resource access which tell where the time of a slow login went.
+
+Pass a :class:`.Tracer` to :class:`.Authomatic` to enable tracing::
+
+    exporter = InMemorySpanExporter()
+    authomatic = Authomatic(CONFIG, "secret", tracer=Tracer(exporter))
+
+    result = authomatic.login(adapter, "google")
+    for span in exporter.spans:
+        print(span.name, span.duration, span.attributes)
+
+Without a tracer no spans are created at all.
+
+All spans of a *login procedure* share the same :attr:`.Span.correlation_id`
+which |oauth2|_ providers derive from the CSRF token while the others keep it
+in the session between the redirects. Spans of a refreshment or an access
+get a new one. The spans are:
+
+``authomatic.login``
+    A step of the *login procedure* i.e. one request to the *login handler*.
+``authomatic.refresh``, ``authomatic.access``
+    Credentials refreshment and protected resource access.
+``oauth1.request_token``, ``oauth1.access_token``, ``oauth2.token``
+    Fetching and parsing of the tokens.
+``oauth1.authorize``, ``oauth2.authorize``
+    Preparing the redirect of the **user** to the **provider**.
+``oauth2.validate_state``
+    Validation of the ``state`` parameter.
+``authomatic.fetch``
+    An HTTP request to a **provider**, one per redirect hop.
+``authomatic.connect``
+    Establishing a new connection i.e. the DNS lookup and the TCP and TLS
+    handshakes. Absent if a pooled connection has been reused.
+``authomatic.user``
+    Creating the :class:`.User` from the user info data.
+
+.. autosummary::
+    :nosignatures:
+
+    Tracer
+    Span
+    SpanExporter
+    InMemorySpanExporter
+
+"""
+
+import contextvars
+import secrets
+import threading
+import time
+
+
+__all__ = ["Tracer", "Span", "SpanExporter", "InMemorySpanExporter", "NOOP_SPAN"]
+
+
+_current_span = contextvars.ContextVar("authomatic_current_span", default=None)
+
+
+class SpanExporter:
+    """
+    Base class of span exporters which ignores everything.
+
+    Override :meth:`.export` to send the spans e.g. to an OpenTelemetry
+    collector. It is called synchronously from the threads doing the work,
+    so it should be fast and thread-safe.
+
+    """
+
+    def export(self, span):
+        """
+        Called with each finished :class:`.Span`.
+        """
+
+
+class InMemorySpanExporter(SpanExporter):
+    """
+    Keeps the finished spans in a list. Meant for tests.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+        #: :class:`list` of finished :class:`.Span` instances in the order
+        #: they finished.
+        self.spans = []
+
+    def export(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def get(self, name):
+        """
+        Returns the finished spans with the :data:`name`.
+
+        :returns:
+            :class:`list`
+
+        """
+
+        with self._lock:
+            return [span for span in self.spans if span.name == name]
+
+    def clear(self):
+        """
+        Forgets all finished spans.
+        """
+
+        with self._lock:
+            self.spans = []
+
+
+class Span:
+    """
+    A timed operation. Use it as a context manager, it becomes the parent of
+    spans started inside of the ``with`` block.
+
+    An exception raised from the block is recorded in :attr:`.error`.
+
+    """
+
+    __slots__ = (
+        "tracer",
+        "name",
+        "correlation_id",
+        "span_id",
+        "parent_id",
+        "attributes",
+        "start_time",
+        "duration",
+        "error",
+        "_started",
+        "_token",
+    )
+
+    def __init__(self, tracer, name, correlation_id, parent_id, attributes):
+        self.tracer = tracer
+
+        #: :class:`str` Name of the span e.g. ``"authomatic.fetch"``.
+        self.name = name
+
+        #: :class:`str` Id shared by all spans of a *login procedure*.
+        self.correlation_id = correlation_id
+
+        #: :class:`str` Id of the span.
+        self.span_id = secrets.token_hex(8)
+
+        #: :class:`str` :attr:`.span_id` of the parent span or ``None``.
+        self.parent_id = parent_id
+
+        #: :class:`dict` Attributes of the span e.g. ``{"status": 200}``.
+        self.attributes = attributes
+
+        #: :class:`float` UNIX timestamp of the start.
+        self.start_time = time.time()
+
+        #: :class:`float` Seconds the span took or ``None`` if unfinished.
+        self.duration = None
+
+        #: :class:`str` Class name of the recorded exception or ``None``.
+        self.error = None
+
+        self._started = time.perf_counter()
+        self._token = None
+
+    def __repr__(self):
+        return (
+            f"<Span {self.name} correlation_id={self.correlation_id} "
+            f"duration={self.duration} attributes={self.attributes}>"
+        )
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if isinstance(exc_value, Exception):
+            self.record_error(exc_value)
+        if self._token is not None:
+            try:
+                _current_span.reset(self._token)
+            except ValueError:
+                # A fetch flow generator closed from another context.
+                pass
+        self.end()
+
+    def set_attribute(self, key, value):
+        """
+        Sets an attribute of the span.
+        """
+
+        self.attributes[key] = value
+
+    def record_error(self, error):
+        """
+        Records an exception which the span failed with.
+        """
+
+        self.error = type(error).__name__
+
+    def end(self):
+        """
+        Finishes the span and passes it to the exporter. Called by the
+        context manager.
+        """
+
+        if self.duration is None:
+            self.duration = time.perf_counter() - self._started
+            self.tracer.exporter.export(self)
+
+
+class _NoopSpan:
+    """
+    Span returned when tracing is disabled.
+    """
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+    def set_attribute(self, key, value):
+        pass
+
+    def record_error(self, error):
+        pass
+
+    def end(self):
+        pass
+
+
+#: A shared span which does nothing.
+NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    """
+    Creates :class:`.Span` instances and passes the finished ones to a
+    :class:`.SpanExporter`.
+    """
+
+    def __init__(self, exporter=None):
+        """
+        :param exporter:
+            :class:`.SpanExporter` receiving the finished spans. Defaults to
+            a new :class:`.InMemorySpanExporter`.
+
+        """
+
+        self.exporter = InMemorySpanExporter() if exporter is None else exporter
+
+    @staticmethod
+    def new_correlation_id():
+        """
+        Generates a random correlation id.
+
+        :returns:
+            :class:`str`
+
+        """
+
+        return secrets.token_hex(16)
+
+    @staticmethod
+    def current_span():
+        """
+        Returns the innermost active :class:`.Span` of the current thread or
+        task or ``None``.
+        """
+
+        return _current_span.get()
+
+    def start_span(self, name, correlation_id=None, **attributes):
+        """
+        Starts a span which is a child of the :meth:`.current_span`.
+
+        :param str name:
+            Name of the span.
+
+        :param str correlation_id:
+            Defaults to the one of the parent span or a new one.
+
+        :param attributes:
+            Attributes of the span.
+
+        :returns:
+            :class:`.Span`
+
+        """
+
+        parent = _current_span.get()
+        if correlation_id is None:
+            correlation_id = (
+                parent.correlation_id if parent else self.new_correlation_id()
+            )
+        return Span(
+            self, name, correlation_id, parent.span_id if parent else None, attributes
+        )
@@ -0,0 +1,764 @@
+"""
+Transport
+---------
+
+HTTP plumbing used by :meth:`.BaseProvider._fetch`.
+
+.. autosummary::
+    :nosignatures:
+
+    ConnectionPool
+    SSLContextCache
+    BufferedResponse
+    StreamingResponse
+    AsyncTransport
+    AsyncioTransport
+
+"""
+
+import abc
+import asyncio
+import collections
+import io
+import os
+import ssl
+import threading
+import time
+
+from authomatic.exceptions import FetchError
+from authomatic.six.moves import http_client
+
+
+__all__ = [
+    "ConnectionPool",
+    "SSLContextCache",
+    "BufferedResponse",
+    "StreamingResponse",
+    "AsyncTransport",
+    "AsyncioTransport",
+    "default_pool",
+    "default_async_transport",
+    "ssl_context_cache",
+]
+
+
+#: Exceptions which indicate that a reused keep-alive connection has been
+#: closed by the server while it was idle in the pool.
+STALE_CONNECTION_ERRORS = (
+    http_client.RemoteDisconnected,
+    http_client.BadStatusLine,
+    BrokenPipeError,
+    ConnectionResetError,
+    ConnectionAbortedError,
+)
+
+
+class BufferedResponse:
+    """
+    Wraps a fully read :class:`httplib.HTTPResponse`.
+
+    The body is read as soon as the response arrives, so that the underlying
+    connection can be returned to the :class:`.ConnectionPool` right away.
+    Exposes the same interface as :class:`httplib.HTTPResponse` which is
+    used by :class:`.core.Response`.
+
+    """
+
+    def __init__(self, httplib_response, body):
+        """
+        :param httplib_response:
+            The original :class:`httplib.HTTPResponse` instance.
+
+        :param bytes body:
+            The response body.
+        """
+
+        self.httplib_response = httplib_response
+        self.msg = httplib_response.msg
+        self.version = httplib_response.version
+        self.status = httplib_response.status
+        self.reason = httplib_response.reason
+        self._body = body
+        self._position = 0
+
+    @property
+    def length(self):
+        """
+        Number of bytes left to read like :attr:`httplib.HTTPResponse.length`.
+        """
+
+        return len(self._body) - self._position
+
+    def read(self, amt=None):
+        start = self._position
+        end = len(self._body) if amt is None else min(start + amt, len(self._body))
+        self._position = end
+        return self._body[start:end]
+
+    def getheader(self, name, default=None):
+        return self.httplib_response.getheader(name, default)
+
+    def getheaders(self):
+        return self.httplib_response.getheaders()
+
+    def fileno(self):
+        return self.httplib_response.fileno()
+
+    def isclosed(self):
+        return self._position >= len(self._body)
+
+    def close(self):
+        self._position = len(self._body)
+
+
+class StreamingResponse:
+    """
+    Wraps an :class:`httplib.HTTPResponse` whose body is read on demand.
+
+    The connection is returned to the :class:`.ConnectionPool` as soon as
+    the body has been read completely. A response closed before that
+    closes its connection. Exposes the same interface as
+    :class:`.BufferedResponse`.
+
+    """
+
+    def __init__(self, httplib_response, pool, connection):
+        """
+        :param httplib_response:
+            The original :class:`httplib.HTTPResponse` instance.
+
+        :param pool:
+            The :class:`.ConnectionPool` the :data:`connection` belongs to.
+
+        :param connection:
+            The connection over which the response is being received.
+        """
+
+        self.httplib_response = httplib_response
+        self.msg = httplib_response.msg
+        self.version = httplib_response.version
+        self.status = httplib_response.status
+        self.reason = httplib_response.reason
+        self._pool = pool
+        self._connection = connection
+        self._check_done()
+
+    def _check_done(self):
+        connection, self._connection = self._connection, None
+        if connection is None:
+            return
+        if not self.httplib_response.isclosed():
+            self._connection = connection
+        elif self.httplib_response.will_close:
+            self._pool.discard(connection)
+        else:
+            self._pool.release(connection)
+
+    def read(self, amt=None):
+        try:
+            return self.httplib_response.read(amt)
+        except Exception:
+            self.close()
+            raise
+        finally:
+            self._check_done()
+
+    def getheader(self, name, default=None):
+        return self.httplib_response.getheader(name, default)
+
+    def getheaders(self):
+        return self.httplib_response.getheaders()
+
+    def fileno(self):
+        return self.httplib_response.fileno()
+
+    @property
+    def length(self):
+        return self.httplib_response.length
+
+    def isclosed(self):
+        return self.httplib_response.isclosed()
+
+    def close(self):
+        connection, self._connection = self._connection, None
+        self.httplib_response.close()
+        if connection is not None:
+            # The rest of the body would confuse the next response.
+            self._pool.discard(connection)
+
+
+class ConnectionPool:
+    """
+    A thread-safe pool of keep-alive HTTP(S) connections.
+
+    Connections are pooled per *scheme*, *host*, *port* and SSL settings,
+    so that repeated requests to the same **provider** reuse an already
+    established TCP connection and TLS session.
+
+    """
+
+    def __init__(self, max_idle=10, max_per_host=10, idle_timeout=60, wait_timeout=30):
+        """
+        :param int max_idle:
+            Maximum number of idle connections kept per host.
+            ``0`` disables connection reuse.
+
+        :param int max_per_host:
+            Maximum number of simultaneously open connections per host.
+            Requests over the limit wait until a connection is released.
+            ``None`` means no limit.
+
+        :param float idle_timeout:
+            Idle connections older than this in seconds are closed instead
+            of being reused.
+
+        :param float wait_timeout:
+            Maximum number of seconds to wait for a connection to be
+            released. ``None`` means waiting forever.
+        """
+
+        self.max_idle = max_idle
+        self.max_per_host = max_per_host
+        self.idle_timeout = idle_timeout
+        self.wait_timeout = wait_timeout
+
+        self._lock = threading.Condition()
+        # key -> deque of (connection, time of release)
+        self._idle = collections.defaultdict(collections.deque)
+        # key -> number of connections checked out or idle
+        self._open = collections.Counter()
+        # key without the context version -> key of the current version
+        self._versions = {}
+        # keys of replaced context versions with connections still open
+        self._outdated = set()
+
+    @staticmethod
+    def _key(scheme, host, port, ssl_context=None):
+        scheme = scheme.lower()
+        if scheme != "https":
+            return (scheme, host, port, None)
+        # Contexts of the SSLContextCache are keyed by their settings and
+        # version, see _evict_outdated().
+        return (scheme, host, port, getattr(ssl_context, "pool_key", ssl_context))
+
+    def _evict_outdated(self, key):
+        """
+        Removes the idle connections made with a previous version of the
+        :class:`.SSLContextCache` context of the :data:`key`. Must be called
+        with the lock held.
+
+        :returns:
+            :class:`list` of the connections to close.
+
+        """
+
+        if not isinstance(key[3], tuple):
+            return []
+
+        settings, _ = key[3]
+        previous = self._versions.get(key[:3] + (settings,))
+        if previous == key:
+            return []
+
+        self._versions[key[:3] + (settings,)] = key
+        if previous is None:
+            return []
+
+        idle = self._idle.pop(previous, ())
+        connections = [connection for connection, _ in idle]
+        self._open[previous] -= len(connections)
+        if self._open[previous] > 0:
+            # Checked out connections are discarded when released.
+            self._outdated.add(previous)
+        else:
+            del self._open[previous]
+        return connections
+
+    @staticmethod
+    def _create_connection(key, ssl_context):
+        scheme, host, port, _ = key
+
+        if scheme == "https":
+            return http_client.HTTPSConnection(host, port=port, context=ssl_context)
+        return http_client.HTTPConnection(host, port=port)
+
+    def _expired(self, released):
+        return (
+            self.idle_timeout is not None
+            and time.time() - released > self.idle_timeout
+        )
+
+    def acquire(self, scheme, host, port=None, ssl_context=None):
+        """
+        Checks a connection out of the pool or creates a new one.
+
+        :param ssl_context:
+            The :class:`ssl.SSLContext` of HTTPS connections. Connections
+            are only reused for requests with the very same context or a
+            context of the :class:`.SSLContextCache` with the same settings
+            and version. Idle connections of a replaced version are closed.
+
+        :raises:
+            :exc:`.FetchError` if no connection has been released within
+            :attr:`.wait_timeout` seconds.
+
+        :returns:
+            A ``(connection, reused)`` tuple where ``reused`` is ``True`` if
+            the connection was taken from the idle connections.
+
+        """
+
+        key = self._key(scheme, host, port, ssl_context)
+        stale = []
+        connection = None
+        timed_out = False
+        deadline = None
+        if self.wait_timeout is not None:
+            deadline = time.monotonic() + self.wait_timeout
+
+        with self._lock:
+            stale.extend(self._evict_outdated(key))
+            while True:
+                idle = self._idle[key]
+                while idle and connection is None:
+                    candidate, released = idle.pop()
+                    if self._expired(released):
+                        stale.append(candidate)
+                        self._open[key] -= 1
+                    else:
+                        connection = candidate
+
+                if connection is not None:
+                    break
+
+                if self.max_per_host is None or self._open[key] < self.max_per_host:
+                    self._open[key] += 1
+                    break
+
+                if deadline is None:
+                    self._lock.wait()
+                    continue
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    timed_out = True
+                    break
+                self._lock.wait(remaining)
+
+        self._close_all(stale)
+
+        if timed_out:
+            raise FetchError(
+                f"Timed out waiting for a connection to {host}, "
+                f"all {self.max_per_host} are in use!"
+            )
+
+        if connection is not None:
+            return connection, True
+
+        try:
+            connection = self._create_connection(key, ssl_context)
+        except Exception:
+            self._forget(key)
+            raise
+
+        connection.pool_key = key
+        return connection, False
+
+    def release(self, connection):
+        """
+        Returns a connection whose response has been fully read to the pool.
+        """
+
+        key = connection.pool_key
+
+        with self._lock:
+            if (
+                connection.sock is not None
+                and key not in self._outdated
+                and len(self._idle[key]) < self.max_idle
+            ):
+                self._idle[key].append((connection, time.time()))
+                self._lock.notify_all()
+                return
+
+        self.discard(connection)
+
+    def discard(self, connection):
+        """
+        Closes a connection and removes it from the pool.
+        """
+
+        connection.close()
+        self._forget(connection.pool_key)
+
+    def _forget(self, key):
+        with self._lock:
+            self._open[key] -= 1
+            if key in self._outdated and self._open[key] <= 0:
+                self._outdated.discard(key)
+                del self._open[key]
+            self._lock.notify_all()
+
+    def clear(self):
+        """
+        Closes all idle connections.
+        """
+
+        connections = []
+        with self._lock:
+            for key, idle in self._idle.items():
+                self._open[key] -= len(idle)
+                connections.extend(connection for connection, _ in idle)
+                idle.clear()
+            self._lock.notify_all()
+
+        self._close_all(connections)
+
+    @staticmethod
+    def _close_all(connections):
+        for connection in connections:
+            connection.close()
+
+    def request(
+        self,
+        scheme,
+        host,
+        port,
+        method,
+        path,
+        body=None,
+        headers=None,
+        ssl_context=None,
+        stream=False,
+        span=None,
+    ):
+        """
+        Sends a request over a pooled connection and reads the response.
+
+        If a reused connection turns out to have been closed by the server,
+        the request is retried once over a fresh connection.
+
+        :param bool stream:
+            If ``True`` the body is not read in advance and the connection
+            is held until it has been read or the response closed.
+
+        :param callable span:
+            If set, new connections are established in advance inside of
+            the ``span("authomatic.connect", **attributes)`` context manager
+            e.g. :meth:`.tracing.Tracer.start_span`, so that the DNS lookup
+            and the TCP and TLS handshakes can be timed.
+
+        :returns:
+            :class:`.BufferedResponse` or :class:`.StreamingResponse` if
+            :data:`stream` is ``True``.
+
+        """
+
+        while True:
+            connection, reused = self.acquire(scheme, host, port, ssl_context)
+            try:
+                if span is not None and not reused:
+                    with span("authomatic.connect", host=host, port=port):
+                        connection.connect()
+                connection.request(method, path, body, headers or {})
+                response = connection.getresponse()
+                if stream:
+                    return StreamingResponse(response, self, connection)
+                body_bytes = response.read()
+            except STALE_CONNECTION_ERRORS:
+                self.discard(connection)
+                if reused:
+                    continue
+                raise
+            except Exception:
+                self.discard(connection)
+                raise
+
+            if response.will_close:
+                self.discard(connection)
+            else:
+                self.release(connection)
+
+            return BufferedResponse(response, body_bytes)
+
+
+class SSLContextCache:
+    """
+    A thread-safe cache of :class:`ssl.SSLContext` instances.
+
+    Creating a context parses the whole CA bundle, so contexts are created
+    once per ``(certificate_file, ssl_verify)`` pair and reused until
+    the modification time of the ``certificate_file`` changes.
+
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (certificate_file, ssl_verify) -> (mtime, context)
+        self._contexts = {}
+
+    @staticmethod
+    def _mtime(certificate_file):
+        if certificate_file:
+            try:
+                return os.stat(certificate_file).st_mtime_ns
+            except OSError:
+                return None
+
+    @staticmethod
+    def _create_context(certificate_file, ssl_verify):
+        if ssl_verify:
+            return ssl.create_default_context(
+                purpose=ssl.Purpose.SERVER_AUTH, cafile=certificate_file
+            )
+        return ssl._create_unverified_context()
+
+    def get(self, certificate_file=None, ssl_verify=True):
+        """
+        Returns a cached :class:`ssl.SSLContext`.
+
+        :param str certificate_file:
+            Optional CA certificate file.
+
+        :param bool ssl_verify:
+            Whether the context should verify the server certificate.
+
+        :returns:
+            :class:`ssl.SSLContext`
+
+        """
+
+        key = (certificate_file, bool(ssl_verify))
+        mtime = self._mtime(certificate_file) if ssl_verify else None
+
+        cached = self._contexts.get(key)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        with self._lock:
+            cached = self._contexts.get(key)
+            if cached and cached[0] == mtime:
+                return cached[1]
+
+            context = self._create_context(certificate_file, ssl_verify)
+            # Lets the ConnectionPool drop the connections of the replaced
+            # context.
+            context.pool_key = (key, mtime)
+            self._contexts[key] = (mtime, context)
+            return context
+
+    def clear(self):
+        """
+        Drops all cached contexts.
+        """
+
+        with self._lock:
+            self._contexts.clear()
+
+
+class _ResponseHead:
+    """
+    Status line and headers of a response read by :class:`.AsyncioTransport`
+    with the same interface as :class:`httplib.HTTPResponse`.
+    """
+
+    def __init__(self, version, status, reason, msg):
+        self.version = version
+        self.status = status
+        self.reason = reason
+        self.msg = msg
+
+    def getheader(self, name, default=None):
+        headers = self.msg.get_all(name) or default
+        if isinstance(headers, str) or not hasattr(headers, "__iter__"):
+            return headers
+        return ", ".join(headers)
+
+    def getheaders(self):
+        return list(self.msg.items())
+
+    def fileno(self):
+        return None
+
+
+class AsyncTransport:
+    """
+    Abstract base class for non-blocking transports used by
+    :meth:`.BaseProvider._afetch`.
+
+    Implement it to plug in the HTTP client of your choice.
+
+    """
+
+    __metaclass__ = abc.ABCMeta
+
+    @abc.abstractmethod
+    async def request(
+        self,
+        scheme,
+        host,
+        port,
+        method,
+        path,
+        body=None,
+        headers=None,
+        ssl_context=None,
+    ):
+        """
+        Must send the request and read the whole response.
+
+        :param str scheme:
+            Either ``"http"`` or ``"https"``.
+
+        :param str host:
+            Host name.
+
+        :param int port:
+            Port or ``None`` for the default port of the :data:`scheme`.
+
+        :param str method:
+            HTTP method of the request.
+
+        :param str path:
+            Request path including query string.
+
+        :param str body:
+            Request body.
+
+        :param dict headers:
+            Request headers.
+
+        :param ssl_context:
+            :class:`ssl.SSLContext` for HTTPS requests.
+
+        :returns:
+            :class:`.BufferedResponse` or any object with the same interface.
+
+        """
+
+
+class AsyncioTransport(AsyncTransport):
+    """
+    A minimal HTTP/1.1 client built on :func:`asyncio.open_connection`.
+
+    Each request opens its own connection, so thousands of requests can run
+    concurrently on a single event loop.
+
+    """
+
+    def __init__(self, timeout=None):
+        """
+        :param float timeout:
+            Timeout of the whole request in seconds or ``None``.
+        """
+
+        self.timeout = timeout
+
+    @staticmethod
+    def _encode_request(host, port, method, path, body, headers):
+        headers = dict(headers or {})
+        names = {k.lower() for k in headers}
+
+        if "host" not in names:
+            headers["Host"] = f"{host}:{port}" if port else host
+        if "accept-encoding" not in names:
+            headers["Accept-Encoding"] = "identity"
+        if body or method in ("POST", "PUT", "PATCH"):
+            headers["Content-Length"] = str(len(body))
+        headers["Connection"] = "close"
+
+        lines = [f"{method} {path or '/'} HTTP/1.1"]
+        lines.extend(f"{k}: {v}" for k, v in headers.items())
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+    @staticmethod
+    async def _read_chunked(reader):
+        chunks = []
+        while True:
+            size_line = await reader.readline()
+            size = int(size_line.split(b";", 1)[0].strip(), 16)
+            if not size:
+                # Skip trailers.
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                return b"".join(chunks)
+            chunks.append(await reader.readexactly(size))
+            await reader.readline()
+
+    async def _request(
+        self, scheme, host, port, method, path, body, headers, ssl_context
+    ):
+        https = scheme.lower() == "https"
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        body = body or b""
+
+        reader, writer = await asyncio.open_connection(
+            host,
+            port or (443 if https else 80),
+            ssl=ssl_context if https else None,
+        )
+
+        try:
+            writer.write(self._encode_request(host, port, method, path, body, headers))
+            await writer.drain()
+
+            head = await reader.readuntil(b"\r\n\r\n")
+            status_line, _, header_lines = head.partition(b"\r\n")
+            version, status, reason = (
+                status_line.decode("latin-1").rstrip() + "  "
+            ).split(" ", 2)
+            status = int(status)
+            msg = http_client.parse_headers(io.BytesIO(header_lines))
+            response_head = _ResponseHead(
+                11 if version == "HTTP/1.1" else 10, status, reason.strip(), msg
+            )
+
+            length = msg.get("Content-Length")
+            if method == "HEAD" or status in (204, 304) or 100 <= status < 200:
+                content = b""
+            elif "chunked" in msg.get("Transfer-Encoding", "").lower():
+                content = await self._read_chunked(reader)
+            elif length is not None:
+                content = await reader.readexactly(int(length))
+            else:
+                content = await reader.read()
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (OSError, ssl.SSLError):
+                pass
+
+        return BufferedResponse(response_head, content)
+
+    async def request(
+        self,
+        scheme,
+        host,
+        port,
+        method,
+        path,
+        body=None,
+        headers=None,
+        ssl_context=None,
+    ):
+        return await asyncio.wait_for(
+            self._request(
+                scheme, host, port, method, path, body, headers, ssl_context
+            ),
+            self.timeout,
+        )
+
+
+#: The process-wide :class:`.SSLContextCache`.
+ssl_context_cache = SSLContextCache()
+
+#: The :class:`.ConnectionPool` used by providers which are not bound to an
+#: :class:`.Authomatic` instance e.g. in :meth:`.Credentials.refresh`.
+default_pool = ConnectionPool()
+
+#: The :class:`.AsyncTransport` used by providers which are not bound to an
+#: :class:`.Authomatic` instance.
+default_async_transport = AsyncioTransport()
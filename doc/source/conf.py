@@ -80,8 +80,6 @@ rst_prolog = """
 
 .. |classmethod| replace:: Must be a classmethod!
 
-.. |async| replace:: The internal implementation of the future pattern is quite naive. Use with caution!
-
 .. |provider-class| replace:: provider class
 .. _provider-class: providers
 
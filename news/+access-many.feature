@@ -0,0 +1 @@
+Added ``Authomatic.access_many()`` which accesses many protected resources concurrently over pooled connections and yields per-request results as they finish.
@@ -0,0 +1 @@
+Add ``asyncio`` counterparts ``Authomatic.alogin()``, ``Authomatic.aaccess()``, ``Credentials.arefresh()`` and ``User.aupdate()`` backed by a pluggable ``async_transport``.
@@ -0,0 +1 @@
+Run ``async_access()``, ``User.async_update()`` and ``Credentials.async_refresh()`` on a bounded ``Executor`` owned by ``Authomatic`` (``max_workers``, ``queue_depth``) instead of a new thread per call. ``Future.get_result()`` now re-raises exceptions; added ``as_completed()`` and ``wait_all()`` helpers.
@@ -0,0 +1 @@
+Added a compact, optionally HMAC signed credentials format: ``credentials.serialize(compact=True)`` or ``serialize(secret=...)``. ``Credentials.deserialize()`` detects the format and ``Authomatic(credentials_secret=...)`` accepts only signed credentials.
@@ -0,0 +1 @@
+Reuse keep-alive HTTP(S) connections to providers through a thread-safe connection pool configurable on ``Authomatic``. Waiting for a connection to a busy host times out after ``pool_wait_timeout`` seconds.
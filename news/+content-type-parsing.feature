@@ -0,0 +1 @@
+Responses are parsed according to their ``Content-Type`` and only sniffed if it is missing or ambiguous, instead of trying JSON, XML and query string in turn. ``set_json_backend("orjson")`` selects the optional faster *orjson* parser, installable with the ``orjson`` extra.
@@ -0,0 +1 @@
+Provider logging is level-guarded and formatted lazily, so disabled DEBUG messages cost nothing on the fetch path. Each fetch emits a single DEBUG record instead of eleven, with the request and response details also available as the ``authomatic_fetch`` record attribute for structured log handlers.
@@ -0,0 +1 @@
+Added ``Authomatic(login_state_store=...)`` which keeps the OAuth 2.0 CSRF token and the OAuth 1.0a request token secret in a ``BaseLoginStateStore`` keyed by the token the callback request carries, instead of in the session cookie. The session cookie keeps only that token, which binds the state to the browser that started the login. Each value expires after ``session_max_age`` and can be read only once. Added ``stores.MemoryLoginStateStore`` and ``stores.SQLiteLoginStateStore``, which worker processes on a host can share.
@@ -0,0 +1 @@
+Added ``Authomatic(metrics=...)`` instrumentation. A ``MetricsCollector`` is notified of the latency, status code, size and error class of every request to a provider labeled by phase (request token, token, user info, refresh, access), and of the duration and outcome of logins, refreshes and accesses. ``InMemoryMetrics`` aggregates them into histograms and counters and renders the Prometheus text format.
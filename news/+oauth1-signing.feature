@@ -0,0 +1 @@
+Made OAuth 1.0a request signing about 2.5x faster: the HMAC key of each consumer and token secret pair is computed once and cached, parameters are percent encoded in a single pass with a fast path for unreserved characters, the escaped method and URL prefix of the base string is cached and the nonce comes straight from ``secrets``. Added ``HMACSHA256SignatureGenerator`` which providers can use as their ``_signature_generator``.
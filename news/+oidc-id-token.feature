@@ -0,0 +1 @@
+Added the ``verify_id_token`` option to ``oauth2.Google`` and ``oauth2.MicrosoftOnline`` which validates the OpenID Connect ``id_token`` locally with cached JSON Web Key Sets and populates the user from its claims at login. Added the ``authomatic.oidc`` module.
@@ -0,0 +1 @@
+Added the generic ``oauth2.OpenIDConnect`` provider which reads its endpoints from the discovery document of its ``issuer``. The document is cached by ``oidc.DiscoveryCache`` in memory and optionally on disk, honouring ``Cache-Control`` and revalidating with ``ETag``.
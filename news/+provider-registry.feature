@@ -0,0 +1 @@
+Added ``Authomatic.registry``, a ``ProviderRegistry`` with precomputed provider lookups by id, name and type id, which speeds up credentials deserialization, ``login()``, ``backend()`` and ``request_elements()``.
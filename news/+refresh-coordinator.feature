@@ -0,0 +1 @@
+Added ``refresh.RefreshCoordinator`` and the ``refresh_coordinator`` argument of ``Authomatic``. With it, only one thread of only one process refreshes credentials with a given refresh token. The others wait and take over the refreshed credentials. The processes share a lease in a SQLite database.
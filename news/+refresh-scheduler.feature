@@ -0,0 +1 @@
+Added ``authomatic.refresh.RefreshScheduler`` which refreshes large numbers of stored OAuth 2.0 credentials ahead of their expiry with bounded concurrency.
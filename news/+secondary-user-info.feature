@@ -0,0 +1 @@
+Added ``SecondaryUserInfo`` declarations of the additional user info fetches of GitHub, Bitbucket and Vimeo. ``GitHub.access()`` no longer fetches ``/emails`` after every response, the emails are only fetched with the user info and concurrently with it. Fetches providing none of the attributes listed in the new ``user_info_attributes`` config option are deferred until their ``User`` attribute is read or until the new ``User.aload()`` coroutine is awaited.
@@ -0,0 +1 @@
+Added server-side sessions. With ``Authomatic(session_store=...)`` the cookie holds only a random session id and the login state lives in a ``MemorySessionStore`` (LRU) or ``SQLiteSessionStore``, both with TTL expiry. Custom stores implement ``BaseSessionStore``.
@@ -0,0 +1 @@
+Added pluggable session cookie codecs. ``Authomatic(session_codec=JSONSessionCodec())`` stores the session as compact JSON, zlib compressed above a size threshold and signed with HMAC-SHA256, instead of pickle.
@@ -0,0 +1 @@
+``Session`` decodes the cookie at most once per request and ``save()`` writes the ``Set-Cookie`` header only if the data changed. The ``decode_count``, ``encode_count`` and ``skipped_save_count`` counters expose it.
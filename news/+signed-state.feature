@@ -0,0 +1 @@
+Added the ``signed_state`` option of OAuth 2.0 providers which signs and timestamps the ``state`` parameter with the ``Authomatic`` secret. Neither phase of the login procedure then writes or reads the session. Added ``OAuth2.encode_state()``, ``OAuth2.decode_state()`` validates signed states with the ``secret`` argument.
@@ -0,0 +1 @@
+Cache SSL contexts per ``certificate_file`` and ``ssl_verify`` and accept a prebuilt ``ssl_context`` in the provider config.
@@ -0,0 +1 @@
+Added ``Response.iter_content(chunk_size, max_size)`` and ``access(..., stream=True)`` to read large responses in chunks. ``Authomatic.backend(adapter, stream=True, max_body_size=...)`` forwards ``fetch`` responses with bounded memory and can limit their size.
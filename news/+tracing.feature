@@ -0,0 +1 @@
+Added ``Authomatic(tracer=...)`` trace spans of the login steps, the OAuth 1.0a request and access token exchanges, the OAuth 2.0 state validation and token exchange, every fetch and redirect hop, establishing of new connections and user creation, as well as of refreshes and accesses. All spans of a login procedure share a correlation id kept in the session. ``InMemorySpanExporter`` collects the finished spans for tests. No spans are created without a tracer.
@@ -0,0 +1 @@
+``AuthorizationProvider.type_id`` is accessible on the class, ``BaseProvider.get_type()`` is computed once per class and ``authomatic.providers.type_id_to_class()`` provides the reverse lookup.
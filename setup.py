@@ -12,5 +12,6 @@ setup(
     extras_require={
         'OpenID: python_version < "3"': ["python-openid"],
         'OpenID: python_version >= "3"': ["python3-openid"],
+        "orjson": ["orjson"],
     },
 )
@@ -0,0 +1,67 @@
+"""
+Compares the size and the encode/decode throughput of the legacy and the
+compact credentials formats.
+
+Run from the repository root with the package importable::
+
+    $ PYTHONPATH=. python tests/benchmarks/bench_credentials.py
+
+"""
+
+import timeit
+
+from authomatic import Authomatic
+from authomatic.providers import oauth1, oauth2
+
+CONFIG = {
+    "google": {"class_": oauth2.Google, "id": 1},
+    "twitter": {"class_": oauth1.Twitter, "id": 2},
+}
+
+NUMBER = 20000
+
+
+def google_credentials(authomatic):
+    provider = oauth2.Google(authomatic, None, "google")
+    credentials = provider.credentials
+    credentials.token = "ya29." + "a0AfH6SMC" * 20
+    credentials.refresh_token = "1//0g" + "Lx9fG2hK" * 12
+    credentials.token_type = "Bearer"
+    credentials.expire_in = 3599
+    return credentials
+
+
+def twitter_credentials(authomatic):
+    provider = oauth1.Twitter(authomatic, None, "twitter")
+    credentials = provider.credentials
+    credentials.token = "12345678-" + "AbCdEfGh" * 5
+    credentials.token_secret = "ZyXwVuTs" * 5
+    return credentials
+
+
+def bench(label, credentials, authomatic, **kwargs):
+    serialized = credentials.serialize(**kwargs)
+    encode = timeit.timeit(lambda: credentials.serialize(**kwargs), number=NUMBER)
+    decode = timeit.timeit(lambda: authomatic.credentials(serialized), number=NUMBER)
+    print(
+        f"{label:<22} {len(serialized):>6} B"
+        f" {NUMBER / encode:>12,.0f} enc/s {NUMBER / decode:>12,.0f} dec/s"
+    )
+
+
+def main():
+    authomatic = Authomatic(CONFIG, "secret")
+    signed = Authomatic(CONFIG, "secret", credentials_secret="key")
+
+    for name, factory in (
+        ("google", google_credentials),
+        ("twitter", twitter_credentials),
+    ):
+        credentials = factory(authomatic)
+        bench(f"{name} legacy", credentials, authomatic)
+        bench(f"{name} compact", credentials, authomatic, compact=True)
+        bench(f"{name} compact signed", credentials, signed, secret="key")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,377 @@
+"""
+Measures the whole code paths of Authomatic against the local fake provider
+server of :mod:`fake_provider`: both phases of the OAuth 2.0 and OAuth 1.0a
+*login procedure*, protected resource access, credentials refreshment,
+credentials serialization and the session cookie encoding with each adapter.
+
+Run from the repository root with the package importable::
+
+    $ PYTHONPATH=. python tests/benchmarks/bench_flows.py --save before.json
+    $ git checkout my-branch
+    $ PYTHONPATH=. python tests/benchmarks/bench_flows.py --compare before.json
+
+``--save`` records the results as JSON. ``--compare`` prints the change
+against recorded results and exits with status ``1`` if any benchmark got
+slower by more than ``--threshold``. The best of ``--repeat`` runs is
+compared because it is the least affected by noise.
+
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import platform
+import sys
+import timeit
+from urllib.parse import parse_qsl, urlsplit
+
+from fake_provider import FakeProvider
+
+from authomatic import Authomatic, adapters
+from authomatic.codecs import JSONSessionCodec, PickleSessionCodec
+from authomatic.core import Session, User
+
+SECRET = "2c3a3d4f5e6b7a8c9d0e1f2a3b4c5d6e"
+
+
+class Adapter(adapters.BaseAdapter):
+    """
+    The minimal adapter of a custom framework.
+    """
+
+    url = "http://example.com/login"
+
+    def __init__(self, params=None, cookies=None):
+        self._params = params or {}
+        self._cookies = cookies or {}
+        self.headers = {}
+
+    @property
+    def params(self):
+        return self._params
+
+    @property
+    def cookies(self):
+        return self._cookies
+
+    def write(self, value):
+        pass
+
+    def set_header(self, key, value):
+        self.headers[key] = value
+
+    def set_status(self, status):
+        pass
+
+
+# Minimal request and response objects with the interfaces the framework
+# adapters use, so that the adapters can be measured without the frameworks.
+
+
+class _QueryDict(dict):
+    def dict(self):
+        return dict(self)
+
+
+class _DjangoRequest:
+    path = "/login"
+
+    def __init__(self, cookies):
+        self.GET = _QueryDict()
+        self.POST = _QueryDict()
+        self.COOKIES = cookies
+
+    def build_absolute_uri(self, path):
+        return "http://example.com" + path
+
+
+class _DjangoResponse(dict):
+    status_code = 200
+
+    def write(self, value):
+        pass
+
+
+class _WebObRequest:
+    path_url = "http://example.com/login"
+    params = {}
+
+    def __init__(self, cookies):
+        self.cookies = cookies
+
+
+class _Response:
+    status = "200 OK"
+    data = b""
+
+    def __init__(self):
+        self.headers = {}
+
+    def write(self, value):
+        pass
+
+
+class _WerkzeugRequest:
+    base_url = "http://example.com/login"
+    args = {}
+
+    def __init__(self, cookies):
+        self.cookies = cookies
+
+
+ADAPTERS = {
+    "base": Adapter,
+    "django": lambda cookies: adapters.DjangoAdapter(
+        _DjangoRequest(cookies), _DjangoResponse()
+    ),
+    "webob": lambda cookies: adapters.WebObAdapter(
+        _WebObRequest(cookies), _Response()
+    ),
+    "werkzeug": lambda cookies: adapters.WerkzeugAdapter(
+        _WerkzeugRequest(cookies), _Response()
+    ),
+}
+
+CODECS = {"pickle": PickleSessionCodec(), "json": JSONSessionCodec()}
+
+
+def _cookie(adapter):
+    name, _, value = adapter.headers["Set-Cookie"].split(";")[0].partition("=")
+    return {name: value}
+
+
+def _phase_2_adapter(authomatic, provider_name, callback_params):
+    """
+    Runs the phase 1 of a login and returns a factory of adapters of the
+    phase 2 with the session cookie and the callback parameters.
+    """
+
+    adapter = Adapter()
+    authomatic.login(adapter, provider_name)
+    query = dict(parse_qsl(urlsplit(adapter.headers["Location"]).query))
+    params = callback_params(query)
+    cookies = _cookie(adapter)
+    return lambda: Adapter(dict(params), cookies)
+
+
+def login_benchmarks(authomatic):
+    phase_2_oauth2 = _phase_2_adapter(
+        authomatic, "google", lambda q: {"code": "code", "state": q["state"]}
+    )
+    phase_2_oauth1 = _phase_2_adapter(
+        authomatic,
+        "twitter",
+        lambda q: {"oauth_token": q["oauth_token"], "oauth_verifier": "verifier"},
+    )
+
+    def login(adapter, name):
+        result = authomatic.login(adapter, name)
+        assert result is None or result.user, result.error
+
+    return {
+        "login oauth2 phase 1": (lambda: login(Adapter(), "google"), 2000),
+        "login oauth2 phase 2": (lambda: login(phase_2_oauth2(), "google"), 500),
+        "login oauth1 phase 1": (lambda: login(Adapter(), "twitter"), 500),
+        "login oauth1 phase 2": (lambda: login(phase_2_oauth1(), "twitter"), 500),
+    }
+
+
+def _credentials(authomatic, name, **kwargs):
+    provider = authomatic.config[name]["class_"](authomatic, None, name)
+    credentials = provider.credentials
+    for key, value in kwargs.items():
+        setattr(credentials, key, value)
+    return credentials
+
+
+def access_benchmarks(authomatic, base_url):
+    google = _credentials(
+        authomatic,
+        "google",
+        token="ya29.token",
+        refresh_token="1//refresh",
+        expire_in=3600,
+    ).serialize()
+    github = _credentials(authomatic, "github", token="gho_token").serialize()
+    twitter = _credentials(
+        authomatic, "twitter", token="token", token_secret="secret"
+    ).serialize()
+
+    def access(credentials, path):
+        response = authomatic.access(credentials, base_url + path)
+        assert response.status == 200, response.status
+
+    def async_access(credentials, path):
+        async def many():
+            await asyncio.gather(
+                *[authomatic.aaccess(credentials, base_url + path) for _ in range(10)]
+            )
+
+        asyncio.run(many())
+
+    github_provider = authomatic.config["github"]["class_"](authomatic, None, "github")
+    github_provider.credentials.token = "gho_token"
+
+    def update_user():
+        # The user info and the emails are fetched concurrently.
+        github_provider.user = User(
+            github_provider, credentials=github_provider.credentials
+        )
+        assert github_provider.update_user().user.email
+
+    def refresh():
+        response = authomatic.credentials(google).refresh(force=True)
+        assert response.status == 200, response.status
+
+    return {
+        "access oauth2": (lambda: access(google, "/google/userinfo"), 500),
+        "access oauth2 github": (lambda: access(github, "/github/user"), 500),
+        "update user oauth2 github emails": (update_user, 500),
+        "access oauth1": (lambda: access(twitter, "/twitter/user"), 500),
+        "aaccess oauth2 x10": (lambda: async_access(google, "/google/userinfo"), 50),
+        "refresh oauth2": (refresh, 500),
+    }
+
+
+def credentials_benchmarks(authomatic):
+    credentials = _credentials(
+        authomatic,
+        "google",
+        token="ya29." + "a0AfH6SMC" * 20,
+        refresh_token="1//0g" + "Lx9fG2hK" * 12,
+        token_type="Bearer",
+        expire_in=3599,
+    )
+    legacy = credentials.serialize()
+    compact = credentials.serialize(compact=True)
+
+    return {
+        "credentials serialize": (credentials.serialize, 20000),
+        "credentials serialize compact": (lambda: credentials.serialize(True), 20000),
+        "credentials deserialize": (lambda: authomatic.credentials(legacy), 20000),
+        "credentials deserialize compact": (
+            lambda: authomatic.credentials(compact),
+            20000,
+        ),
+    }
+
+
+def session_benchmarks():
+    data = {"authomatic:google:csrf": "5e1c0a7f3b9d4e2a8c6f1b0d9e7a3c5f"}
+    benchmarks = {}
+
+    for codec_name, codec in CODECS.items():
+        cookies = {"authomatic": codec.encode(data, SECRET, "authomatic")}
+        for adapter_name, adapter_class in ADAPTERS.items():
+
+            def request(adapter_class=adapter_class, codec=codec, cookies=cookies):
+                # Decode, modify and encode as in a login callback.
+                session = Session(adapter_class(cookies), SECRET, codec=codec)
+                session.get("authomatic:google:csrf")
+                session["authomatic:google:token_secret"] = "secret"
+                session.save()
+
+            name = f"session {codec_name} {adapter_name}"
+            benchmarks[name] = (request, 20000)
+
+    return benchmarks
+
+
+def run(benchmarks, repeat, scale):
+    """
+    :returns:
+        :class:`dict` of benchmark names to ``{"best": us, "median": us}``.
+
+    """
+
+    results = {}
+    for name, (function, number) in benchmarks.items():
+        number = max(1, int(number * scale))
+        # Warm up the connection pool and caches.
+        function()
+        timings = sorted(
+            duration / number * 1e6
+            for duration in timeit.repeat(function, number=number, repeat=repeat)
+        )
+        results[name] = {"best": timings[0], "median": timings[len(timings) // 2]}
+        print(
+            f"{name:<36} {results[name]['best']:>10.2f} us best"
+            f" {results[name]['median']:>10.2f} us median"
+        )
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Prints the change of the best timings against the :data:`baseline`.
+
+    :returns:
+        Names of the benchmarks which got slower by more than
+        :data:`threshold`.
+
+    """
+
+    regressions = []
+    print()
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            print(f"{name:<36} {'new':>10}")
+            continue
+        change = result["best"] / before["best"] - 1
+        mark = ""
+        if change > threshold:
+            mark = " REGRESSION"
+            regressions.append(name)
+        print(f"{name:<36} {change:>+10.1%}{mark}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("-k", "--filter", default="", help="run only matching names")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--scale", type=float, default=1.0, help="multiplies the iteration counts"
+    )
+    parser.add_argument("--save", metavar="PATH", help="record results as JSON")
+    parser.add_argument("--compare", metavar="PATH", help="compare with results")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    with FakeProvider() as fake:
+        authomatic = Authomatic(fake.config(), SECRET, logging_level=50)
+        benchmarks = {}
+        benchmarks.update(login_benchmarks(authomatic))
+        benchmarks.update(access_benchmarks(authomatic, fake.base_url))
+        benchmarks.update(credentials_benchmarks(authomatic))
+        benchmarks.update(session_benchmarks())
+        benchmarks = {k: v for k, v in benchmarks.items() if args.filter in k}
+
+        results = run(benchmarks, args.repeat, args.scale)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(
+                {
+                    "created": datetime.datetime.now().isoformat(),
+                    "python": sys.version,
+                    "platform": platform.platform(),
+                    "results": results,
+                },
+                f,
+                indent=2,
+                sort_keys=True,
+            )
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""
+Measures the logging overhead of :meth:`.BaseProvider._fetch` per request.
+
+The network is replaced with a canned response, so that only the CPU work
+of preparing the request, logging and wrapping the response is measured.
+The *eager* rows run the same ``_fetch`` but log the eleven messages the
+way it used to, formatting them regardless of the level.
+
+Run from the repository root with the package importable::
+
+    $ PYTHONPATH=. python tests/benchmarks/bench_logging.py
+
+"""
+
+import logging
+import timeit
+import types
+
+from authomatic import Authomatic
+from authomatic.providers import oauth2
+
+NUMBER = 20000
+
+
+class HTTPResponse:
+    msg = None
+    version = 11
+    status = 200
+    reason = "OK"
+
+    def getheader(self, name, default=None):
+        return default
+
+    def getheaders(self):
+        return [("Content-Type", "application/json"), ("Content-Length", "2")]
+
+    def read(self, amt=None):
+        return b"{}"
+
+
+class Pool:
+    def request(self, *args, **kwargs):
+        return HTTPResponse()
+
+
+def make_provider(level):
+    logger = logging.getLogger("bench_logging")
+    logger.handlers = [logging.NullHandler()]
+    logger.propagate = False
+    authomatic = Authomatic(
+        {"google": {"class_": oauth2.Google, "id": 1}},
+        "secret",
+        logger=logger,
+        logging_level=level,
+    )
+    authomatic.connection_pool = Pool()
+    oauth2.Google._logger = logger
+    return oauth2.Google(authomatic, None, "google")
+
+
+def log_eagerly(
+    self,
+    method,
+    url,
+    params,
+    headers,
+    body,
+    certificate_file,
+    ssl_verify,
+    response,
+    started,
+):
+    # What _fetch() logged through _log_param() before it was level-guarded.
+    logger = self._get_logger()
+    for param, value in [
+        ("host", "www.googleapis.com"),
+        ("method", method),
+        ("body", body),
+        ("params", params),
+        ("headers", headers),
+        ("certificate", certificate_file),
+        ("SSL verify", ssl_verify),
+        ("Got response", ""),
+        ("url", url),
+        ("status", response.status),
+        ("headers", response.getheaders()),
+    ]:
+        message = f" ├─ {param}: {value!s}"
+        logger.log(logging.DEBUG, ": ".join(("authomatic", "Google", message)))
+
+
+def main():
+    url = "https://www.googleapis.com/oauth2/v3/userinfo"
+    params = {"alt": "json", "fields": "id,email,name,picture,locale"}
+    headers = {"Authorization": "Bearer " + "t" * 100, "User-Agent": "authomatic"}
+
+    rows = []
+    for name, level in (
+        ("disabled", logging.CRITICAL),
+        ("INFO", logging.INFO),
+        ("DEBUG", logging.DEBUG),
+    ):
+        for prefix, eager in (("", False), ("eager ", True)):
+            provider = make_provider(level)
+            if eager:
+                provider._log_fetch = types.MethodType(log_eagerly, provider)
+            seconds = min(
+                timeit.repeat(
+                    lambda: provider._fetch(
+                        url, params=dict(params), headers=dict(headers)
+                    ),
+                    number=NUMBER,
+                    repeat=5,
+                )
+            )
+            rows.append((f"{prefix}_fetch at {name}", seconds))
+
+    for name, seconds in rows:
+        print(f"{name:26} {seconds / NUMBER * 1e6:8.2f} us per request")
+
+
+if __name__ == "__main__":
+    main()
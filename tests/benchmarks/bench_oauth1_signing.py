@@ -0,0 +1,139 @@
+"""
+Compares the throughput of the original OAuth 1.0a signing pipeline with the
+current one: the parameter normalization, the nonce, the HMAC-SHA1 signature
+with the cached key, HMAC-SHA256 and whole signed request elements.
+
+Run from the repository root with the package importable::
+
+    $ PYTHONPATH=. python tests/benchmarks/bench_oauth1_signing.py
+
+"""
+
+import binascii
+import hashlib
+import hmac
+import timeit
+import uuid
+
+from authomatic import core
+from authomatic.providers import BaseProvider, oauth1
+from authomatic.six.moves import urllib_parse as parse
+
+NUMBER = 20000
+
+URL = "https://api.twitter.com/1.1/statuses/update.json"
+CONSUMER_SECRET = "kAcSOqF21Fu85e7zjz7ZN2U4ZRhfV3WpwPAoE3Z7kBw"
+TOKEN_SECRET = "LswwdoUaIvS8ltyTt5jkRh4J50vUPVVHtR2YPi5kE"
+PARAMS = {
+    "status": "Hello Ladies + Gentlemen, a signed OAuth request!",
+    "include_entities": "true",
+    "oauth_consumer_key": "xvz1evFS4wEEPTGEFPHBog",
+    "oauth_nonce": "kYjzVBB8Y0ZFabxSWbWovY3uYSQ2pTgmZeNu2VS4cg",
+    "oauth_signature_method": "HMAC-SHA1",
+    "oauth_timestamp": "1318622958",
+    "oauth_token": "370773112-GmHxMAgYyLbNEtIKZeRNFsMKPR9EyMZeS9weJAEb",
+    "oauth_version": "1.0",
+}
+
+
+def original_normalize_params(params):
+    if isinstance(params, dict):
+        params = list(params.items())
+    params = sorted(
+        [(k, v) for k, v in params if k not in ("oauth_signature", "realm")]
+    )
+    qs = parse.urlencode(params)
+    qs = qs.replace("+", "%20")
+    qs = qs.replace("%7E", "~")
+    return qs
+
+
+def original_join_by_ampersand(*args):
+    return "&".join([core.escape(i) for i in args])
+
+
+def original_signature(method, base, params, consumer_secret, token_secret=""):
+    base_string = original_join_by_ampersand(
+        method, base, original_normalize_params(params)
+    )
+    key = original_join_by_ampersand(consumer_secret, token_secret or "")
+    hashed = hmac.new(key.encode("latin-1"), base_string.encode("utf-8"), hashlib.sha1)
+    return binascii.b2a_base64(hashed.digest())[:-1]
+
+
+def original_nonce():
+    return BaseProvider.csrf_generator(str(uuid.uuid4()))
+
+
+def credentials():
+    credentials = core.Credentials({}, token="token", token_secret=TOKEN_SECRET)
+    credentials.consumer_key = "xvz1evFS4wEEPTGEFPHBog"
+    credentials.consumer_secret = CONSUMER_SECRET
+    return credentials
+
+
+def bench(label, original, current):
+    before = timeit.timeit(original, number=NUMBER) / NUMBER * 1e6
+    after = timeit.timeit(current, number=NUMBER) / NUMBER * 1e6
+    print(
+        f"{label:<26} {before:>8.2f} us -> {after:>8.2f} us"
+        f" ({before / after:>5.2f}x, {1e6 / after:>9.0f} per second)"
+    )
+
+
+def main():
+    assert original_signature(
+        "POST", URL, PARAMS, CONSUMER_SECRET, TOKEN_SECRET
+    ) == oauth1.HMACSHA1SignatureGenerator.create_signature(
+        "POST", URL, PARAMS, CONSUMER_SECRET, TOKEN_SECRET
+    )
+
+    bench(
+        "normalize params",
+        lambda: original_normalize_params(PARAMS),
+        lambda: oauth1._normalize_params(PARAMS),
+    )
+    bench("nonce", original_nonce, oauth1._create_nonce)
+    bench(
+        "HMAC-SHA1 signature",
+        lambda: original_signature("POST", URL, PARAMS, CONSUMER_SECRET, TOKEN_SECRET),
+        lambda: oauth1.HMACSHA1SignatureGenerator.create_signature(
+            "POST", URL, PARAMS, CONSUMER_SECRET, TOKEN_SECRET
+        ),
+    )
+    bench(
+        "HMAC-SHA256 signature",
+        lambda: original_signature("POST", URL, PARAMS, CONSUMER_SECRET, TOKEN_SECRET),
+        lambda: oauth1.HMACSHA256SignatureGenerator.create_signature(
+            "POST", URL, PARAMS, CONSUMER_SECRET, TOKEN_SECRET
+        ),
+    )
+
+    class Original(oauth1.Twitter):
+        class _signature_generator:
+            method = "HMAC-SHA1"
+            create_signature = staticmethod(original_signature)
+
+    creds = credentials()
+    original_create_nonce = oauth1._create_nonce
+
+    def original_request_elements():
+        oauth1._create_nonce = original_nonce
+        try:
+            Original.create_request_elements(
+                Original.PROTECTED_RESOURCE_REQUEST_TYPE, creds, URL, dict(PARAMS)
+            )
+        finally:
+            oauth1._create_nonce = original_create_nonce
+
+    bench(
+        "signed request elements",
+        original_request_elements,
+        lambda: oauth1.Twitter.create_request_elements(
+            oauth1.Twitter.PROTECTED_RESOURCE_REQUEST_TYPE, creds, URL, dict(PARAMS)
+        ),
+    )
+
+
+if __name__ == "__main__":
+    main()
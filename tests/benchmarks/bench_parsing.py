@@ -0,0 +1,108 @@
+"""
+Compares the parsing of typical provider responses by the original binary
+check, decoding and JSON, XML, query string trial chain with
+:func:`.json_qs_parser` with and without the ``Content-Type`` and with the
+*orjson* backend if installed.
+
+Run from the repository root with the package importable::
+
+    $ PYTHONPATH=. python tests/benchmarks/bench_parsing.py
+
+"""
+
+import json
+import timeit
+from xml.etree import ElementTree
+
+from authomatic import core
+from authomatic.six.moves import urllib_parse as parse
+
+NUMBER = 5000
+
+USER = {
+    "id": "1234567890",
+    "name": "Joe Doe",
+    "email": "joe@example.com",
+    "picture": "https://example.com/" + "p" * 80,
+    "locale": "en",
+    "verified_email": True,
+}
+
+#: name -> (body, Content-Type)
+BODIES = {
+    "json user": (json.dumps(USER).encode(), "application/json; charset=utf-8"),
+    "json list": (
+        json.dumps([USER] * 50).encode(),
+        "application/json; charset=utf-8",
+    ),
+    "query string token": (
+        b"oauth_token=abc123&oauth_token_secret=def456&user_id=42",
+        "application/x-www-form-urlencoded",
+    ),
+    "xml": (
+        b"<user>"
+        + b"".join(b"<%s>v</%s>" % (k.encode(), k.encode()) for k in USER)
+        + b"</user>",
+        "text/xml",
+    ),
+}
+
+
+TEXT_CHARS = bytearray([7, 8, 9, 10, 12, 13, 27]) + bytearray(range(0x20, 0x100))
+
+
+def trial_chain(body):
+    """
+    The original Response.data of a fresh response.
+    """
+
+    if not body.translate(None, TEXT_CHARS):
+        body = body.decode("utf-8")
+    try:
+        return json.loads(body)
+    except (OverflowError, TypeError, ValueError):
+        pass
+    try:
+        return ElementTree.fromstring(body)
+    except (ElementTree.ParseError, TypeError, ValueError):
+        pass
+    return dict(parse.parse_qsl(body))
+
+
+def best(func):
+    return min(timeit.repeat(func, number=NUMBER, repeat=5))
+
+
+def main():
+    backends = ["json"]
+    try:
+        import orjson  # noqa: F401
+
+        backends.append("orjson")
+    except ImportError:
+        pass
+
+    print(
+        f"{'':20} {'trial chain':>12} {'sniffing':>12} {'content type':>12}"
+        + "".join(f" {b + ' backend':>15}" for b in backends[1:])
+    )
+    for name, (body, content_type) in BODIES.items():
+        times = [
+            best(lambda: trial_chain(body)),
+            best(lambda: core.json_qs_parser(body)),
+            best(lambda: core.json_qs_parser(body, content_type)),
+        ]
+        for backend in backends[1:]:
+            core.set_json_backend(backend)
+            times.append(best(lambda: core.json_qs_parser(body, content_type)))
+            core.set_json_backend()
+
+        print(
+            f"{name:20}"
+            + "".join(f" {t / NUMBER * 1e6:10.2f}us" for t in times[:3])
+            + "".join(f" {t / NUMBER * 1e6:13.2f}us" for t in times[3:])
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Compares the cookie size and the encode/decode time of the session codecs.
+
+Run from the repository root with the package importable::
+
+    $ PYTHONPATH=. python tests/benchmarks/bench_session.py
+
+"""
+
+import timeit
+
+from authomatic.adapters import BaseAdapter
+from authomatic.codecs import JSONSessionCodec, PickleSessionCodec
+from authomatic.core import Session
+
+NUMBER = 20000
+
+#: Typical session data during the login procedure.
+SESSIONS = {
+    "oauth2 csrf": {"authomatic:google:csrf": "5e1c0a7f3b9d4e2a8c6f1b0d9e7a3c5f"},
+    "oauth1 secret": {
+        "authomatic:twitter:token_secret": "vT3kQ9zR1mXw8LpN2bYc4HdF6gJs0uAe",
+    },
+    "many providers": {
+        f"authomatic:provider{i}:csrf": "5e1c0a7f3b9d4e2a8c6f1b0d9e7a3c5f"
+        for i in range(10)
+    },
+}
+
+CODECS = {
+    "pickle": PickleSessionCodec(),
+    "json": JSONSessionCodec(None),
+    "json+zlib": JSONSessionCodec(),
+}
+
+
+class Adapter(BaseAdapter):
+    url = "http://example.com/login"
+    params = {}
+
+    def __init__(self, cookies):
+        self._cookies = cookies
+
+    @property
+    def cookies(self):
+        return self._cookies
+
+    def write(self, value):
+        pass
+
+    def set_header(self, key, value):
+        pass
+
+    def set_status(self, status):
+        pass
+
+
+def bench_request(label, cookies):
+    """
+    Ten reads and a save of an unmodified session as in a login callback.
+    """
+
+    def request():
+        session = Session(Adapter(cookies), "secret")
+        for _ in range(10):
+            session.get("authomatic:google:csrf")
+        session.save()
+        return session
+
+    session = request()
+    duration = timeit.timeit(request, number=NUMBER)
+    print(
+        f"{label:<26} {duration / NUMBER * 1e6:>8.2f} us/request"
+        f" decodes={session.decode_count} encodes={session.encode_count}"
+    )
+
+
+def main():
+    for label, data in SESSIONS.items():
+        for name, codec in CODECS.items():
+            value = codec.encode(data, "secret", "authomatic")
+            encode = timeit.timeit(
+                lambda: codec.encode(data, "secret", "authomatic"), number=NUMBER
+            )
+            decode = timeit.timeit(
+                lambda: codec.decode(value, "secret", "authomatic", 600),
+                number=NUMBER,
+            )
+            print(
+                f"{label:<15} {name:<10} {len(value):>6} B"
+                f" {encode / NUMBER * 1e6:>8.2f} us enc"
+                f" {decode / NUMBER * 1e6:>8.2f} us dec"
+            )
+
+    print()
+    cookie = PickleSessionCodec().encode(
+        SESSIONS["oauth2 csrf"], "secret", "authomatic"
+    )
+    bench_request("empty session", {})
+    bench_request("unmodified session", {"authomatic": cookie})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Compares the peak memory of reading a large response with
+:attr:`.Response.content` and with :meth:`.Response.iter_content`.
+
+Run from the repository root with the package importable::
+
+    $ PYTHONPATH=. python tests/benchmarks/bench_streaming.py
+
+"""
+
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from authomatic.core import Response
+from authomatic.transport import ConnectionPool
+
+SIZE = 32 * 1024 * 1024
+CHUNK = b"\x00" * 65536
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(SIZE))
+        self.end_headers()
+        for _ in range(SIZE // len(CHUNK)):
+            self.wfile.write(CHUNK)
+
+    def log_message(self, *args):
+        pass
+
+
+def measure(port, stream):
+    pool = ConnectionPool()
+    tracemalloc.start()
+    start = time.perf_counter()
+    response = Response(
+        pool.request("http", "127.0.0.1", port, "GET", "/", stream=stream)
+    )
+    if stream:
+        size = sum(len(chunk) for chunk in response.iter_content())
+    else:
+        size = len(response.content)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert size == SIZE
+    return elapsed, peak
+
+
+def main():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    port = httpd.server_address[1]
+
+    print(f"{SIZE // 2 ** 20} MiB response")
+    for name, stream in (("content", False), ("iter_content", True)):
+        elapsed, peak = measure(port, stream)
+        print(f"{name:14} {elapsed * 1000:8.1f} ms  peak {peak / 2 ** 20:8.2f} MiB")
+
+    httpd.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+"""
+A local HTTP server emulating the endpoints of OAuth 1.0a and OAuth 2.0
+providers for the benchmarks.
+
+The payloads are shaped like the responses of Google, GitHub and Twitter
+whose keys are listed in ``tests/functional_tests/expected_values``, so that
+the real provider classes parse them. :meth:`.FakeProvider.config` returns a
+config with subclasses of these providers pointed to the server::
+
+    with FakeProvider() as fake:
+        authomatic = Authomatic(fake.config(), "secret")
+
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from authomatic.providers import oauth1, oauth2
+from authomatic.six.moves import urllib_parse as parse
+
+# The credentials resolve the provider type of the fake providers e.g.
+# "fake_provider.Google" by the name of their base class in this module.
+from authomatic.providers.oauth1 import Twitter  # noqa: F401
+from authomatic.providers.oauth2 import GitHub, Google  # noqa: F401
+
+#: The provider classes created by FakeProvider.provider_class(). Their
+#: type_id is the index in this list.
+PROVIDER_ID_MAP = []
+
+TOKEN = {
+    "access_token": "ya29." + "a0AfH6SMC" * 20,
+    "refresh_token": "1//0g" + "Lx9fG2hK" * 12,
+    "expires_in": 3599,
+    "token_type": "Bearer",
+    "scope": "openid email profile",
+}
+
+GOOGLE_USER = {
+    "sub": "110169484474386276334",
+    "name": "Joe Doe",
+    "given_name": "Joe",
+    "family_name": "Doe",
+    "picture": "https://lh3.googleusercontent.com/a/" + "AATXAJw" * 8,
+    "email": "joe.doe@example.com",
+    "email_verified": True,
+    "locale": "en",
+    "hd": "example.com",
+}
+
+GITHUB_USER = {
+    "login": "joedoe",
+    "id": 1234567,
+    "node_id": "MDQ6VXNlcjEyMzQ1Njc=",
+    "avatar_url": "https://avatars.githubusercontent.com/u/1234567?v=4",
+    "gravatar_id": "",
+    "url": "https://api.github.com/users/joedoe",
+    "html_url": "https://github.com/joedoe",
+    "followers_url": "https://api.github.com/users/joedoe/followers",
+    "following_url": "https://api.github.com/users/joedoe/following{/other_user}",
+    "gists_url": "https://api.github.com/users/joedoe/gists{/gist_id}",
+    "starred_url": "https://api.github.com/users/joedoe/starred{/owner}{/repo}",
+    "subscriptions_url": "https://api.github.com/users/joedoe/subscriptions",
+    "organizations_url": "https://api.github.com/users/joedoe/orgs",
+    "repos_url": "https://api.github.com/users/joedoe/repos",
+    "events_url": "https://api.github.com/users/joedoe/events{/privacy}",
+    "received_events_url": "https://api.github.com/users/joedoe/received_events",
+    "type": "User",
+    "site_admin": False,
+    "name": "Joe Doe",
+    "company": "Example Inc.",
+    "blog": "https://example.com",
+    "location": "Bratislava, Slovakia",
+    "email": None,
+    "hireable": None,
+    "bio": "Lorem ipsum dolor sit amet.",
+    "public_repos": 42,
+    "public_gists": 3,
+    "followers": 10,
+    "following": 5,
+    "created_at": "2012-01-01T00:00:00Z",
+    "updated_at": "2024-01-01T00:00:00Z",
+}
+
+GITHUB_EMAILS = [
+    {
+        "email": "joe.doe@example.com",
+        "primary": True,
+        "verified": True,
+        "visibility": "public",
+    },
+    {
+        "email": "joedoe@users.noreply.github.com",
+        "primary": False,
+        "verified": True,
+        "visibility": None,
+    },
+]
+
+TWITTER_USER = {
+    "id": 123456789,
+    "id_str": "123456789",
+    "name": "Joe Doe",
+    "screen_name": "joedoe",
+    "location": "Bratislava, Slovakia",
+    "description": "Lorem ipsum dolor sit amet.",
+    "url": "https://t.co/abcdefghij",
+    "entities": {"url": {"urls": []}, "description": {"urls": []}},
+    "protected": False,
+    "followers_count": 10,
+    "friends_count": 5,
+    "listed_count": 0,
+    "created_at": "Sun Jan 01 00:00:00 +0000 2012",
+    "favourites_count": 7,
+    "utc_offset": None,
+    "time_zone": None,
+    "geo_enabled": False,
+    "verified": False,
+    "statuses_count": 100,
+    "lang": "en",
+    "contributors_enabled": False,
+    "is_translator": False,
+    "is_translation_enabled": False,
+    "profile_background_color": "C0DEED",
+    "profile_background_image_url": "http://abs.twimg.com/images/bg.png",
+    "profile_background_image_url_https": "https://abs.twimg.com/images/bg.png",
+    "profile_background_tile": False,
+    "profile_image_url": "http://pbs.twimg.com/profile_images/1/joe.png",
+    "profile_image_url_https": "https://pbs.twimg.com/profile_images/1/joe.png",
+    "profile_link_color": "1DA1F2",
+    "profile_sidebar_border_color": "C0DEED",
+    "profile_sidebar_fill_color": "DDEEF6",
+    "profile_text_color": "333333",
+    "profile_use_background_image": True,
+    "default_profile": True,
+    "default_profile_image": False,
+    "following": False,
+    "follow_request_sent": False,
+    "notifications": False,
+    "translator_type": "none",
+    "needs_phone_verification": False,
+}
+
+REQUEST_TOKEN = {
+    "oauth_token": "NPcudxy0yU5T3tBzho7iCotZ3cnetKwcTIRlX0iwRl0",
+    "oauth_token_secret": "veNRnAWe6inFuo8o2u8SLLZLjolYDmDP7SzL0YfYI",
+    "oauth_callback_confirmed": "true",
+}
+
+ACCESS_TOKEN = {
+    "oauth_token": "7588892-kagSNqWge8gB1WwE3plnFsJHAZVfxWD7Vb57p0b4",
+    "oauth_token_secret": "PbKfYqSryyeKDWz4ebtY3o5ogNLG11WJuZBc9fQrQo",
+    "user_id": "123456789",
+    "screen_name": "joedoe",
+}
+
+
+class Handler(BaseHTTPRequestHandler):
+    """
+    Serves the fake provider endpoints over keep-alive connections.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    # Headers and body are written separately, Nagle's algorithm would delay
+    # the body until the client acknowledges the headers.
+    disable_nagle_algorithm = True
+
+    def _respond(self, status, body=b"", content_type=None, headers=()):
+        self.send_response(status)
+        if content_type:
+            self.send_header("Content-Type", content_type)
+        for key, value in headers:
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json(self, data):
+        self._respond(200, json.dumps(data).encode(), "application/json")
+
+    def _query_string(self, data):
+        self._respond(
+            200, parse.urlencode(data).encode(), "application/x-www-form-urlencoded"
+        )
+
+    def _redirect(self, url, params):
+        separator = "&" if "?" in url else "?"
+        location = url + separator + parse.urlencode(params)
+        self._respond(302, headers=[("Location", location)])
+
+    def do_GET(self):
+        path, _, query = self.path.partition("?")
+        params = dict(parse.parse_qsl(query))
+
+        if path == "/oauth2/authorize":
+            self._redirect(
+                params["redirect_uri"],
+                {"code": "4/P7q7W91a-oMsCeLvIaQm6bTrgtp7", "state": params["state"]},
+            )
+        elif path == "/oauth1/authorize":
+            self._redirect(
+                params.get("oauth_callback", "http://localhost/"),
+                {"oauth_token": params["oauth_token"], "oauth_verifier": "verifier"},
+            )
+        elif path == "/oauth2/token":
+            self._json(TOKEN)
+        elif path == "/oauth1/request_token":
+            self._query_string(REQUEST_TOKEN)
+        elif path == "/oauth1/access_token":
+            self._query_string(ACCESS_TOKEN)
+        elif path == "/google/userinfo":
+            self._json(GOOGLE_USER)
+        elif path == "/github/user":
+            self._json(GITHUB_USER)
+        elif path == "/github/user/emails":
+            self._json(GITHUB_EMAILS)
+        elif path == "/twitter/user":
+            self._json(TWITTER_USER)
+        else:
+            self._respond(404)
+
+    def do_POST(self):
+        # The token endpoints answer the same to GET and POST.
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self.do_GET()
+
+    def log_message(self, *args):
+        pass
+
+
+class Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 drops concurrent connections of the async
+    # benchmarks which then wait a second for the SYN retransmission.
+    request_queue_size = 128
+
+
+class FakeProvider:
+    """
+    Runs the :class:`.Handler` in a background thread.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self.server = Server((host, port), Handler)
+        self.base_url = "http://{0}:{1}".format(*self.server.server_address)
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def provider_class(self, base, user_info_path, oauth1_=False):
+        """
+        Returns a subclass of the :data:`base` provider using the fake
+        endpoints.
+        """
+
+        attributes = {
+            "user_authorization_url": self.base_url
+            + ("/oauth1/authorize" if oauth1_ else "/oauth2/authorize"),
+            "access_token_url": self.base_url
+            + ("/oauth1/access_token" if oauth1_ else "/oauth2/token"),
+            "user_info_url": self.base_url + user_info_path,
+        }
+        if oauth1_:
+            attributes["request_token_url"] = self.base_url + "/oauth1/request_token"
+        cls = type("Fake" + base.__name__, (base,), attributes)
+        PROVIDER_ID_MAP.append(cls)
+        return cls
+
+    def config(self):
+        """
+        Returns a config with the ``google``, ``github`` and ``twitter`` fake
+        providers.
+        """
+
+        return {
+            "google": {
+                "class_": self.provider_class(oauth2.Google, "/google/userinfo"),
+                "id": 1,
+                "consumer_key": "123456789.apps.googleusercontent.com",
+                "consumer_secret": "GOCSPX-" + "a" * 28,
+                "scope": oauth2.Google.user_info_scope,
+            },
+            "github": {
+                "class_": self.provider_class(oauth2.GitHub, "/github/user"),
+                "id": 2,
+                "consumer_key": "Iv1.0123456789abcdef",
+                "consumer_secret": "f" * 40,
+                "scope": oauth2.GitHub.user_info_scope,
+            },
+            "twitter": {
+                "class_": self.provider_class(
+                    oauth1.Twitter, "/twitter/user", oauth1_=True
+                ),
+                "id": 3,
+                "consumer_key": "xvz1evFS4wEEPTGEFPHBog",
+                "consumer_secret": "kAcSOqF21Fu85e7zjz7ZN2U4ZRhfV3WpwPAoE3Z7kBw",
+            },
+        }
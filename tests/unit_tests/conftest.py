@@ -0,0 +1,44 @@
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from authomatic.providers import oauth2
+
+
+@pytest.fixture
+def start_server():
+    """
+    Starts local servers with the given handler classes. The servers have
+    an ``url`` attribute and are shut down after the test.
+    """
+
+    servers = []
+
+    def start(handler):
+        httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        httpd.url = "http://127.0.0.1:{0}".format(httpd.server_address[1])
+        servers.append(httpd)
+        return httpd
+
+    yield start
+
+    for httpd in servers:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+@pytest.fixture
+def start_amazon_server(start_server, monkeypatch):
+    """
+    Same as :func:`start_server` but points the access token URL of
+    :class:`.oauth2.Amazon` to the ``/token`` path of the server.
+    """
+
+    def start(handler):
+        httpd = start_server(handler)
+        monkeypatch.setattr(oauth2.Amazon, "access_token_url", httpd.url + "/token")
+        return httpd
+
+    return start
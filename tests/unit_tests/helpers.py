@@ -0,0 +1,61 @@
+import json
+from http.server import BaseHTTPRequestHandler
+
+from authomatic.adapters import BaseAdapter
+
+
+class BaseHandler(BaseHTTPRequestHandler):
+    """
+    Base of the request handlers of the local test servers.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def read_body(self):
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def respond(self, data, status=200, headers=(), content_type="application/json"):
+        body = data if isinstance(data, bytes) else json.dumps(data).encode()
+        self.send_response(status)
+        for header in headers:
+            self.send_header(*header)
+        if content_type:
+            self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class Adapter(BaseAdapter):
+    """
+    Records what the provider writes to the response.
+    """
+
+    url = "http://example.com/login"
+
+    def __init__(self, params=None, cookies=None):
+        self._params = params or {}
+        self._cookies = cookies or {}
+        self.headers = {}
+        self.written = []
+        self.status = None
+
+    @property
+    def params(self):
+        return self._params
+
+    @property
+    def cookies(self):
+        return self._cookies
+
+    def write(self, value):
+        self.written.append(value)
+
+    def set_header(self, key, value):
+        self.headers[key] = value
+
+    def set_status(self, status):
+        self.status = status
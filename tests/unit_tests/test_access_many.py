@@ -0,0 +1,122 @@
+import pytest
+
+from authomatic import Authomatic
+from authomatic.providers import oauth2
+
+from tests.unit_tests.helpers import BaseHandler
+
+
+class Handler(BaseHandler):
+    def do_GET(self):
+        self.respond(
+            {
+                "path": self.path,
+                "authorization": self.headers.get("Authorization"),
+                "client_port": self.client_address[1],
+            }
+        )
+
+
+@pytest.fixture
+def base_url(start_server):
+    return start_server(Handler).url
+
+
+@pytest.fixture
+def authomatic():
+    return Authomatic({"amazon": {"class_": oauth2.Amazon, "id": 1}}, "secret")
+
+
+def serialized_credentials(authomatic, token):
+    provider = oauth2.Amazon(authomatic, None, "amazon")
+    provider.credentials.token = token
+    provider.credentials.token_type = "Bearer"
+    return provider.credentials.serialize()
+
+
+def test_all_results_are_yielded(authomatic, base_url):
+    credentials = serialized_credentials(authomatic, "token")
+    requests = [(credentials, f"{base_url}/{i}") for i in range(30)]
+    requests.append({"credentials": credentials, "url": base_url, "params": {"a": 1}})
+
+    results = list(authomatic.access_many(requests, concurrency=4))
+
+    assert sorted(r.index for r in results) == list(range(31))
+    for result in results:
+        assert result.error is None
+        assert result.response.data["authorization"] == "Bearer token"
+    ports = {r.response.data["client_port"] for r in results}
+    assert len(ports) <= 4
+
+
+def test_errors_are_reported_per_item(authomatic, base_url):
+    credentials = serialized_credentials(authomatic, "token")
+    requests = [
+        ("not credentials", base_url),
+        (credentials, "http://127.0.0.1:1/unreachable"),
+        (credentials, base_url),
+    ]
+
+    results = {r.index: r for r in authomatic.access_many(requests)}
+
+    assert results[0].error is not None
+    assert results[1].error is not None
+    assert results[2].response.status == 200
+
+
+def test_credentials_are_deserialized_once(authomatic, base_url, monkeypatch):
+    credentials = serialized_credentials(authomatic, "token")
+    calls = []
+    original = Authomatic._access_credentials
+
+    def access_credentials(self, credentials):
+        calls.append(credentials)
+        return original(self, credentials)
+
+    monkeypatch.setattr(Authomatic, "_access_credentials", access_credentials)
+
+    list(authomatic.access_many([(credentials, base_url)] * 10))
+
+    assert [c for c in calls if isinstance(c, str)] == [credentials]
+
+
+def test_requests_are_consumed_lazily(authomatic, base_url):
+    credentials = serialized_credentials(authomatic, "token")
+    consumed = []
+
+    def requests():
+        for i in range(100):
+            consumed.append(i)
+            yield credentials, f"{base_url}/{i}"
+
+    results = authomatic.access_many(requests(), concurrency=2)
+    next(results)
+
+    assert len(consumed) <= 5
+    assert len(list(results)) == 99
+
+
+def test_runs_in_executor(authomatic, base_url, monkeypatch):
+    credentials = serialized_credentials(authomatic, "token")
+    submitted = []
+    submit_raw = authomatic.executor.submit_raw
+
+    def submit(func, *args, **kwargs):
+        submitted.append(func)
+        return submit_raw(func, *args, **kwargs)
+
+    monkeypatch.setattr(authomatic.executor, "submit_raw", submit)
+    original = Authomatic._access_provider
+    created = []
+
+    def access_provider(self, credentials):
+        created.append(original(self, credentials))
+        return created[-1]
+
+    monkeypatch.setattr(Authomatic, "_access_provider", access_provider)
+
+    list(authomatic.access_many([(credentials, base_url)] * 5))
+
+    assert len(submitted) == 5
+    # Each request has its own provider.
+    assert len({id(provider) for provider in created}) == 5
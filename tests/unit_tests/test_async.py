@@ -0,0 +1,199 @@
+import asyncio
+import threading
+from urllib.parse import parse_qsl, urlsplit
+
+import pytest
+
+from authomatic import Authomatic, core
+from authomatic.exceptions import FetchError
+from authomatic.providers import oauth2
+from authomatic.transport import AsyncioTransport
+
+from tests.unit_tests.helpers import Adapter, BaseHandler
+
+
+class Handler(BaseHandler):
+    def do_GET(self):
+        path = self.path.partition("?")[0]
+        self.server.paths.append(path)
+        if self.path != "/chunked":
+            self.respond({"path": path})
+            return
+        chunks = [b'{"path": ', b'"%s"}' % path.encode()]
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for chunk in chunks:
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+        self.wfile.write(b"0\r\n\r\n")
+
+    def do_POST(self):
+        body = self.read_body()
+        if self.path != "/token":
+            self.respond(body, 201)
+            return
+        data = {
+            "access_token": "token-{0}".format(len(self.server.paths)),
+            "refresh_token": "refresh",
+            "expires_in": 3600,
+            "token_type": "Bearer",
+        }
+        self.server.paths.append(self.path)
+        self.respond(data)
+
+
+@pytest.fixture
+def server(start_amazon_server, monkeypatch):
+    httpd = start_amazon_server(Handler)
+    httpd.paths = []
+    monkeypatch.setattr(oauth2.Amazon, "user_info_url", httpd.url + "/user")
+    return httpd
+
+
+def request(server, method, path, body=None):
+    return asyncio.run(
+        AsyncioTransport(timeout=5).request(
+            "http", "127.0.0.1", server.server_address[1], method, path, body, {}
+        )
+    )
+
+
+@pytest.mark.parametrize("path", ["/plain", "/chunked"])
+def test_response_body_is_read(server, path):
+    response = request(server, "GET", path)
+
+    assert response.status == 200
+    assert response.getheader("Content-Type") == "application/json"
+    assert response.read() == b'{"path": "%s"}' % path.encode()
+
+
+def test_request_body_is_sent(server):
+    response = request(server, "POST", "/", "a=1&b=2")
+
+    assert response.status == 201
+    assert response.read() == b"a=1&b=2"
+
+
+@pytest.fixture
+def authomatic():
+    config = {
+        "amazon": {
+            "class_": oauth2.Amazon,
+            "id": 1,
+            "consumer_key": "key",
+            "consumer_secret": "secret",
+            "signed_state": True,
+        }
+    }
+    return Authomatic(config, "secret")
+
+
+def credentials(authomatic):
+    provider = oauth2.Amazon(authomatic, None, "amazon")
+    provider.credentials.token = "token"
+    provider.credentials.refresh_token = "refresh"
+    provider.credentials.expire_in = 60
+    return provider.credentials
+
+
+async def alogin(authomatic):
+    adapter = Adapter()
+    assert await authomatic.alogin(adapter, "amazon") is None
+    query = dict(parse_qsl(urlsplit(adapter.headers["Location"]).query))
+
+    adapter = Adapter({"code": "code", "state": query["state"]})
+    return await authomatic.alogin(adapter, "amazon")
+
+
+def test_alogin(server, authomatic):
+    result = asyncio.run(alogin(authomatic))
+
+    assert result.error is None
+    assert result.user.credentials.token == "token-0"
+    assert server.paths == ["/token"]
+
+
+def test_aaccess(server, authomatic):
+    url = server.url + "/"
+    response = asyncio.run(authomatic.aaccess(credentials(authomatic), url))
+
+    assert response.status == 200
+    assert response.data == {"path": "/"}
+
+
+def test_aupdate_user(server, authomatic):
+    user = asyncio.run(alogin(authomatic)).user
+    user.data = None
+
+    response = asyncio.run(user.aupdate())
+
+    assert response.user is user
+    assert user.data == {"path": "/user"}
+
+
+def test_arefresh(server, authomatic):
+    credentials_ = authomatic.credentials(credentials(authomatic).serialize())
+
+    response = asyncio.run(credentials_.arefresh(force=True))
+
+    assert response.status == 200
+    assert credentials_.token == "token-0"
+    assert server.paths == ["/token"]
+
+
+def test_arun_drives_flows(server, authomatic):
+    provider = oauth2.Amazon(authomatic, None, "amazon")
+
+    def fetch(path):
+        response = yield provider._fetch_step(server.url + path)
+        return response.data["path"]
+
+    def flow():
+        paths = yield provider._concurrent_step(fetch("/a"), fetch("/b"))
+        try:
+            yield provider._fetch_step("http://127.0.0.1:1/")
+        except FetchError:
+            paths.append("error")
+        return paths
+
+    assert asyncio.run(provider._arun(flow())) == ["/a", "/b", "error"]
+    assert provider._run(flow()) == ["/a", "/b", "error"]
+
+
+def test_access_override(server, authomatic, monkeypatch):
+    threads = []
+
+    def access(self, url, **kwargs):
+        threads.append(threading.current_thread())
+        return oauth2.OAuth2.access(self, url + "/legacy", **kwargs)
+
+    monkeypatch.setattr(oauth2.Amazon, "access", access)
+    provider = oauth2.Amazon(authomatic, None, "amazon")
+    provider.credentials.token = "token"
+    provider.user = core.User(provider, credentials=provider.credentials)
+
+    assert provider.update_user().user.data == {"path": "/user/legacy"}
+    assert threads == [threading.current_thread()]
+
+    response = asyncio.run(provider.aaccess(server.url))
+
+    assert response.data == {"path": "/legacy"}
+    assert threads[-1] is not threading.current_thread()
+
+    user = asyncio.run(provider.aupdate_user()).user
+
+    assert user.data == {"path": "/user/legacy"}
+    assert len(threads) == 3
+
+
+def test_access_user_info_override(server, authomatic, monkeypatch):
+    def _access_user_info(self):
+        return self.access(server.url + "/legacy")
+
+    monkeypatch.setattr(oauth2.Amazon, "_access_user_info", _access_user_info)
+    provider = oauth2.Amazon(authomatic, None, "amazon")
+    provider.credentials.token = "token"
+
+    assert provider.update_user().user.data == {"path": "/legacy"}
+    assert asyncio.run(provider.aupdate_user()).user.data == {"path": "/legacy"}
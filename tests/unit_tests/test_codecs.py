@@ -0,0 +1,114 @@
+from urllib import parse
+
+import pytest
+
+from authomatic import Authomatic, codecs
+from authomatic.core import Credentials
+from authomatic.exceptions import CredentialsError
+from authomatic.providers import oauth1, oauth2
+
+CONFIG = {
+    "google": {"class_": oauth2.Google, "id": 300},
+    "twitter": {"class_": oauth1.Twitter, "id": 2},
+}
+
+
+@pytest.fixture
+def authomatic():
+    return Authomatic(CONFIG, "secret")
+
+
+def oauth2_credentials(authomatic):
+    provider = oauth2.Google(authomatic, None, "google")
+    credentials = provider.credentials
+    credentials.token = "ya29.token-ünicode"
+    credentials.refresh_token = "1/refresh"
+    credentials.token_type = "Bearer"
+    credentials.expiration_time = 1700000000
+    return credentials
+
+
+@pytest.mark.parametrize("value", [0, 1, 127, 128, 300, 2**40])
+def test_varint_roundtrip(value):
+    encoded = codecs.encode_varint(value)
+
+    assert codecs.decode_varint(encoded + b"tail") == (value, len(encoded))
+
+
+def test_items_roundtrip():
+    items = ("text~", "", None, 0, -5, 2**33)
+    encoded = codecs.encode_credentials(7, "2-19", items)
+
+    assert codecs.is_compact(encoded)
+    assert codecs.decode_credentials(encoded) == (7, "2-19", list(items))
+
+
+def test_oauth2_credentials_roundtrip(authomatic):
+    credentials = oauth2_credentials(authomatic)
+    legacy = credentials.serialize()
+    compact = credentials.serialize(compact=True)
+
+    assert len(compact) < len(legacy)
+    # Safe to put to an URL as is.
+    assert parse.quote(compact, safe="%~") == compact
+
+    restored = authomatic.credentials(compact)
+    assert restored.provider_name == "google"
+    assert restored.provider_type_id == credentials.provider_type_id
+    assert restored.token == credentials.token
+    assert restored.refresh_token == credentials.refresh_token
+    assert restored.token_type == "Bearer"
+    assert restored.expiration_time == 1700000000
+    assert restored.serialize() == legacy
+
+
+def test_oauth1_credentials_roundtrip(authomatic):
+    provider = oauth1.Twitter(authomatic, None, "twitter")
+    provider.credentials.token = "token"
+    provider.credentials.token_secret = "token secret"
+
+    restored = authomatic.credentials(provider.credentials.serialize(compact=True))
+
+    assert restored.token == "token"
+    assert restored.token_secret == "token secret"
+
+
+def test_signed_credentials(authomatic):
+    credentials = oauth2_credentials(authomatic)
+    signed = credentials.serialize(secret="key")
+
+    restored = Credentials.deserialize(CONFIG, signed, secret="key")
+    assert restored.token == credentials.token
+
+    # Signature is not verified without a secret.
+    assert Credentials.deserialize(CONFIG, signed).token == credentials.token
+
+    with pytest.raises(CredentialsError, match="mismatch"):
+        Credentials.deserialize(CONFIG, signed, secret="other")
+
+    tampered = codecs.encode_credentials(300, "2-1", ("stolen",), "attacker")
+    with pytest.raises(CredentialsError):
+        Credentials.deserialize(CONFIG, tampered, secret="key")
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_unsigned_credentials_are_rejected_with_secret(authomatic, compact):
+    serialized = oauth2_credentials(authomatic).serialize(compact=compact)
+
+    with pytest.raises(CredentialsError, match="not signed"):
+        Credentials.deserialize(CONFIG, serialized, secret="key")
+
+
+def test_authomatic_credentials_secret():
+    authomatic = Authomatic(CONFIG, "secret", credentials_secret="key")
+    credentials = oauth2_credentials(authomatic)
+
+    assert authomatic.credentials(credentials.serialize(secret="key")).token
+    with pytest.raises(CredentialsError):
+        authomatic.credentials(credentials.serialize())
+
+
+@pytest.mark.parametrize("serialized", ["~", "~AQ", "~AQAB", "~!!!", "~AgA"])
+def test_malformed_credentials(serialized):
+    with pytest.raises(CredentialsError):
+        Credentials.deserialize(CONFIG, serialized)
@@ -0,0 +1,77 @@
+import threading
+
+import pytest
+
+from authomatic.core import Executor, Future, as_completed, wait_all
+
+
+def test_result_is_returned():
+    executor = Executor(max_workers=2)
+
+    assert executor.submit(lambda a, b: a + b, 1, b=2).get_result() == 3
+
+
+def test_exception_is_propagated():
+    def fail():
+        raise ValueError("boom")
+
+    future = Executor(max_workers=1).submit(fail)
+
+    with pytest.raises(ValueError):
+        future.get_result()
+    assert isinstance(future.exception(), ValueError)
+
+
+def test_legacy_constructor_uses_default_executor():
+    assert Future(lambda: "legacy").get_result(5) == "legacy"
+
+
+def test_workers_are_bounded():
+    executor = Executor(max_workers=2)
+    lock = threading.Lock()
+    running = [0, 0]
+    release = threading.Event()
+
+    def task():
+        with lock:
+            running[0] += 1
+            running[1] = max(running)
+        release.wait(5)
+        with lock:
+            running[0] -= 1
+
+    futures = [executor.submit(task) for _ in range(10)]
+    release.set()
+    wait_all(futures, timeout=5)
+
+    assert running[1] == 2
+
+
+def test_full_queue_blocks_submit():
+    executor = Executor(max_workers=1, queue_depth=1)
+    release = threading.Event()
+    executor.submit(release.wait, 5)
+    queued = executor.submit(lambda: None)
+
+    submitted = threading.Event()
+    threading.Thread(
+        target=lambda: (executor.submit(lambda: None), submitted.set()), daemon=True
+    ).start()
+    assert not submitted.wait(0.2)
+
+    assert queued.cancel()
+    assert submitted.wait(2)
+    release.set()
+
+
+def test_as_completed_yields_in_completion_order():
+    executor = Executor(max_workers=2)
+    release = threading.Event()
+    slow = executor.submit(release.wait, 5)
+    fast = executor.submit(lambda: "fast")
+
+    completed = as_completed([slow, fast], timeout=5)
+
+    assert next(completed) is fast
+    release.set()
+    assert next(completed) is slow
@@ -0,0 +1,101 @@
+import logging
+
+import pytest
+
+from authomatic import Authomatic
+from authomatic.providers import oauth2
+
+from tests.unit_tests.helpers import BaseHandler
+
+
+class Handler(BaseHandler):
+    def do_GET(self):
+        if self.path.startswith("/redirect"):
+            location = f"http://{self.headers['Host']}/"
+            self.respond(b"", 302, [("Location", location)], content_type=None)
+        else:
+            self.respond({"path": self.path})
+
+
+@pytest.fixture
+def base_url(start_server):
+    return start_server(Handler).url
+
+
+class Records(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.DEBUG)
+        self.records = []
+
+    def emit(self, record):
+        record.getMessage()
+        self.records.append(record)
+
+
+class Expensive(str):
+    """
+    Counts how many times it has been formatted.
+    """
+
+    formatted = 0
+
+    def __repr__(self):
+        Expensive.formatted += 1
+        return super().__repr__()
+
+    __str__ = __repr__
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    def provider(level):
+        logger = logging.getLogger(f"test_logging_{level}")
+        logger.propagate = False
+        records = Records()
+        logger.handlers = [records]
+        authomatic = Authomatic(
+            {"amazon": {"class_": oauth2.Amazon, "id": 1}},
+            "secret",
+            logger=logger,
+            logging_level=level,
+        )
+        monkeypatch.setattr(oauth2.Amazon, "_logger", logger, raising=False)
+        provider = oauth2.Amazon(authomatic, None, "amazon")
+        provider.credentials.token = "token"
+        return provider, records.records
+
+    return provider
+
+
+def test_nothing_is_formatted_when_debug_is_disabled(provider, base_url):
+    provider_, records = provider(logging.INFO)
+    Expensive.formatted = 0
+
+    provider_.access(base_url, headers={"X-Expensive": Expensive("value")})
+    provider_._log_param("expensive", Expensive("value"))
+    provider_._log(logging.DEBUG, "%s", Expensive("value"))
+
+    assert Expensive.formatted == 0
+    assert all(r.levelno >= logging.INFO for r in records)
+
+
+def test_one_structured_record_per_request(provider, base_url):
+    provider_, records = provider(logging.DEBUG)
+
+    provider_.access(base_url + "/redirect")
+
+    fetches = [r.authomatic_fetch for r in records if hasattr(r, "authomatic_fetch")]
+    assert [(f["url"], f["status"]) for f in fetches] == [
+        (base_url + "/redirect", 302),
+        (base_url + "/", 200),
+    ]
+    assert fetches[0]["method"] == "GET"
+    assert fetches[1]["elapsed"] >= 0
+
+
+def test_messages_with_percent_signs(provider, base_url):
+    provider_, records = provider(logging.DEBUG)
+
+    provider_._log(logging.INFO, "Redirecting user to http://a/?b=%20.")
+
+    assert records[-1].getMessage().endswith("http://a/?b=%20.")
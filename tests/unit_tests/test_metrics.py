@@ -0,0 +1,155 @@
+import socket
+
+import pytest
+
+from authomatic import Authomatic
+from authomatic.exceptions import FetchError
+from authomatic.metrics import InMemoryMetrics
+from authomatic.providers import oauth2
+
+from tests.unit_tests.helpers import Adapter, BaseHandler
+
+
+class Handler(BaseHandler):
+    def do_GET(self):
+        self.respond({"a": 1}, 404 if self.path.startswith("/missing") else 200)
+
+    def do_POST(self):
+        self.read_body()
+        self.respond({"access_token": "new", "expires_in": 7200})
+
+
+@pytest.fixture
+def base_url(start_amazon_server):
+    return start_amazon_server(Handler).url
+
+
+@pytest.fixture
+def metrics():
+    return InMemoryMetrics(buckets=(0.5, 0.1))
+
+
+@pytest.fixture
+def authomatic(metrics):
+    config = {
+        "amazon": {
+            "class_": oauth2.Amazon,
+            "id": 1,
+            "consumer_key": "key",
+            "consumer_secret": "secret",
+        }
+    }
+    return Authomatic(config, "secret", metrics=metrics)
+
+
+def credentials(authomatic):
+    provider = oauth2.Amazon(authomatic, None, "amazon")
+    provider.credentials.token = "token"
+    provider.credentials.refresh_token = "refresh"
+    provider.credentials.expire_in = 60
+    return provider.credentials
+
+
+def test_histogram_and_counters(metrics):
+    metrics.observe_fetch("google", "token", "POST", 200, 0.05, size=10)
+    metrics.observe_fetch("google", "token", "POST", 200, 0.3, size=5)
+    metrics.observe_fetch("google", "token", "POST", None, 1.0, error="OSError")
+
+    snapshot = metrics.snapshot()
+
+    count, sum_, buckets = snapshot["authomatic_fetch_duration_seconds"][
+        ("google", "token")
+    ]
+    assert count == 3
+    assert sum_ == pytest.approx(1.35)
+    assert buckets == [1, 2, 3]
+    assert snapshot["authomatic_fetches_total"] == {
+        ("google", "token", 200): 2,
+        ("google", "token", ""): 1,
+    }
+    assert snapshot["authomatic_fetch_errors_total"] == {
+        ("google", "token", "OSError"): 1
+    }
+    assert snapshot["authomatic_fetch_response_bytes_total"] == {
+        ("google", "token"): 15
+    }
+
+
+def test_render_prometheus(metrics):
+    metrics.observe_fetch('go"og\\le', "token", "POST", 200, 0.05)
+    metrics.observe_operation("google", "login", 0.2, "success")
+
+    text = metrics.render_prometheus()
+
+    assert "# TYPE authomatic_fetch_duration_seconds histogram" in text
+    assert (
+        'authomatic_fetch_duration_seconds_bucket{provider="go\\"og\\\\le",'
+        'phase="token",le="0.1"} 1'
+    ) in text
+    assert (
+        'authomatic_operation_duration_seconds_bucket{provider="google",'
+        'operation="login",le="+Inf"} 1'
+    ) in text
+    assert (
+        'authomatic_operations_total{provider="google",operation="login",'
+        'outcome="success"} 1'
+    ) in text
+    assert text.endswith("\n")
+
+
+def test_access(authomatic, metrics, base_url):
+    authomatic.access(credentials(authomatic), base_url)
+    authomatic.access(credentials(authomatic), base_url + "/missing")
+
+    snapshot = metrics.snapshot()
+
+    assert snapshot["authomatic_fetches_total"] == {
+        ("amazon", "access", 200): 1,
+        ("amazon", "access", 404): 1,
+    }
+    assert snapshot["authomatic_fetch_response_bytes_total"] == {
+        ("amazon", "access"): 16
+    }
+    assert snapshot["authomatic_operations_total"] == {
+        ("amazon", "access", "success"): 1,
+        ("amazon", "access", "failure"): 1,
+    }
+
+
+def test_fetch_error(authomatic, metrics):
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    with pytest.raises(FetchError):
+        authomatic.access(credentials(authomatic), f"http://127.0.0.1:{port}/")
+
+    snapshot = metrics.snapshot()
+
+    assert snapshot["authomatic_fetch_errors_total"] == {
+        ("amazon", "access", "ConnectionRefusedError"): 1
+    }
+    assert snapshot["authomatic_operation_errors_total"] == {
+        ("amazon", "access", "FetchError"): 1
+    }
+
+
+def test_refresh(authomatic, metrics, base_url):
+    serialized = credentials(authomatic).serialize()
+
+    authomatic.credentials(serialized).refresh(force=True)
+
+    snapshot = metrics.snapshot()
+
+    assert snapshot["authomatic_fetches_total"] == {("amazon", "refresh", 200): 1}
+    assert snapshot["authomatic_operations_total"] == {
+        ("amazon", "refresh", "success"): 1
+    }
+
+
+def test_login_redirect(authomatic, metrics):
+    authomatic.login(Adapter(), "amazon")
+
+    assert metrics.snapshot()["authomatic_operations_total"] == {
+        ("amazon", "login", "redirect"): 1
+    }
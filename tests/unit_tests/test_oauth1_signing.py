@@ -0,0 +1,149 @@
+import base64
+import hashlib
+import hmac
+import random
+
+import pytest
+
+from authomatic import core
+from authomatic.providers import oauth1
+from authomatic.six.moves import urllib_parse as parse
+
+# https://developer.twitter.com/en/docs/authentication/oauth-1-0a/creating-a-signature
+TWITTER_PARAMS = {
+    "status": "Hello Ladies + Gentlemen, a signed OAuth request!",
+    "include_entities": "true",
+    "oauth_consumer_key": "xvz1evFS4wEEPTGEFPHBog",
+    "oauth_nonce": "kYjzVBB8Y0ZFabxSWbWovY3uYSQ2pTgmZeNu2VS4cg",
+    "oauth_signature_method": "HMAC-SHA1",
+    "oauth_timestamp": "1318622958",
+    "oauth_token": "370773112-GmHxMAgYyLbNEtIKZeRNFsMKPR9EyMZeS9weJAEb",
+    "oauth_version": "1.0",
+}
+TWITTER_URL = "https://api.twitter.com/1.1/statuses/update.json"
+TWITTER_CONSUMER_SECRET = "kAcSOqF21Fu85e7zjz7ZN2U4ZRhfV3WpwPAoE3Z7kBw"
+TWITTER_TOKEN_SECRET = "LswwdoUaIvS8ltyTt5jkRh4J50vUPVVHtR2YPi5kE"
+
+CHARACTERS = "aZ09 -._~+*/=&%?!'()é€\U0001f600"
+
+
+def reference_normalize_params(params):
+    """
+    The original urlencode() based implementation.
+    """
+
+    if isinstance(params, dict):
+        params = list(params.items())
+    params = sorted(
+        [(k, v) for k, v in params if k not in ("oauth_signature", "realm")]
+    )
+    qs = parse.urlencode(params)
+    return qs.replace("+", "%20").replace("%7E", "~")
+
+
+def reference_signature(method, url, params, consumer_secret, token_secret, digest):
+    base_string = "&".join(
+        core.escape(i) for i in (method, url, reference_normalize_params(params))
+    )
+    key = "&".join(core.escape(i) for i in (consumer_secret, token_secret))
+    hashed = hmac.new(key.encode("latin-1"), base_string.encode("utf-8"), digest)
+    return base64.b64encode(hashed.digest())
+
+
+def random_string(rnd):
+    return "".join(rnd.choice(CHARACTERS) for _ in range(rnd.randint(0, 12)))
+
+
+def random_params(rnd):
+    params = [
+        (random_string(rnd), random_string(rnd)) for _ in range(rnd.randint(0, 8))
+    ]
+    params.append(("realm", "ignored"))
+    params.append(("oauth_signature", "ignored"))
+    params.append(("count", rnd.randint(0, 1000)))
+    return params
+
+
+def test_twitter_signature():
+    signature = oauth1.HMACSHA1SignatureGenerator.create_signature(
+        "POST",
+        TWITTER_URL,
+        TWITTER_PARAMS,
+        TWITTER_CONSUMER_SECRET,
+        TWITTER_TOKEN_SECRET,
+    )
+
+    assert signature == b"hCtSmYh+iHYCEqBWrE7C7hYmtUk="
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {},
+        {"a": "b c", "plus": "1+1", "tilde": "~", "star": "*", "slash": "/"},
+        {"unicode": "é€", "int": 5, "empty": ""},
+        [("a", "2"), ("a", "1"), ("b", "0"), ("realm", "x")],
+        [("oauth_signature", "x")],
+    ],
+)
+def test_normalize_params(params):
+    assert oauth1._normalize_params(params) == reference_normalize_params(params)
+
+
+def test_signatures_match_reference():
+    rnd = random.Random(0)
+    for _ in range(500):
+        args = (
+            rnd.choice(["GET", "POST"]),
+            "https://example.com/" + parse.quote(random_string(rnd)),
+            random_params(rnd),
+            random_string(rnd),
+            random_string(rnd),
+        )
+        for generator, digest in [
+            (oauth1.HMACSHA1SignatureGenerator, hashlib.sha1),
+            (oauth1.HMACSHA256SignatureGenerator, hashlib.sha256),
+        ]:
+            assert generator.create_signature(*args) == reference_signature(
+                *args, digest
+            )
+
+
+def test_key_cache():
+    generator = oauth1.HMACSHA1SignatureGenerator
+    generator._hmac.cache_clear()
+
+    first = generator.create_signature("GET", "http://a", {}, "consumer", "token")
+    second = generator.create_signature("GET", "http://a", {}, "consumer", "token")
+    other = generator.create_signature("GET", "http://a", {}, "consumer", "other")
+
+    assert first == second != other
+    info = generator._hmac.cache_info()
+    assert (info.hits, info.misses) == (1, 2)
+
+
+def test_sha256_provider():
+    class Provider(oauth1.Twitter):
+        _signature_generator = oauth1.HMACSHA256SignatureGenerator
+
+    credentials = core.Credentials({}, token="token", token_secret="secret")
+    credentials.consumer_key = "key"
+    credentials.consumer_secret = "consumer secret"
+
+    url, method, params, headers, body = Provider.create_request_elements(
+        Provider.PROTECTED_RESOURCE_REQUEST_TYPE,
+        credentials,
+        "https://example.com/resource?a=1",
+    )
+
+    assert params["oauth_signature_method"] == "HMAC-SHA256"
+    assert params["oauth_signature"] == reference_signature(
+        "GET", url, params, "consumer secret", "secret", hashlib.sha256
+    )
+
+
+def test_nonce():
+    nonces = {oauth1._create_nonce() for _ in range(1000)}
+
+    assert len(nonces) == 1000
+    assert all(len(nonce) == 32 for nonce in nonces)
@@ -0,0 +1,301 @@
+import hashlib
+import json
+import time
+from urllib.parse import parse_qsl, urlsplit
+
+import pytest
+
+from authomatic import Authomatic, oidc
+from authomatic.codecs import b64url_encode
+from authomatic.exceptions import IDTokenError
+from authomatic.providers import oauth2
+
+from tests.unit_tests.helpers import Adapter, BaseHandler
+
+# A 1024 bit RSA test key.
+N = int(
+    "5dc31ee581f3bee75ea983480ab9191a314532d1f9617c65d57a56aa2e106c1c"
+    "4574ae666aa1f9cbc480ee5daaec5b08b9b4e5f5d5247ce15bad62ebcd563479"
+    "23ae89aaefa9686030fa8df4fa135e52543f59b3e67a8a998e3ecec9b270ecda"
+    "53327916b44818984e17e4ccb5e135fe4a16a41959af1b72208a963494fa6045",
+    16,
+)
+D = int(
+    "4b5f4e17faf6413167146777633f56a18a97f0f9803a50b0e0025f66a06f0d29"
+    "50e0324e1c4c272d19c2f75b0ecabf876d19b17e841fb7cfc54dc5667f035c5c"
+    "44484a0f8b861b5f0b515d03e0d24940f3897dab1339d35f58d5b952e6d00a66"
+    "ad5893a1fc69241f970b101363dc481651cd31bbdc08f3de95df69414f1bc3c1",
+    16,
+)
+E = 65537
+LENGTH = (N.bit_length() + 7) // 8
+
+ISSUER = "https://accounts.google.com"
+
+
+def int_b64(value):
+    return b64url_encode(value.to_bytes((value.bit_length() + 7) // 8, "big"))
+
+
+def jwks(kid="key-1"):
+    return {"keys": [{"kty": "RSA", "kid": kid, "n": int_b64(N), "e": int_b64(E)}]}
+
+
+def sign(signing_input):
+    digest = hashlib.sha256(signing_input).digest()
+    digest_info = oidc._SHA256_DIGEST_INFO + digest
+    padded = (
+        b"\x00\x01" + b"\xff" * (LENGTH - len(digest_info) - 3) + b"\x00" + digest_info
+    )
+    value = pow(int.from_bytes(padded, "big"), D, N)
+    return value.to_bytes(LENGTH, "big")
+
+
+def make_token(alg="RS256", kid="key-1", **claims):
+    now = int(time.time())
+    payload = dict(iss=ISSUER, aud="key", sub="123", iat=now, exp=now + 3600)
+    payload.update(claims)
+    header = {"alg": alg, "kid": kid}
+    signing_input = "{0}.{1}".format(
+        b64url_encode(json.dumps(header).encode()),
+        b64url_encode(json.dumps(payload).encode()),
+    )
+    signature = b64url_encode(sign(signing_input.encode("ascii")))
+    return f"{signing_input}.{signature}"
+
+
+def verify(token, **kwargs):
+    cache = oidc.JWKSCache()
+    cache.set("jwks", jwks())
+    return oidc.verify_id_token(token, cache.get("jwks"), [ISSUER], "key", **kwargs)
+
+
+def test_verify():
+    claims = verify(make_token(email="joe@example.com"))
+
+    assert claims["sub"] == "123"
+    assert claims["email"] == "joe@example.com"
+
+
+@pytest.mark.parametrize(
+    "token, message",
+    [
+        (make_token(alg="none"), "algorithm"),
+        (make_token(alg="HS256"), "algorithm"),
+        (make_token(kid="other"), "key id"),
+        (make_token(iss="https://evil.com"), "issuer"),
+        (make_token(aud="other"), "audience"),
+        (make_token(aud=["key", "other"], azp="other"), "authorized party"),
+        (make_token(exp=int(time.time()) - 3600), "expired"),
+        (make_token(iat=int(time.time()) + 3600), "future"),
+        (make_token(exp="soon"), "time claims"),
+        ("not.a.token", "Malformed"),
+    ],
+    ids=lambda value: value if len(value) < 20 else "",
+)
+def test_invalid(token, message):
+    with pytest.raises(IDTokenError, match=message):
+        verify(token)
+
+
+def test_tampered():
+    header, claims, signature = make_token().split(".")
+    tampered = json.loads(oidc.b64url_decode(claims))
+    tampered["sub"] = "456"
+    claims = b64url_encode(json.dumps(tampered).encode())
+
+    with pytest.raises(IDTokenError, match="signature"):
+        verify(f"{header}.{claims}.{signature}")
+
+
+def test_multi_tenant_issuer():
+    token = make_token(iss="https://login.example.com/tenant/v2.0", tid="tenant")
+    cache = oidc.JWKSCache()
+    cache.set("jwks", jwks())
+    issuers = ["https://login.example.com/{tid}/v2.0"]
+
+    assert oidc.verify_id_token(token, cache.get("jwks"), issuers, "key")["tid"]
+
+    token = make_token(iss="https://login.example.com/other/v2.0", tid="tenant")
+    with pytest.raises(IDTokenError, match="issuer"):
+        oidc.verify_id_token(token, cache.get("jwks"), issuers, "key")
+
+
+def test_cache(monkeypatch):
+    cache = oidc.JWKSCache(ttl=100, min_refresh_interval=10)
+    now = time.time()
+
+    assert cache.needs_fetch("jwks")
+    cache.set("jwks", jwks())
+    assert not cache.needs_fetch("jwks", "key-1")
+    assert list(cache.get("jwks")) == ["key-1"]
+
+    # An unknown key id refetches the key set only once in a while.
+    assert not cache.needs_fetch("jwks", "key-2")
+    monkeypatch.setattr(time, "time", lambda: now + 11)
+    assert cache.needs_fetch("jwks", "key-2")
+
+    monkeypatch.setattr(time, "time", lambda: now + 101)
+    assert cache.get("jwks") is None
+    assert cache.needs_fetch("jwks", "key-1")
+
+
+def test_max_age():
+    assert oidc.max_age("public, max-age=19523, must-revalidate") == 19523
+    assert oidc.max_age("no-cache", 60) == 60
+    assert oidc.max_age(None) is None
+
+
+class Handler(BaseHandler):
+    def do_POST(self):
+        self.read_body()
+        self.server.paths.append(self.path)
+        token = make_token(
+            iss=self.server.issuer,
+            kid=self.server.kid,
+            name="Joe Doe",
+            email="joe@doe.com",
+        )
+        data = {"access_token": "token", "token_type": "Bearer", "id_token": token}
+        self.respond(data)
+
+    def do_GET(self):
+        self.server.paths.append(self.path)
+        if self.path == "/.well-known/openid-configuration":
+            max_age = self.server.discovery_max_age
+            headers = [("ETag", '"v1"'), ("Cache-Control", f"max-age={max_age}")]
+            if self.headers.get("If-None-Match") == '"v1"':
+                self.server.not_modified += 1
+                self.respond(b"", 304, headers)
+            else:
+                self.respond(self.server.discovery, headers=headers)
+        elif self.path.startswith("/userinfo"):
+            self.respond({"sub": "123", "preferred_username": "joe"})
+        else:
+            headers = [("Cache-Control", "max-age=300")]
+            self.respond(jwks(self.server.kid), headers=headers)
+
+
+@pytest.fixture
+def server(start_server, monkeypatch):
+    httpd = start_server(Handler)
+    httpd.paths = []
+    httpd.kid = "key-1"
+    httpd.issuer = ISSUER
+    httpd.discovery_max_age = 300
+    httpd.not_modified = 0
+    url = httpd.url
+    httpd.discovery = {
+        "issuer": url,
+        "authorization_endpoint": url + "/authorize",
+        "token_endpoint": url + "/token",
+        "userinfo_endpoint": url + "/userinfo",
+        "jwks_uri": url + "/certs",
+    }
+    monkeypatch.setattr(oauth2.Google, "access_token_url", url + "/token")
+    monkeypatch.setattr(oauth2.Google, "jwks_uri", url + "/certs")
+    monkeypatch.setattr(oidc, "default_jwks_cache", oidc.JWKSCache())
+    monkeypatch.setattr(oidc, "default_discovery_cache", oidc.DiscoveryCache())
+    return httpd
+
+
+def login(class_=oauth2.Google, **config):
+    config = {
+        "provider": dict(
+            class_=class_,
+            consumer_key="key",
+            consumer_secret="secret",
+            signed_state=True,
+            verify_id_token=True,
+            **config,
+        )
+    }
+    authomatic = Authomatic(config, "secret")
+    adapter = Adapter()
+    result = authomatic.login(adapter, "provider")
+    if result:
+        return result
+    query = dict(parse_qsl(urlsplit(adapter.headers["Location"]).query))
+
+    adapter = Adapter({"code": "code", "state": query["state"]})
+    result = authomatic.login(adapter, "provider")
+
+    assert result.error is None
+    return result.user
+
+
+def test_login(server):
+    user = login()
+
+    assert user.id == "123"
+    assert user.name == "Joe Doe"
+    assert user.email == "joe@doe.com"
+    assert server.paths == ["/token", "/certs"]
+
+    # The keys are cached.
+    login()
+
+    assert server.paths == ["/token", "/certs", "/token"]
+
+
+def test_login_key_rotation(server):
+    login()
+    server.kid = "key-2"
+    oidc.default_jwks_cache.min_refresh_interval = 0
+
+    assert login().id == "123"
+    assert server.paths == ["/token", "/certs", "/token", "/certs"]
+
+
+def test_openid_connect(server):
+    server.issuer = server.url
+    user = login(oauth2.OpenIDConnect, issuer=server.url)
+
+    assert user.id == "123"
+    assert user.email == "joe@doe.com"
+    assert server.paths == [
+        "/.well-known/openid-configuration",
+        "/token",
+        "/certs",
+    ]
+
+    # The access token is sent in the Authorization header.
+    assert user.update().user.username == "joe"
+    assert server.paths[3:] == ["/userinfo"]
+
+
+def test_openid_connect_discovery_cache(server, tmp_path, monkeypatch):
+    directory = str(tmp_path)
+    cache = oidc.DiscoveryCache(directory=directory)
+    monkeypatch.setattr(oidc, "default_discovery_cache", cache)
+    server.issuer = server.url
+    server.discovery_max_age = 0
+    discovery = "/.well-known/openid-configuration"
+
+    # The document expires immediately, so each phase revalidates it.
+    login(oauth2.OpenIDConnect, issuer=server.url)
+
+    assert server.paths.count(discovery) == 2
+    assert server.not_modified == 1
+
+    # Another process reads it from the directory.
+    cache = oidc.DiscoveryCache(directory=directory)
+    monkeypatch.setattr(oidc, "default_discovery_cache", cache)
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now - 10)
+
+    assert cache.get(server.url + discovery)["token_endpoint"] == server.url + "/token"
+    assert cache.etag(server.url + discovery) == '"v1"'
+
+
+def test_openid_connect_scope():
+    scope = oauth2.OpenIDConnect._x_scope_parser(None, ["email", "openid"])
+
+    assert scope == "openid email"
+
+
+def test_openid_connect_issuer_mismatch(server):
+    server.discovery["issuer"] = "https://evil.com"
+    result = login(oauth2.OpenIDConnect, issuer=server.url)
+
+    assert "doesn't match the configured issuer" in str(result.error)
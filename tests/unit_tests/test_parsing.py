@@ -0,0 +1,155 @@
+import json
+from xml.etree import ElementTree
+
+import pytest
+
+from authomatic import core
+from authomatic.core import Response, json_qs_parser
+
+
+def trial_chain(body):
+    """
+    The original json_qs_parser.
+    """
+
+    try:
+        return json.loads(body)
+    except (OverflowError, TypeError, ValueError):
+        pass
+    try:
+        return ElementTree.fromstring(body)
+    except (ElementTree.ParseError, TypeError, ValueError):
+        pass
+    return dict(core.parse.parse_qsl(body))
+
+
+def normalize(data):
+    if isinstance(data, ElementTree.Element):
+        return ElementTree.tostring(data)
+    return data
+
+
+BODIES = [
+    '{"a": 1, "b": [1, 2]}',
+    '  [1, "x"]',
+    "123",
+    "-1.5",
+    "true",
+    "null",
+    '"string"',
+    "123456789012345678901234567890",
+    "<a><b>c</b></a>",
+    "  <a/>",
+    "<not xml",
+    "access_token=abc&expires=10",
+    "token=a%20b",
+    "t=1",
+    "{not json",
+    "n=1",
+    "",
+    "   ",
+]
+
+
+@pytest.mark.parametrize("body", BODIES)
+@pytest.mark.parametrize("encode", [False, True])
+def test_sniffing_matches_trial_chain(body, encode):
+    expected = normalize(trial_chain(body))
+    if encode:
+        body = body.encode("utf-8")
+
+    assert normalize(json_qs_parser(body)) == expected
+
+
+@pytest.mark.parametrize(
+    "content_type, body, expected",
+    [
+        ("application/json; charset=utf-8", b'{"a": 1}', {"a": 1}),
+        ("application/vnd.api+json", b'{"a": 1}', {"a": 1}),
+        ("text/xml", b"<a>b</a>", b"<a>b</a>"),
+        ("application/x-www-form-urlencoded", b"a=1&b=2", {"a": "1", "b": "2"}),
+        ("text/plain", b"a=1", {"a": "1"}),
+        ("text/plain", b'{"a": 1}', {"a": 1}),
+        # Wrong Content-Type falls back to sniffing.
+        ("application/json", b"a=1", {"a": "1"}),
+        ("application/xml", b'{"a": 1}', {"a": 1}),
+    ],
+)
+def test_content_type_dispatch(content_type, body, expected):
+    assert normalize(json_qs_parser(body, content_type)) == expected
+
+
+def test_content_type_skips_other_parsers(monkeypatch):
+    calls = []
+    monkeypatch.setattr(core, "json_loads", lambda body: calls.append(body))
+    monkeypatch.setattr(core, "_parse_xml", lambda body: calls.append(body))
+
+    json_qs_parser(b"a=1", "application/x-www-form-urlencoded")
+
+    assert calls == []
+
+
+@pytest.fixture(params=["json", "orjson"])
+def json_backend(request):
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    core.set_json_backend(request.param)
+    yield request.param
+    core.set_json_backend()
+
+
+def test_json_backend(json_backend):
+    assert core.json_loads(b'{"a": [1, 2.5]}') == {"a": [1, 2.5]}
+    assert json_qs_parser(b'{"a": 1}', "application/json") == {"a": 1}
+    assert json_qs_parser(b"a=1", "application/json") == {"a": "1"}
+    assert core.json_loads("[Infinity]") == [float("inf")]
+
+
+def test_unknown_json_backend():
+    with pytest.raises(ValueError):
+        core.set_json_backend("simplejson")
+
+
+class HTTPResponse:
+    msg = version = reason = None
+    status = 200
+
+    def __init__(self, body, headers=None):
+        self.body = body
+        self.headers = headers or {}
+        self.reads = 0
+
+    def read(self, amt=None):
+        self.reads += 1
+        body, self.body = self.body, b""
+        return body
+
+    def getheader(self, name, default=None):
+        return self.headers.get(name, default)
+
+
+def test_empty_data_is_memoized():
+    parses = []
+
+    def parser(content):
+        parses.append(content)
+        return {}
+
+    response = Response(HTTPResponse(b""), parser)
+
+    assert response.data == {}
+    assert response.data == {}
+    assert response.content == ""
+    assert parses == [""]
+
+
+def test_data_and_content_share_the_body():
+    httplib_response = HTTPResponse(
+        b'{"a": 1}', {"Content-Type": "application/json"}
+    )
+    response = Response(httplib_response)
+
+    assert response.data == {"a": 1}
+    assert response.content == '{"a": 1}'
+    assert b"".join(response.iter_content()) == b'{"a": 1}'
+    assert httplib_response.reads == 1
@@ -0,0 +1,289 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from authomatic import Authomatic
+from authomatic.providers import oauth2
+from authomatic.refresh import RefreshCoordinator, RefreshScheduler
+
+from tests.unit_tests.helpers import BaseHandler
+
+
+class TokenHandler(BaseHandler):
+    calls = []
+
+    def do_POST(self):
+        self.read_body()
+        self.calls.append(self.path)
+        time.sleep(0.05)
+        if self.path == "/revoked":
+            self.respond({"error": "invalid_grant"}, 400)
+        else:
+            self.respond({"access_token": "new", "expires_in": 7200})
+
+
+@pytest.fixture
+def token_url(start_amazon_server):
+    TokenHandler.calls = []
+    return start_amazon_server(TokenHandler).url + "/token"
+
+
+CONFIG = {
+    "amazon": {
+        "class_": oauth2.Amazon,
+        "id": 1,
+        "consumer_key": "key",
+        "consumer_secret": "secret",
+    }
+}
+
+
+@pytest.fixture
+def authomatic():
+    return Authomatic(CONFIG, "secret")
+
+
+def credentials(authomatic, refresh_token="refresh", expire_in=60):
+    provider = oauth2.Amazon(authomatic, None, "amazon")
+    provider.credentials.token = "old"
+    provider.credentials.refresh_token = refresh_token
+    provider.credentials.token_type = "Bearer"
+    provider.credentials.expire_in = expire_in
+    return provider.credentials.serialize()
+
+
+def test_due_credentials_are_refreshed(authomatic, token_url):
+    saved = []
+    scheduler = RefreshScheduler(
+        authomatic, lambda *args: saved.append(args), soon=300
+    )
+    old = credentials(authomatic)
+
+    assert scheduler.add(old)
+    # Not due yet.
+    assert scheduler.add(credentials(authomatic, "other", expire_in=3600))
+    assert scheduler.run_pending() == 1
+
+    assert saved[0][0] == old
+    assert authomatic.credentials(saved[0][1]).token == "new"
+    # The refreshed credentials are scheduled again.
+    assert len(scheduler) == 2
+    assert scheduler.run_pending() == 0
+
+
+def test_duplicates_are_coalesced(authomatic, token_url):
+    scheduler = RefreshScheduler(authomatic, lambda *args: None, soon=300)
+    old = credentials(authomatic)
+
+    assert scheduler.extend([old, old, old]) == 1
+    scheduler.run_pending()
+
+    assert TokenHandler.calls == ["/token"]
+
+
+def test_failures_are_reported(authomatic, token_url, monkeypatch):
+    monkeypatch.setattr(oauth2.Amazon, "access_token_url", token_url[:-6] + "/revoked")
+    errors = []
+    scheduler = RefreshScheduler(
+        authomatic,
+        lambda *args: None,
+        soon=300,
+        error_callback=lambda *args: errors.append(args),
+    )
+    old = credentials(authomatic)
+    scheduler.add(old)
+
+    assert scheduler.run_pending() == 0
+    assert errors[0][0] == old
+    assert errors[0][1].status == 400
+    assert len(scheduler) == 0
+
+
+def test_concurrency_is_bounded(authomatic, token_url):
+    scheduler = RefreshScheduler(authomatic, lambda *args: None, concurrency=2)
+    scheduler.extend(credentials(authomatic, f"refresh-{i}") for i in range(6))
+
+    started = time.time()
+    assert scheduler.run_pending() == 6
+    # Three rounds of two refreshes each taking at least 50 ms.
+    assert time.time() - started >= 0.15
+
+
+def test_background_thread(authomatic, token_url):
+    saved = threading.Event()
+    scheduler = RefreshScheduler(authomatic, lambda *args: saved.set(), soon=300)
+    scheduler.start()
+    scheduler.add(credentials(authomatic))
+
+    assert saved.wait(5)
+    scheduler.stop()
+
+    # It can be restarted.
+    saved.clear()
+    scheduler.start()
+    scheduler.add(credentials(authomatic, "other"))
+
+    assert saved.wait(5)
+    scheduler.stop()
+
+
+def test_callback_failures_are_reported(authomatic, token_url):
+    def callback(old, new):
+        raise ValueError("Database is down!")
+
+    errors = []
+    scheduler = RefreshScheduler(
+        authomatic,
+        callback,
+        soon=300,
+        error_callback=lambda *args: errors.append(args),
+    )
+    old = credentials(authomatic)
+    scheduler.add(old)
+
+    assert scheduler.run_pending() == 1
+    assert errors[0][0] == old
+    assert isinstance(errors[0][1], ValueError)
+    # The refreshed credentials are scheduled again.
+    assert len(scheduler) == 1
+
+
+def refresh_concurrently(instances, serialized):
+    barrier = threading.Barrier(len(instances))
+    results = [None] * len(instances)
+
+    def refresh(i):
+        refreshed = instances[i].credentials(serialized)
+        barrier.wait()
+        response = refreshed.refresh(force=True)
+        results[i] = (response, refreshed)
+
+    threads = [
+        threading.Thread(target=refresh, args=(i,)) for i in range(len(instances))
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_coordinator_threads(authomatic, token_url):
+    authomatic.refresh_coordinator = RefreshCoordinator()
+
+    results = refresh_concurrently([authomatic] * 5, credentials(authomatic))
+
+    assert TokenHandler.calls == ["/token"]
+    assert all(c.token == "new" and not c.expire_soon(3600) for _, c in results)
+    assert all(r.status == 200 for r, _ in results)
+
+
+def test_coordinator_late_thread(authomatic, token_url, monkeypatch):
+    authomatic.refresh_coordinator = RefreshCoordinator(result_ttl=60)
+    serialized = credentials(authomatic)
+
+    first = authomatic.credentials(serialized)
+    assert first.refresh(force=True).status == 200
+
+    # A thread which still has the old refresh token takes over the result.
+    late = authomatic.credentials(serialized)
+    assert late.refresh(force=True) is None
+    assert late.token == "new"
+    assert TokenHandler.calls == ["/token"]
+
+    # The refresh token hasn't been rotated, but credentials which already
+    # have the result are refreshed again.
+    assert late.refresh(force=True).status == 200
+    assert TokenHandler.calls == ["/token", "/token"]
+    TokenHandler.calls.clear()
+
+    # Until it expires.
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    assert authomatic.credentials(serialized).refresh(force=True).status == 200
+    assert TokenHandler.calls == ["/token"]
+
+
+def test_coordinator_processes(authomatic, token_url, tmp_path):
+    path = str(tmp_path / "refresh.db")
+    # Each instance stands for a process with its own coordinator.
+    instances = [
+        Authomatic(CONFIG, "secret", refresh_coordinator=RefreshCoordinator(path))
+        for _ in range(3)
+    ]
+
+    results = refresh_concurrently(instances, credentials(authomatic))
+
+    assert TokenHandler.calls == ["/token"]
+    assert all(c.token == "new" for _, c in results)
+    responses = [r for r, _ in results]
+    assert sum(1 for r in responses if r is not None) == 1
+
+    # Later refreshes with the old refresh token reuse the result.
+    old = instances[0].credentials(credentials(authomatic))
+    assert old.refresh(force=True) is None
+    assert old.token == "new"
+    assert TokenHandler.calls == ["/token"]
+
+    # But not those which already have it.
+    assert instances[1].credentials(old.serialize()).refresh(force=True) is not None
+    assert TokenHandler.calls == ["/token", "/token"]
+
+
+def test_coordinator_schedulers(authomatic, token_url, tmp_path):
+    path = str(tmp_path / "refresh.db")
+    saved = []
+    schedulers = [
+        RefreshScheduler(
+            Authomatic(CONFIG, "secret", refresh_coordinator=RefreshCoordinator(path)),
+            lambda *args: saved.append(args),
+            soon=300,
+        )
+        for _ in range(2)
+    ]
+    old = credentials(authomatic)
+    for scheduler in schedulers:
+        scheduler.add(old)
+
+    threads = [threading.Thread(target=s.run_pending) for s in schedulers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert TokenHandler.calls == ["/token"]
+    # Both save the refreshed credentials.
+    assert len(saved) == 2
+    assert all(authomatic.credentials(new).token == "new" for _, new in saved)
+
+
+def test_coordinator_failure_releases_lease(token_url, tmp_path, monkeypatch):
+    monkeypatch.setattr(oauth2.Amazon, "access_token_url", token_url[:-6] + "/revoked")
+    path = str(tmp_path / "refresh.db")
+    authomatic = Authomatic(
+        CONFIG, "secret", refresh_coordinator=RefreshCoordinator(path)
+    )
+
+    for _ in range(2):
+        refreshed = authomatic.credentials(credentials(authomatic))
+        assert refreshed.refresh(force=True).status == 400
+        assert refreshed.token == "old"
+
+    assert TokenHandler.calls == ["/revoked", "/revoked"]
+
+
+def test_coordinator_async(authomatic, token_url):
+    authomatic.refresh_coordinator = RefreshCoordinator()
+    serialized = credentials(authomatic)
+
+    async def main():
+        refreshed = [authomatic.credentials(serialized) for _ in range(3)]
+        await asyncio.gather(*[c.arefresh(force=True) for c in refreshed])
+        return refreshed
+
+    refreshed = asyncio.run(main())
+
+    assert TokenHandler.calls == ["/token"]
+    assert all(c.token == "new" for c in refreshed)
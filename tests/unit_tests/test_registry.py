@@ -0,0 +1,99 @@
+import pytest
+
+from authomatic import Authomatic
+from authomatic.core import Credentials, ProviderRegistry
+from authomatic.exceptions import ConfigError
+from authomatic.providers import oauth1, oauth2, type_id_to_class
+
+CONFIG = {
+    "__defaults__": {"consumer_key": "key"},
+    "facebook": {"class_": "oauth2.Facebook", "id": 1},
+    "twitter": {"class_": oauth1.Twitter, "id": 2},
+    "broken": {"class_": "oauth2.DoesNotExist", "id": 3},
+    "classless": {"id": 4},
+}
+
+
+def test_lookups():
+    registry = ProviderRegistry(CONFIG)
+
+    assert registry.name(2) == "twitter"
+    assert registry.provider_class("facebook") is oauth2.Facebook
+    assert registry.provider_class("twitter") is oauth1.Twitter
+    type_id = "2-{0}".format(oauth2.PROVIDER_ID_MAP.index(oauth2.Facebook))
+    assert registry.by_type_id(type_id) is oauth2.Facebook
+    assert registry.by_type_id("9-999") is None
+
+
+def test_errors():
+    registry = ProviderRegistry(CONFIG)
+
+    with pytest.raises(Exception, match="No provider with id=5"):
+        registry.name(5)
+    with pytest.raises(ConfigError):
+        registry.provider_class("missing")
+    with pytest.raises(ConfigError):
+        registry.provider_class("classless")
+
+
+def test_classes_are_resolved_once(monkeypatch):
+    registry = ProviderRegistry(CONFIG)
+    registry.provider_class("facebook")
+
+    def fail(class_):
+        raise AssertionError("Resolved again!")
+
+    monkeypatch.setattr("authomatic.core.resolve_provider_class", fail)
+
+    assert registry.provider_class("facebook") is oauth2.Facebook
+
+
+def test_deserialize_with_registry():
+    authomatic = Authomatic(dict(CONFIG), "secret")
+    provider = oauth2.Facebook(authomatic, None, "facebook")
+    provider.credentials.token = "token"
+    serialized = provider.credentials.serialize()
+
+    credentials = Credentials.deserialize(
+        authomatic.config, serialized, authomatic.registry
+    )
+
+    assert credentials.provider_name == "facebook"
+    assert credentials.provider_class is oauth2.Facebook
+    assert credentials.token == "token"
+
+
+def test_registry_is_invalidated():
+    authomatic = Authomatic(dict(CONFIG), "secret")
+    registry = authomatic.registry
+
+    assert authomatic.registry is registry
+
+    authomatic.config = {"facebook": {"class_": oauth2.Facebook, "id": 7}}
+    assert authomatic.registry is not registry
+    assert authomatic.registry.name(7) == "facebook"
+
+    authomatic.config["google"] = {"class_": oauth2.Google, "id": 8}
+    authomatic.invalidate_registry()
+    assert authomatic.registry.name(8) == "google"
+
+
+def test_type_id_is_a_class_attribute():
+    index = oauth2.PROVIDER_ID_MAP.index(oauth2.Facebook)
+
+    assert oauth2.Facebook.type_id == f"2-{index}"
+    assert oauth2.Facebook(Authomatic({}, "secret"), None, "fb").type_id == (
+        f"2-{index}"
+    )
+    assert oauth2.Facebook.get_type() == "authomatic.providers.oauth2.OAuth2"
+    assert type_id_to_class(f"2-{index}") is oauth2.Facebook
+    assert type_id_to_class(oauth1.Twitter.type_id) is oauth1.Twitter
+    assert type_id_to_class("2-9999") is None
+    assert type_id_to_class("junk") is None
+
+
+def test_type_id_follows_provider_id_map(monkeypatch):
+    monkeypatch.setattr(oauth2, "PROVIDER_ID_MAP", oauth2.PROVIDER_ID_MAP[::-1])
+    index = oauth2.PROVIDER_ID_MAP.index(oauth2.Facebook)
+
+    assert oauth2.Facebook.type_id == f"2-{index}"
@@ -0,0 +1,186 @@
+import asyncio
+import threading
+
+import pytest
+
+from authomatic import Authomatic, core
+from authomatic.providers import AuthenticationProvider, SecondaryUserInfo, oauth2
+
+from tests.unit_tests.helpers import Adapter, BaseHandler
+
+USER = {"login": "joedoe", "id": 1, "email": None}
+EMAILS = [
+    {"email": "other@example.com", "primary": False},
+    {"email": "joe@example.com", "primary": True},
+]
+
+
+class Handler(BaseHandler):
+    def do_GET(self):
+        path = self.path.partition("?")[0]
+        self.server.paths.append(path)
+        if path in ("/user", "/user/emails") and self.server.barrier:
+            # Both wait for each other, so they must be fetched concurrently.
+            self.server.barrier.wait(timeout=5)
+        if path == "/user/emails":
+            self.respond(EMAILS)
+        elif path == "/user/extra":
+            self.respond({"location": "Bratislava"})
+        elif path == "/user/broken":
+            self.respond({"error": "broken"}, status=500)
+        else:
+            self.respond(USER)
+
+
+@pytest.fixture
+def server(start_server, monkeypatch):
+    httpd = start_server(Handler)
+    httpd.paths = []
+    httpd.barrier = None
+    monkeypatch.setattr(oauth2.GitHub, "user_info_url", httpd.url + "/user")
+    return httpd
+
+
+def make_provider(**config):
+    config = {
+        "github": dict(
+            {"class_": oauth2.GitHub, "id": 1, "consumer_key": "key"}, **config
+        )
+    }
+    provider = oauth2.GitHub(Authomatic(config, "secret"), None, "github")
+    provider.credentials.token = "token"
+    provider.user = core.User(provider, credentials=provider.credentials)
+    return provider
+
+
+def test_access_makes_single_request(server):
+    response = make_provider().access(server.url + "/repos")
+
+    assert response.status == 200
+    assert "emails" not in response.data
+    assert server.paths == ["/repos"]
+
+
+def test_concurrent(server):
+    server.barrier = threading.Barrier(2)
+    provider = make_provider(user_info_attributes=["email"])
+
+    user = provider.update_user().user
+
+    assert user.email == "joe@example.com"
+    assert user.data["emails"] == EMAILS
+    assert sorted(server.paths) == ["/user", "/user/emails"]
+
+
+def test_concurrent_async(server):
+    server.barrier = threading.Barrier(2)
+    provider = make_provider(user_info_attributes=["email"])
+
+    user = asyncio.run(provider.aupdate_user()).user
+
+    assert user.email == "joe@example.com"
+    assert sorted(server.paths) == ["/user", "/user/emails"]
+
+
+def test_on_executor_worker(server):
+    provider = make_provider(user_info_attributes=["email"])
+
+    user = provider.user.async_update().get_result().user
+
+    assert user.email == "joe@example.com"
+    assert sorted(server.paths) == ["/user", "/user/emails"]
+
+
+def test_deferred_by_default(server):
+    user = make_provider().update_user().user
+
+    assert server.paths == ["/user"]
+    assert user.email == "joe@example.com"
+    assert server.paths == ["/user", "/user/emails"]
+
+
+def test_aload(server):
+    async def run():
+        user = (await provider.aupdate_user()).user
+        assert server.paths == ["/user"]
+        return await user.aload()
+
+    provider = make_provider()
+
+    user = asyncio.run(run())
+
+    assert server.paths == ["/user", "/user/emails"]
+    assert user.__dict__["email"] == "joe@example.com"
+    assert user.email == "joe@example.com"
+    assert len(server.paths) == 2
+
+
+def test_deferred(server):
+    provider = make_provider(user_info_attributes=["name", "username"])
+
+    user = provider.update_user().user
+
+    assert server.paths == ["/user"]
+    assert user.username == "joedoe"
+    assert user.to_dict()["email"] is None
+    assert server.paths == ["/user"]
+
+    assert user.email == "joe@example.com"
+    assert server.paths == ["/user", "/user/emails"]
+    assert user.email == "joe@example.com"
+    assert len(server.paths) == 2
+
+    with pytest.raises(AttributeError):
+        user.missing
+
+
+def test_sequential(server, monkeypatch):
+    def url(data):
+        return data["extra_url"]
+
+    def merge(data, extra):
+        data.update(extra)
+        return data
+
+    monkeypatch.setattr(
+        oauth2.GitHub,
+        "secondary_user_info",
+        (SecondaryUserInfo(("location",), url, merge),),
+    )
+    monkeypatch.setitem(USER, "extra_url", server.url + "/user/extra")
+
+    user = make_provider(user_info_attributes=["location"]).update_user().user
+
+    assert user.location == "Bratislava"
+    assert server.paths == ["/user", "/user/extra"]
+
+
+def test_required_failure(server, monkeypatch):
+    def url(data):
+        return data["extra_url"]
+
+    monkeypatch.setattr(
+        oauth2.GitHub,
+        "secondary_user_info",
+        (SecondaryUserInfo(("location",), url, None, required=True),),
+    )
+    monkeypatch.setitem(USER, "extra_url", server.url + "/user/broken")
+
+    response = make_provider().update_user()
+
+    assert response.status == 500
+    assert response.user.location is None
+    assert server.paths == ["/user", "/user/broken"]
+
+
+def test_authentication_provider():
+    class Provider(AuthenticationProvider):
+        def login(self):
+            pass
+
+    provider = Provider(Authomatic({"provider": {}}, "secret"), Adapter(), "provider")
+
+    user = provider._update_or_create_user({"id": "1", "email": "joe@example.com"})
+
+    assert user.id == "1"
+    assert user.email == "joe@example.com"
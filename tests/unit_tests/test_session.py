@@ -0,0 +1,141 @@
+import hashlib
+import hmac
+import pickle
+import time
+from urllib import parse
+
+import pytest
+
+from authomatic.codecs import JSONSessionCodec, PickleSessionCodec
+from authomatic.core import Session
+from authomatic.exceptions import SessionError
+
+from tests.unit_tests.helpers import Adapter
+
+DATA = {"authomatic:google:csrf": "c5f1e4a7b2d9", "authomatic:x:state": [1, "a"]}
+CODECS = [PickleSessionCodec(), JSONSessionCodec(), JSONSessionCodec(None)]
+
+
+def roundtrip(codec, data, cookie_name="authomatic"):
+    adapter = Adapter()
+    session = Session(adapter, "secret", codec=codec)
+    for key, value in data.items():
+        session[key] = value
+    session.save()
+
+    value = adapter.headers["Set-Cookie"].split(";")[0].split("=", 1)[1]
+    return value, Session(Adapter(cookies={cookie_name: value}), "secret", codec=codec)
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_roundtrip(codec):
+    _, session = roundtrip(codec, DATA)
+
+    assert session.data == DATA
+
+
+def test_pickle_codec_keeps_the_legacy_format():
+    value = PickleSessionCodec().encode(DATA, "secret", "authomatic")
+    encoded, timestamp, signature = value.split("|")
+
+    expected = hmac.new(b"secret", digestmod=hashlib.sha1)
+    expected.update("|".join(["authomatic", encoded, timestamp]).encode())
+    assert signature == expected.hexdigest()
+    assert pickle.loads(parse.unquote(encoded).encode("latin-1")) == DATA
+
+
+def test_json_codec_compresses_large_data():
+    data = {f"authomatic:provider{i}:csrf": "a" * 40 for i in range(20)}
+    compressed = JSONSessionCodec().encode(data, "secret", "authomatic")
+    plain = JSONSessionCodec(None).encode(data, "secret", "authomatic")
+
+    assert compressed.startswith("z")
+    assert len(compressed) < len(plain)
+    assert JSONSessionCodec().decode(compressed, "secret", "authomatic", 60) == data
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_tampered_value_is_rejected(codec):
+    value = codec.encode(DATA, "secret", "authomatic")
+
+    with pytest.raises(SessionError):
+        codec.decode(value, "other secret", "authomatic", 60)
+    with pytest.raises(SessionError):
+        codec.decode(value, "secret", "other name", 60)
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_expired_value_is_ignored(codec, monkeypatch):
+    value = codec.encode(DATA, "secret", "authomatic")
+    monkeypatch.setattr(time, "time", lambda: 10**10)
+
+    assert codec.decode(value, "secret", "authomatic", 60) is None
+
+
+def test_json_codec_ignores_legacy_cookies():
+    value = PickleSessionCodec().encode(DATA, "secret", "authomatic")
+
+    assert JSONSessionCodec().decode(value, "secret", "authomatic", 60) is None
+
+
+def test_cookie_is_decoded_once():
+    value, _ = roundtrip(PickleSessionCodec(), DATA)
+    session = Session(Adapter(cookies={"authomatic": value}), "secret")
+
+    for _ in range(3):
+        session.get("authomatic:google:csrf")
+        session.get("missing")
+
+    assert session.decode_count == 1
+
+
+def test_empty_session_is_not_decoded_repeatedly():
+    session = Session(Adapter(), "secret")
+
+    assert session.get("missing") is None
+    assert session.get("missing") is None
+    assert session.decode_count == 0
+    assert session.data == {}
+
+
+def test_unchanged_session_is_not_saved():
+    value, _ = roundtrip(PickleSessionCodec(), DATA)
+    adapter = Adapter(cookies={"authomatic": value})
+    session = Session(adapter, "secret")
+
+    session["authomatic:google:csrf"] = session["authomatic:google:csrf"]
+    session.save()
+
+    assert "Set-Cookie" not in adapter.headers
+    assert session.encode_count == 0
+    assert session.skipped_save_count == 1
+
+
+def test_modified_session_is_saved_once():
+    adapter = Adapter()
+    session = Session(adapter, "secret")
+    session["key"] = "value"
+
+    session.save()
+    session.save()
+
+    assert "Set-Cookie" in adapter.headers
+    assert session.encode_count == 1
+    assert session.skipped_save_count == 1
+    assert not session.dirty
+    # The data survive saving.
+    assert session["key"] == "value"
+
+
+def test_deleting_marks_session_dirty():
+    value, _ = roundtrip(PickleSessionCodec(), DATA)
+    adapter = Adapter(cookies={"authomatic": value})
+    session = Session(adapter, "secret")
+
+    del session["authomatic:google:csrf"]
+
+    assert session.dirty
+    session.save()
+    value = adapter.headers["Set-Cookie"].split(";")[0][11:]
+    restored = Session(Adapter(cookies={"authomatic": value}), "secret")
+    assert restored.data == {"authomatic:x:state": [1, "a"]}
@@ -0,0 +1,153 @@
+import time
+from urllib.parse import parse_qsl, urlsplit
+
+import pytest
+
+from authomatic import Authomatic
+from authomatic.exceptions import FailureError
+from authomatic.providers import oauth2
+from authomatic.stores import SQLiteLoginStateStore
+from authomatic.tracing import InMemorySpanExporter, Tracer
+
+from tests.unit_tests.helpers import Adapter, BaseHandler
+
+
+class Handler(BaseHandler):
+    def do_POST(self):
+        self.read_body()
+        self.respond({"access_token": "token", "user_id": "123"})
+
+
+@pytest.fixture(autouse=True)
+def server(start_amazon_server):
+    return start_amazon_server(Handler)
+
+
+def make_authomatic(signed_state=True, **kwargs):
+    config = {
+        "amazon": {
+            "class_": oauth2.Amazon,
+            "id": 1,
+            "consumer_key": "key",
+            "consumer_secret": "secret",
+            "signed_state": signed_state,
+        }
+    }
+    return Authomatic(config, "secret", **kwargs)
+
+
+def phase_1(authomatic, **params):
+    adapter = Adapter(params)
+    authomatic.login(adapter, "amazon")
+    query = dict(parse_qsl(urlsplit(adapter.headers["Location"]).query))
+    return adapter, query["state"]
+
+
+def test_login_without_session():
+    authomatic = make_authomatic()
+    adapter, state = phase_1(authomatic, user_state="app state")
+
+    assert "Set-Cookie" not in adapter.headers
+    assert oauth2.OAuth2.decode_state(state) == "app state"
+
+    # Another node without the cookie.
+    adapter = Adapter({"code": "code", "state": state})
+    result = make_authomatic().login(adapter, "amazon")
+
+    assert result.error is None
+    assert result.user.credentials.token == "token"
+    assert "Set-Cookie" not in adapter.headers
+
+
+def test_tampered_state():
+    authomatic = make_authomatic()
+    _, state = phase_1(authomatic)
+    payload, timestamp, signature = state.split(".")
+
+    result = authomatic.login(
+        Adapter({"code": "code", "state": f"{payload}.{timestamp}.x{signature}"}),
+        "amazon",
+    )
+
+    assert isinstance(result.error, FailureError)
+    assert result.user is None
+
+    result = Authomatic(authomatic.config, "other secret").login(
+        Adapter({"code": "code", "state": state}), "amazon"
+    )
+
+    assert isinstance(result.error, FailureError)
+
+
+def test_expired_state(monkeypatch):
+    authomatic = make_authomatic(session_max_age=60)
+    _, state = phase_1(authomatic)
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+
+    result = authomatic.login(Adapter({"code": "code", "state": state}), "amazon")
+
+    assert "expired" in str(result.error)
+
+
+def test_tracing_without_session():
+    exporter = InMemorySpanExporter()
+    authomatic = make_authomatic(tracer=Tracer(exporter))
+    adapter, state = phase_1(authomatic)
+
+    assert "Set-Cookie" not in adapter.headers
+    redirect = exporter.get("authomatic.login")[0]
+    assert redirect.attributes["outcome"] == "redirect"
+
+    adapter = Adapter({"code": "code", "state": state})
+    authomatic.login(adapter, "amazon")
+
+    assert "Set-Cookie" not in adapter.headers
+    login = exporter.get("authomatic.login")[1]
+    assert login.attributes["outcome"] == "success"
+    # Both steps share the correlation id derived from the CSRF token.
+    assert login.correlation_id == redirect.correlation_id
+    assert oauth2.OAuth2.decode_state(state, "csrf") not in login.correlation_id
+
+
+def test_unsigned_state_still_supported():
+    state = oauth2.OAuth2.encode_state("csrf", "app state").decode()
+
+    assert oauth2.OAuth2.decode_state(state, "csrf") == "csrf"
+    assert oauth2.OAuth2.decode_state(state) == "app state"
+
+
+def test_login_state_store(tmp_path):
+    path = str(tmp_path / "login_state.db")
+
+    def make():
+        store = SQLiteLoginStateStore(path)
+        return make_authomatic(signed_state=False, login_state_store=store)
+
+    adapter, state = phase_1(make())
+    cookie = adapter.headers["Set-Cookie"].partition(";")[0]
+    cookies = dict([cookie.split("=", 1)])
+
+    # Another process, but the same browser.
+    adapter = Adapter({"code": "code", "state": state}, cookies)
+    result = make().login(adapter, "amazon")
+
+    assert result.error is None
+    assert result.user.credentials.token == "token"
+    assert "Expires=Thu, 01-Jan-1970" in adapter.headers["Set-Cookie"]
+
+    # The state can be used only once.
+    result = make().login(Adapter({"code": "code", "state": state}, cookies), "amazon")
+
+    assert "Unable to retrieve stored state" in str(result.error)
+
+
+def test_login_state_store_other_browser(tmp_path):
+    store = SQLiteLoginStateStore(str(tmp_path / "login_state.db"))
+    authomatic = make_authomatic(signed_state=False, login_state_store=store)
+    _, state = phase_1(authomatic)
+
+    result = authomatic.login(Adapter({"code": "code", "state": state}), "amazon")
+
+    assert "Unable to retrieve stored state" in str(result.error)
+    assert result.user is None
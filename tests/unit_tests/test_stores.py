@@ -0,0 +1,208 @@
+import pytest
+
+from authomatic import Authomatic
+from authomatic.core import ServerSession
+from authomatic.providers import oauth1
+from authomatic.stores import (
+    MemoryLoginStateStore,
+    MemorySessionStore,
+    SQLiteLoginStateStore,
+    SQLiteSessionStore,
+)
+
+from tests.unit_tests.helpers import Adapter
+from tests.unit_tests.test_session import DATA
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        yield MemorySessionStore()
+    else:
+        store = SQLiteSessionStore(str(tmp_path / "sessions.db"))
+        yield store
+        store.close()
+
+
+def cookie_value(adapter):
+    return adapter.headers["Set-Cookie"].split(";")[0].split("=", 1)[1]
+
+
+def test_set_get_delete(store):
+    store.set("a", DATA, 60)
+
+    assert store.get("a") == DATA
+    assert store.get("b") is None
+
+    store.delete("a")
+
+    assert store.get("a") is None
+
+
+def test_ttl(store):
+    store.set("a", DATA, -1)
+    store.set("b", DATA, 60)
+
+    assert store.get("a") is None
+
+    store.purge()
+
+    assert store.get("b") == DATA
+
+
+def test_memory_store_evicts_least_recently_used():
+    store = MemorySessionStore(max_entries=2)
+    store.set("a", DATA, 60)
+    store.set("b", DATA, 60)
+    store.get("a")
+    store.set("c", DATA, 60)
+
+    assert len(store) == 2
+    assert store.get("b") is None
+    assert store.get("a") == DATA
+
+
+def test_memory_store_returns_copies():
+    store = MemorySessionStore()
+    store.set("a", {"x": 1}, 60)
+    store.get("a")["x"] = 2
+
+    assert store.get("a") == {"x": 1}
+
+
+def test_sqlite_store_purges_periodically(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"), purge_every=2)
+    store.set("a", DATA, -1)
+    store.set("b", DATA, 60)
+    count = store._connection.execute(
+        f"SELECT COUNT(*) FROM {store.table}"
+    ).fetchone()[0]
+
+    assert count == 1
+
+
+def test_sqlite_store_rejects_invalid_table(tmp_path):
+    with pytest.raises(ValueError):
+        SQLiteSessionStore(str(tmp_path / "sessions.db"), table="x; DROP")
+
+
+def test_server_session_roundtrip(store):
+    adapter = Adapter()
+    session = ServerSession(adapter, "secret", store)
+    for key, value in DATA.items():
+        session[key] = value
+    session.save()
+
+    value = cookie_value(adapter)
+    assert value == session.session_id
+    assert "csrf" not in value
+    assert store.get(value) == DATA
+
+    session = ServerSession(Adapter(cookies={"authomatic": value}), "secret", store)
+
+    assert session.data == DATA
+    assert session.session_id == value
+
+
+def test_server_session_unknown_id_gets_new_id(store):
+    session = ServerSession(Adapter(cookies={"authomatic": "unknown"}), "secret", store)
+
+    assert session.data == {}
+    assert session.session_id != "unknown"
+
+
+def test_server_session_delete(store):
+    adapter = Adapter()
+    session = ServerSession(adapter, "secret", store)
+    session["a"] = 1
+    session.save()
+    value = cookie_value(adapter)
+
+    session = ServerSession(Adapter(cookies={"authomatic": value}), "secret", store)
+    session.delete()
+
+    assert store.get(value) is None
+
+
+def test_server_session_removing_all_items(store):
+    adapter = Adapter()
+    session = ServerSession(adapter, "secret", store)
+    session["a"] = 1
+    session.save()
+    value = cookie_value(adapter)
+
+    session = ServerSession(Adapter(cookies={"authomatic": value}), "secret", store)
+    del session["a"]
+    session.save()
+
+    assert store.get(value) is None
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def login_state_store(request, tmp_path):
+    if request.param == "memory":
+        yield MemoryLoginStateStore()
+    else:
+        store = SQLiteLoginStateStore(str(tmp_path / "login_state.db"))
+        yield store
+        store.close()
+
+
+def test_login_state_pop(login_state_store):
+    login_state_store.set("a", "secret", 60)
+    login_state_store.set("expired", "secret", -1)
+
+    assert login_state_store.pop("a") == "secret"
+    assert login_state_store.pop("a") is None
+    assert login_state_store.pop("expired") is None
+    assert login_state_store.pop("missing") is None
+
+
+def test_sqlite_login_state_is_shared(tmp_path):
+    path = str(tmp_path / "login_state.db")
+    first, second = SQLiteLoginStateStore(path), SQLiteLoginStateStore(path)
+    first.set("a", ("tuple", 1), 60)
+
+    assert second.pop("a") == ("tuple", 1)
+    assert first.pop("a") is None
+
+
+def test_oauth1_token_secret(login_state_store):
+    config = {"twitter": {"class_": oauth1.Twitter, "id": 1}}
+    authomatic = Authomatic(config, "secret", login_state_store=login_state_store)
+    provider = authomatic._login_provider(Adapter(), "twitter", None, None, None)
+    provider._session_set("token_secret", "token secret", token="request token")
+
+    assert provider._stateless_login
+    assert provider._session_get("token_secret", token="other") is None
+    assert provider._session_get("token_secret", token="") is None
+    assert (
+        provider._session_get("token_secret", token="request token") == "token secret"
+    )
+    assert provider._session_get("token_secret", token="request token") is None
+
+
+
+def test_login_state_bound_to_browser(login_state_store):
+    config = {"twitter": {"class_": oauth1.Twitter, "id": 1}}
+    authomatic = Authomatic(config, "secret", login_state_store=login_state_store)
+
+    def provider(cookies=None):
+        return authomatic._login_provider(
+            Adapter(cookies=cookies), "twitter", None, None, None
+        )
+
+    started = provider()
+    started._session_set("token_secret", "token secret", token="request token")
+    started.save_session()
+    cookie = started.adapter.headers["Set-Cookie"].partition(";")[0]
+    name, _, value = cookie.partition("=")
+
+    assert provider()._session_get("token_secret", token="request token") is None
+
+    started._session_set("token_secret", "token secret", token="request token")
+    callback = provider({name: value})
+
+    assert callback._session_get("token_secret", token="request token") == (
+        "token secret"
+    )
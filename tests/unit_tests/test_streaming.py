@@ -0,0 +1,161 @@
+import json
+
+import pytest
+
+from authomatic import Authomatic
+from authomatic.core import Response
+from authomatic.exceptions import FetchError
+from authomatic.providers import oauth2
+from authomatic.transport import ConnectionPool
+
+from tests.unit_tests.helpers import Adapter, BaseHandler
+
+BODY = bytes(range(256)) * 1000
+
+
+class Handler(BaseHandler):
+    def do_GET(self):
+        if not self.path.startswith("/chunked"):
+            self.respond(BODY, content_type="application/octet-stream")
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for i in range(0, len(BODY), 10000):
+            chunk = BODY[i: i + 10000]
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+        self.wfile.write(b"0\r\n\r\n")
+
+
+@pytest.fixture
+def server(start_server):
+    return start_server(Handler)
+
+
+def fetch(pool, server, path="/"):
+    response = pool.request(
+        "http",
+        "127.0.0.1",
+        server.server_address[1],
+        "GET",
+        path,
+        headers={},
+        stream=True,
+    )
+    return Response(response)
+
+
+def open_connections(pool):
+    return sum(pool._open.values())
+
+
+@pytest.mark.parametrize("path", ["/", "/chunked"])
+def test_iter_content(server, path):
+    pool = ConnectionPool()
+    response = fetch(pool, server, path)
+
+    chunks = list(response.iter_content(4096))
+
+    assert b"".join(chunks) == BODY
+    assert max(len(c) for c in chunks) <= 4096
+    # The connection is back in the pool.
+    assert sum(len(idle) for idle in pool._idle.values()) == 1
+
+
+def test_closing_unread_response_discards_connection(server):
+    pool = ConnectionPool()
+    response = fetch(pool, server)
+    next(response.iter_content(1024))
+    response.close()
+
+    assert open_connections(pool) == 0
+
+
+@pytest.mark.parametrize("path", ["/", "/chunked"])
+def test_max_size(server, path):
+    pool = ConnectionPool()
+    response = fetch(pool, server, path)
+
+    with pytest.raises(FetchError):
+        for _ in response.iter_content(4096, max_size=len(BODY) // 2):
+            pass
+
+    assert open_connections(pool) == 0
+
+
+def test_context_manager_discards_connection(server):
+    pool = ConnectionPool()
+    with fetch(pool, server) as response:
+        next(response.iter_content(1024))
+
+    assert open_connections(pool) == 0
+
+
+def test_iter_content_after_content(server):
+    response = fetch(ConnectionPool(), server)
+    content = response.content
+
+    assert b"".join(response.iter_content(1000)) == content == BODY
+
+
+def test_is_binary_string():
+    textchars = bytearray([7, 8, 9, 10, 12, 13, 27]) + bytearray(range(0x20, 0x100))
+    for byte in range(256):
+        content = b"abc" + bytes([byte])
+        expected = bool(content.translate(None, textchars))
+        assert Response.is_binary_string(content) is expected
+
+
+class LegacyAdapter(Adapter):
+    # Only has the status attribute.
+    set_status = None
+
+
+def backend(server, path, adapter_class=Adapter, **kwargs):
+    authomatic = Authomatic({"amazon": {"class_": oauth2.Amazon, "id": 1}}, "secret")
+    provider = oauth2.Amazon(authomatic, None, "amazon")
+    provider.credentials.token = "token"
+    adapter = adapter_class(
+        {
+            "type": "fetch",
+            "credentials": provider.credentials.serialize(),
+            "url": f"http://127.0.0.1:{server.server_address[1]}{path}",
+        }
+    )
+    authomatic.backend(adapter, **kwargs)
+    adapter.pool = authomatic.connection_pool
+    return adapter
+
+
+@pytest.mark.parametrize("path", ["/", "/chunked"])
+def test_backend_stream(server, path):
+    adapter = backend(server, path, stream=True, chunk_size=10000)
+
+    assert len(adapter.written) > 1
+    assert b"".join(adapter.written) == BODY
+    assert adapter.status == "200 OK"
+    assert "Transfer-Encoding" not in adapter.headers
+    assert adapter.headers["Authomatic-Response-To"] == "fetch"
+
+
+@pytest.mark.parametrize("stream", [True, False])
+def test_backend_max_body_size(server, stream):
+    adapter = backend(server, "/", stream=stream, max_body_size=1000)
+
+    assert adapter.status == "502 Bad Gateway"
+    assert "error" in json.loads(adapter.written[0])
+    assert open_connections(adapter.pool) == 0
+
+
+def test_backend_adapter_without_set_status(server):
+    adapter = backend(server, "/", adapter_class=LegacyAdapter)
+
+    assert adapter.status == "200 OK"
+    assert adapter.written == [BODY]
+
+
+def test_backend_max_body_size_not_exceeded(server):
+    adapter = backend(server, "/", max_body_size=len(BODY))
+
+    assert adapter.written == [BODY]
@@ -0,0 +1,161 @@
+import asyncio
+from urllib.parse import parse_qsl, urlsplit
+
+import pytest
+
+from authomatic import Authomatic
+from authomatic.providers import oauth2
+from authomatic.tracing import NOOP_SPAN, InMemorySpanExporter, Tracer
+
+from tests.unit_tests.helpers import Adapter, BaseHandler
+
+
+class Handler(BaseHandler):
+    def do_GET(self):
+        if self.path.startswith("/redirect"):
+            location = "http://{0}:{1}/final".format(*self.server.server_address)
+            self.respond({}, 302, [("Location", location)])
+        else:
+            self.respond({"a": 1})
+
+    def do_POST(self):
+        self.read_body()
+        self.respond({"access_token": "token", "user_id": "123"})
+
+
+@pytest.fixture
+def base_url(start_amazon_server):
+    return start_amazon_server(Handler).url
+
+
+@pytest.fixture
+def exporter():
+    return InMemorySpanExporter()
+
+
+def make_authomatic(tracer=None):
+    config = {
+        "amazon": {
+            "class_": oauth2.Amazon,
+            "id": 1,
+            "consumer_key": "key",
+            "consumer_secret": "secret",
+        }
+    }
+    return Authomatic(config, "secret", tracer=tracer)
+
+
+@pytest.fixture
+def authomatic(exporter):
+    return make_authomatic(Tracer(exporter))
+
+
+def credentials(authomatic):
+    provider = oauth2.Amazon(authomatic, None, "amazon")
+    provider.credentials.token = "token"
+    return provider.credentials.serialize()
+
+
+def test_span_nesting(exporter):
+    tracer = Tracer(exporter)
+
+    with tracer.start_span("outer", key="value") as outer:
+        assert Tracer.current_span() is outer
+        with pytest.raises(ValueError):
+            with tracer.start_span("inner") as inner:
+                raise ValueError()
+    assert Tracer.current_span() is None
+
+    assert exporter.spans == [inner, outer]
+    assert inner.parent_id == outer.span_id
+    assert inner.correlation_id == outer.correlation_id
+    assert inner.error == "ValueError"
+    assert outer.error is None
+    assert outer.attributes == {"key": "value"}
+    assert outer.duration >= inner.duration >= 0
+
+    with tracer.start_span("other") as other:
+        pass
+    assert other.parent_id is None
+    assert other.correlation_id != outer.correlation_id
+
+
+def test_login(authomatic, exporter, base_url):
+    adapter = Adapter()
+    authomatic.login(adapter, "amazon")
+
+    assert [s.name for s in exporter.spans] == ["oauth2.authorize", "authomatic.login"]
+    assert exporter.spans[-1].attributes["outcome"] == "redirect"
+    correlation_id = exporter.spans[-1].correlation_id
+
+    state = dict(parse_qsl(urlsplit(adapter.headers["Location"]).query))["state"]
+    name, _, value = adapter.headers["Set-Cookie"].split(";")[0].partition("=")
+    exporter.clear()
+
+    result = authomatic.login(
+        Adapter({"code": "code", "state": state}, {name: value}), "amazon"
+    )
+
+    assert result.user.credentials.token == "token"
+    spans = {span.name: span for span in exporter.spans}
+    assert list(spans) == [
+        "oauth2.validate_state",
+        "authomatic.connect",
+        "authomatic.fetch",
+        "oauth2.token",
+        "authomatic.user",
+        "authomatic.login",
+    ]
+    assert {span.correlation_id for span in exporter.spans} == {correlation_id}
+    login = spans["authomatic.login"]
+    assert login.parent_id is None
+    assert login.attributes == {"provider": "amazon", "outcome": "success"}
+    assert spans["oauth2.token"].parent_id == login.span_id
+    assert spans["oauth2.token"].attributes["status"] == 200
+    assert spans["authomatic.fetch"].parent_id == spans["oauth2.token"].span_id
+    assert spans["authomatic.fetch"].attributes == {
+        "provider": "amazon",
+        "phase": "token",
+        "method": "POST",
+        "url": base_url + "/token",
+        "hop": 0,
+        "status": 200,
+    }
+    assert spans["authomatic.user"].parent_id == login.span_id
+
+
+def test_access_redirect_hops(authomatic, exporter, base_url):
+    authomatic.access(credentials(authomatic), base_url + "/redirect?secret=1")
+
+    fetches = exporter.get("authomatic.fetch")
+    access = exporter.get("authomatic.access")[0]
+    assert [(f.attributes["hop"], f.attributes["status"]) for f in fetches] == [
+        (0, 302),
+        (1, 200),
+    ]
+    assert fetches[0].attributes["url"] == base_url + "/redirect"
+    assert {f.parent_id for f in fetches} == {access.span_id}
+    assert access.attributes["outcome"] == "success"
+    # The second hop reuses the keep-alive connection.
+    assert len(exporter.get("authomatic.connect")) == 1
+
+
+def test_async_access(authomatic, exporter, base_url):
+    asyncio.run(authomatic.aaccess(credentials(authomatic), base_url + "/redirect"))
+
+    fetches = exporter.get("authomatic.fetch")
+    access = exporter.get("authomatic.access")[0]
+    assert [f.attributes["hop"] for f in fetches] == [0, 1]
+    assert {f.parent_id for f in fetches} == {access.span_id}
+    assert {f.correlation_id for f in fetches} == {access.correlation_id}
+
+
+def test_disabled(base_url):
+    authomatic = make_authomatic()
+    adapter = Adapter()
+    provider = oauth2.Amazon(authomatic, adapter, "amazon")
+
+    assert provider._span("authomatic.fetch") is NOOP_SPAN
+
+    authomatic.login(adapter, "amazon")
+    assert "correlation_id" not in adapter.headers["Set-Cookie"]
@@ -0,0 +1,144 @@
+import os
+import shutil
+import ssl
+import threading
+
+import pytest
+
+from authomatic.exceptions import FetchError
+from authomatic.transport import ConnectionPool, SSLContextCache
+
+from tests.unit_tests.helpers import BaseHandler
+
+
+class KeepAliveHandler(BaseHandler):
+    def do_GET(self):
+        self.respond(b'{"client_port": %d}' % self.client_address[1])
+        # Silently drop the keep-alive connection.
+        self.close_connection = self.path == "/drop"
+
+
+@pytest.fixture
+def server(start_server):
+    return start_server(KeepAliveHandler)
+
+
+def fetch(pool, server, path="/"):
+    return pool.request(
+        "http", "127.0.0.1", server.server_address[1], "GET", path, headers={}
+    )
+
+
+def test_connection_is_reused(server):
+    pool = ConnectionPool()
+
+    first = fetch(pool, server).read()
+    second = fetch(pool, server).read()
+
+    assert first == second
+
+
+def test_max_idle_zero_disables_reuse(server):
+    pool = ConnectionPool(max_idle=0)
+
+    first = fetch(pool, server).read()
+    second = fetch(pool, server).read()
+
+    assert first != second
+
+
+def test_stale_connection_is_retried(server):
+    pool = ConnectionPool()
+    fetch(pool, server, "/drop")
+
+    assert fetch(pool, server).status == 200
+
+
+def test_max_per_host_blocks_until_released(server):
+    pool = ConnectionPool(max_per_host=1)
+    connection, _ = pool.acquire("http", "127.0.0.1", server.server_address[1])
+
+    acquired = threading.Event()
+
+    def acquire():
+        pool.acquire("http", "127.0.0.1", server.server_address[1])
+        acquired.set()
+
+    threading.Thread(target=acquire, daemon=True).start()
+    assert not acquired.wait(0.2)
+
+    pool.discard(connection)
+    assert acquired.wait(2)
+
+
+def test_max_per_host_wait_times_out(server):
+    pool = ConnectionPool(max_per_host=1, wait_timeout=0.1)
+    pool.acquire("http", "127.0.0.1", server.server_address[1])
+
+    with pytest.raises(FetchError, match="Timed out"):
+        pool.acquire("http", "127.0.0.1", server.server_address[1])
+
+
+@pytest.fixture
+def cafile(tmp_path):
+    default = ssl.get_default_verify_paths().cafile
+    if not default or not os.path.exists(default):
+        pytest.skip("No default CA file available.")
+    path = tmp_path / "ca.pem"
+    shutil.copyfile(default, path)
+    return str(path)
+
+
+def test_ssl_context_is_cached(cafile):
+    cache = SSLContextCache()
+
+    assert cache.get(cafile) is cache.get(cafile)
+    assert cache.get(cafile) is not cache.get(cafile, ssl_verify=False)
+
+
+def test_ssl_context_is_invalidated_by_mtime(cafile):
+    cache = SSLContextCache()
+    context = cache.get(cafile)
+
+    stat = os.stat(cafile)
+    os.utime(cafile, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    assert cache.get(cafile) is not context
+
+
+class FakeSocket:
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_replaced_ssl_context_drops_connections(cafile):
+    cache = SSLContextCache()
+    pool = ConnectionPool()
+    idle, _ = pool.acquire("https", "example.com", 443, cache.get(cafile))
+    busy, _ = pool.acquire("https", "example.com", 443, cache.get(cafile))
+    # Pretend they're connected.
+    idle.sock, busy.sock = FakeSocket(), FakeSocket()
+    idle_socket, busy_socket = idle.sock, busy.sock
+    pool.release(idle)
+
+    assert pool.acquire("https", "example.com", 443, cache.get(cafile)) == (
+        idle,
+        True,
+    )
+    pool.release(idle)
+
+    stat = os.stat(cafile)
+    os.utime(cafile, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    connection, reused = pool.acquire("https", "example.com", 443, cache.get(cafile))
+
+    assert connection is not idle
+    assert not reused
+    assert idle_socket.closed
+
+    pool.release(busy)
+
+    assert busy_socket.closed
+    assert sum(pool._open.values()) == 1
+    assert not pool._outdated